@@ -5,128 +5,401 @@ import json
 import psycopg2
 import datetime
 
-from commands.help import Help
+from commands.help import HELP_ALL_JSON
 from models import db
-from slack import WebClient
 from slackeventsapi import SlackEventAdapter
 
 from commands.viewpoints import ViewPoints
 from configuration.env_config import Config
 from commands.createtask import CreateTask
+from helpers.dbpool import engine_options, observe_pool, warm_up
 from helpers.errorhelper import ErrorHelper
+from helpers.health import CachedCheck, Readiness, database_check, slack_check, wedged_threads
+from helpers.jobs import DailyScheduler, DueTodayCache, SharedVersion, digest_messages
+from helpers.logconfig import PAYLOAD_LOGGER, configure_logging
+from helpers.metrics import CONTENT_TYPE, REGISTRY, MultiProcessExporter, render
+from helpers.dispatcher import WorkQueue
+from helpers.migrations import migrate
+from helpers.pagination import NEXT_PAGE_ACTION_ID, parse_next_page
+from helpers.ratelimit import BACKGROUND, RateLimited, RateLimitedClient
+from helpers.roster import ChannelRoster
+from helpers.singleflight import FileSingleFlight
+from helpers.slackasync import AsyncSlack, async_retry_handlers
+from helpers.slacktransport import ConnectionPool, PooledWebClient, PooledWebhookClient, retry_handlers
+from helpers.taskimport import FORMATS, TaskImporter, detect_format, is_slack_user_id, read_rows
+from helpers import timing
+from helpers.timing import SLACK, TimedClient, instrument_engine
+from helpers.userdirectory import UserDirectory
 from commands.updatetask import UpdateTask
 from commands.viewmytasks import ViewMyTasks
 from commands.viewdeadlinetasks import ViewDeadlineTasks
 import os
 import certifi
+import click
+import csv
 import logging
+import hmac
+import io
+import ssl
+from zoneinfo import ZoneInfo
+
+configure_logging(
+    level=Config.LOG_LEVEL,
+    module_levels=Config.LOG_LEVELS,
+    json_output=Config.LOG_JSON,
+    payload_sample_rate=Config.LOG_PAYLOAD_SAMPLE_RATE,
+)
+payload_logger = logging.getLogger(PAYLOAD_LOGGER)
 
 app = Flask(__name__)
 app.config["SQLALCHEMY_DATABASE_URI"] = Config.SQLALCHEMY_DATABASE_URI
+app.config["SQLALCHEMY_ECHO"] = Config.SQLALCHEMY_ECHO
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(Config)
 db.init_app(app)
-
-logging.basicConfig(level=logging.DEBUG)
+# time database, Slack and rendering work per request, see helpers/timing.py
+timing.init_app(app, header=Config.SERVER_TIMING_HEADER)
+with app.app_context():
+    instrument_engine(db.engine)
+    observe_pool(db.engine)
+# the worker processes of a host share their metrics through METRICS_DIR, see configuration/serving.py
+metrics_exporter = None
+if Config.METRICS_DIR:
+    metrics_exporter = MultiProcessExporter(Config.METRICS_DIR, interval=Config.METRICS_WRITE_INTERVAL_SECONDS)
 
 # Set up SSL certificates
 os.environ['SSL_CERT_FILE'] = certifi.where()
-logging.info(f"Using SSL certificates from: {certifi.where()}")
+app.logger.debug("Using SSL certificates from %s", certifi.where())
 
-# instantiating slack client
-slack_client = WebClient(Config.SLACK_BOT_TOKEN)
+# instantiating slack client, every Slack call of this worker goes through one pool of kept-alive connections
+slack_pool = ConnectionPool(
+    timeout=Config.SLACK_TIMEOUT_SECONDS,
+    maxsize=Config.SLACK_POOL_SIZE,
+    ssl_context=ssl.create_default_context(cafile=certifi.where()),
+)
+# calls are scheduled within Slack's rate limit tiers, which also handles 429s and their Retry-After
+rate_limited_client = RateLimitedClient(
+    PooledWebClient(
+        Config.SLACK_BOT_TOKEN,
+        base_url=Config.SLACK_API_BASE_URL,
+        pool=slack_pool,
+        timeout=Config.SLACK_TIMEOUT_SECONDS,
+        retry_handlers=retry_handlers(Config.SLACK_MAX_RETRIES, rate_limited=False),
+    ),
+    scale=Config.SLACK_RATE_LIMIT_SCALE,
+    max_wait=Config.SLACK_RATE_LIMIT_MAX_WAIT_SECONDS,
+    max_retries=Config.SLACK_MAX_RETRIES,
+)
+# calls are timed per request, including the waits for their rate limit
+slack_client = TimedClient(rate_limited_client)
 slack_events_adapter = SlackEventAdapter(
     Config.SLACK_SIGNING_SECRET, "/slack/events", app
 )
-print(f"SlackEventAdapter initialized with signing secret: {Config.SLACK_SIGNING_SECRET}")
-def getUsers(channel_id): 
-    users = []
-    result = slack_client.conversations_members(channel= channel_id)
-    for user in result['members']:
-        info = slack_client.users_info(user = user).data
-        if 'real_name' in info['user'].keys(): 
-            if(info['user']['real_name'] != 'bot'):
-                users.append({"name": info['user']['real_name'], "user_id": info['user']['id']})
-    return users
-
-def findName(slack_id, channel_id): 
-    for element in getUsers(channel_id): 
-        if(element['user_id'] == slack_id): 
-            return element['name']
+# async mode: calls that do not depend on each other run concurrently on one event loop thread per worker, within
+# the same rate limits as the calls of slack_client
+slack_async = None
+if Config.SLACK_ASYNC:
+    slack_async = AsyncSlack(
+        Config.SLACK_BOT_TOKEN,
+        concurrency=Config.SLACK_ASYNC_CONCURRENCY,
+        timeout=Config.SLACK_TIMEOUT_SECONDS,
+        ssl_context=slack_pool.ssl_context,
+        base_url=Config.SLACK_API_BASE_URL,
+        scheduler=rate_limited_client,
+        retry_handlers=async_retry_handlers(Config.SLACK_MAX_RETRIES, rate_limited=False),
+    )
+directory = UserDirectory(
+    slack_client,
+    ttl=Config.DIRECTORY_TTL_SECONDS,
+    fetch_users=slack_async.users_info_many if slack_async else None,
+)
+workspace_tz = ZoneInfo(Config.WORKSPACE_TIMEZONE)
+# tasks due today, queried once a day per worker and again after task writes
+due_today = DueTodayCache(
+    ViewDeadlineTasks.due_tasks,
+    tz=workspace_tz,
+    max_age=Config.DUE_TODAY_MAX_AGE_SECONDS or None,
+    version=SharedVersion(Config.DUE_TODAY_VERSION_FILE) if Config.DUE_TODAY_VERSION_FILE else None,
+)
+roster = ChannelRoster(
+    slack_client,
+    directory,
+    ttl=Config.ROSTER_TTL_SECONDS,
+    flight=FileSingleFlight("roster", Config.ROSTER_SHARED_FETCH_DIR) if Config.ROSTER_SHARED_FETCH_DIR else None,
+)
+
+
+@slack_events_adapter.on("user_change")
+def user_change(event_data):
+    directory.update(event_data["event"]["user"])
+
+
+@slack_events_adapter.on("team_join")
+def team_join(event_data):
+    directory.update(event_data["event"]["user"])
+
+
+@slack_events_adapter.on("member_joined_channel")
+def member_joined_channel(event_data):
+    roster.handle_member_joined(event_data["event"])
+
+
+@slack_events_adapter.on("member_left_channel")
+def member_left_channel(event_data):
+    roster.handle_member_left(event_data["event"])
+
+
+def getUsers(channel_id):
+    return roster.get(channel_id)
+
+
+def respond(payload, replace_original=False, **message):
+    """
+    Replies to the user who triggered an interactive action, through the action's response_url when Slack provides one
+
+    :param payload: Interactive action payload
+    :type payload: dict[str, Any]
+    :param replace_original: Replace the message holding the action instead of posting a new one
+    :type replace_original: bool
+    :raise:
+    :return: None
+    :rtype: None
+
+    """
+    response_url = payload.get("response_url")
+    if response_url:
+        with timing.phase(SLACK):
+            PooledWebhookClient(
+                response_url,
+                pool=slack_pool,
+                timeout=Config.SLACK_TIMEOUT_SECONDS,
+                retry_handlers=retry_handlers(Config.SLACK_MAX_RETRIES),
+            ).send(
+                response_type="ephemeral", replace_original=replace_original, **message
+            )
+    else:
+        slack_client.chat_postEphemeral(
+            channel=payload["container"]["channel_id"],
+            user=payload["user"]["id"],
+            **message,
+        )
+
+
+def busy_response():
+    """
+    Tells the user to retry a command that Slack's rate limits held back
+
+    :param:
+    :type:
+    :raise:
+    :return: Ephemeral message response
+    :rtype: Response
+
+    """
+    return jsonify(
+        {
+            "response_type": "ephemeral",
+            "text": "Slack is busy right now, please try again in a few seconds.",
+        }
+    )
+
+
+def post_ephemeral_many(messages):
+    """
+    Posts ephemeral messages to many users, concurrently in async mode
+
+    :param messages: chat.postEphemeral arguments of each message
+    :type messages: list[dict[str, Any]]
+    :raise:
+    :return: None
+    :rtype: None
+
+    """
+    if slack_async is not None:
+        with timing.phase(SLACK):
+            results = slack_async.call_many("chat_postEphemeral", messages)
+        for message, result in zip(messages, results):
+            if isinstance(result, Exception):
+                app.logger.warning("Could not notify %s: %s", message.get("user"), result)
+        return
+    for message in messages:
+        slack_client.chat_postEphemeral(**message)
+
+
+def handle_create_action(payload):
+    """
+    Creates the task described by a create_action_button payload and notifies the creator and assignee
+
+    :param payload: Interactive action payload
+    :type payload: dict[str, Any]
+    :raise:
+    :return: None
+    :rtype: None
+
+    """
+    # Extract relevant info
+    channel_id = payload["container"]["channel_id"]
+    user_id = payload["user"]["id"]
+    user_name = payload["user"]["name"]  # Get the name of the user creating the task
+    state_values = payload["state"]["values"]
+    desc = None
+    deadline = None
+    points = None
+    assignee = None
+
+    # Loop through state values to fetch task details
+    for _, val in state_values.items():
+        if "create_action_description" in val:
+            desc = val["create_action_description"]["value"]
+        elif "create_action_deadline" in val:
+            deadline = val["create_action_deadline"]["selected_date"]
+        elif "create_action_points" in val:
+            points = val["create_action_points"]["selected_option"]["value"] if val["create_action_points"]["selected_option"] else None
+        elif "create_action_assignees" in val:
+            assignee = val["create_action_assignees"]["selected_option"]["value"] if val["create_action_assignees"]["selected_option"] else None
+
+    # Check if necessary details are provided
+    if not desc or not deadline or not points:
+        error_blocks = [{"type": "section", "text": {"type": "mrkdwn", "text": "Please provide description, deadline, and points to create the task."}}]
+        respond(payload, blocks=error_blocks)
+        return
+
+    # Create an instance of the CreateTask class
+    task_creator = CreateTask(users=[{"name": user_name, "user_id": user_id}])
+
+    # Call create_task to add the task to the database and get the task ID
+    blocks, task_id = task_creator.create_task(desc, points, deadline, assignee, user_id)
+    due_today.invalidate()
+
+    # Post success message to the user who created the task
+    message = f"Task created successfully!\n*Description:* {desc}\n*Points:* {points}\n*Deadline:* {deadline}\n*Task ID:* {task_id}"
+    respond(payload, text=message)
+
+    # If there's an assignee, fetch their name and notify them with the task ID and assigner's name
+    if assignee:
+        # Look up the assignee in the workspace directory
+        assignee_record = directory.get(assignee)
+
+        if assignee_record is not None:
+            # Get the display name of the assignee
+            assignee_display_name = assignee_record.display_name
+            if assignee_display_name is None:
+                assignee_display_name = "No display name"
+            app.logger.debug("Notifying assignee %s (%s) of task %s", assignee, assignee_display_name, task_id)
+
+            # Prepare the message for the assignee
+            assignee_message = f"Task #{task_id} has been assigned to you by {user_name}."
+
+            # Send the message to the assignee
+            post_ephemeral_many([{"channel": channel_id, "user": assignee, "text": assignee_message}])
+        else:
+            app.logger.warning("Unable to fetch assignee information for user ID %s", assignee)
+
+
+def handle_next_page(payload):
+    """
+    Replaces a task listing with its next page when its next page button is clicked
+
+    :param payload: Interactive action payload
+    :type payload: dict[str, Any]
+    :raise ValueError: If the button names an unknown listing
+    :return: None
+    :rtype: None
+
+    """
+    view, after, params = parse_next_page(payload["actions"][0]["value"])
+    if view == "points":
+        listing = ViewPoints(progress=float(params["progress"]))
+    elif view == "me":
+        listing = ViewMyTasks(payload["user"]["id"])
+    elif view == "today":
+        listing = ViewDeadlineTasks(due_today)
+    else:
+        raise ValueError(f"Unknown task listing: {view}")
+    respond(payload, replace_original=True, blocks=listing.get_list(after=after)["blocks"])
+
+
+# action_id of an interactive element -> handler of its payload
+interactive_actions = {
+    "create_action_button": handle_create_action,
+    NEXT_PAGE_ACTION_ID: handle_next_page,
+}
+
+interactive_queue = WorkQueue(
+    "interactive",
+    workers=Config.INTERACTIVE_WORKERS,
+    maxsize=Config.INTERACTIVE_QUEUE_SIZE,
+)
+
+# dependency checks of the readiness probe, cached so that probes do not add load to Postgres or Slack
+with app.app_context():
+    ready_checks = [
+        CachedCheck(
+            "database",
+            database_check(
+                db.engine,
+                Config.DB_POOL_SIZE + Config.DB_POOL_MAX_OVERFLOW,
+                saturation=Config.READY_POOL_SATURATION,
+            ),
+            ttl=Config.READY_CHECK_TTL_SECONDS,
+        )
+    ]
+if Config.READY_SLACK_TTL_SECONDS:
+    ready_checks.append(CachedCheck("slack", slack_check(slack_client), ttl=Config.READY_SLACK_TTL_SECONDS))
+readiness = Readiness(ready_checks)
+
+
+def warm_up_database():
+    """
+    Opens the minimum pool connections of this worker, called by gunicorn once the worker has loaded the app
+
+    :param:
+    :type:
+    :raise:
+    :return: Number of connections opened
+    :rtype: int
+
+    """
+    with app.app_context():
+        opened = warm_up(db.engine, Config.DB_POOL_MIN_CONNECTIONS)
+    app.logger.info("Opened %d database connections", opened)
+    return opened
+
+
+def run_in_app_context(handler, payload):
+    with app.app_context():
+        try:
+            handler(payload)
+        except Exception:
+            respond(payload, text="Oops! Something went wrong. Please try again.")
+            raise
+
 
 @app.route("/slack/interactive-endpoint", methods=["POST"])
 def interactive_endpoint():
     """
     Handles interactive events like button clicks for creating a task.
+
+    In ack-first mode the payload is only validated and enqueued here; a worker does the database and Slack work
+    and replies through the response_url, so Slack always gets its acknowledgement within its 3 second deadline.
     """
     payload = json.loads(request.form.get("payload"))
-    print("payload:", payload)
+    payload_logger.info("Interactive payload", extra={"payload": payload})
 
     try:
         if payload["type"] == "block_actions":
             actions = payload["actions"]
             if len(actions) > 0:
-                if actions[0]["action_id"] == "create_action_button":
-                    # Extract relevant info
-                    channel_id = payload["container"]["channel_id"]
-                    user_id = payload["user"]["id"]
-                    user_name = payload["user"]["name"]  # Get the name of the user creating the task
-                    state_values = payload["state"]["values"]
-                    desc = None
-                    deadline = None
-                    points = None
-                    assignee = None
-                    
-                    # Loop through state values to fetch task details
-                    for _, val in state_values.items():
-                        if "create_action_description" in val:
-                            desc = val["create_action_description"]["value"]
-                        elif "create_action_deadline" in val:
-                            deadline = val["create_action_deadline"]["selected_date"]
-                        elif "create_action_points" in val:
-                            points = val["create_action_points"]["selected_option"]["value"] if val["create_action_points"]["selected_option"] else None
-                        elif "create_action_assignees" in val:
-                            assignee = val["create_action_assignees"]["selected_option"]["value"] if val["create_action_assignees"]["selected_option"] else None
-
-                    # Check if necessary details are provided
-                    if not desc or not deadline or not points:
-                        error_blocks = [{"type": "section", "text": {"type": "mrkdwn", "text": "Please provide description, deadline, and points to create the task."}}]
-                        slack_client.chat_postEphemeral(channel=channel_id, user=user_id, blocks=error_blocks)
-                    else:
-                        # Create an instance of the CreateTask class
-                        task_creator = CreateTask(users=[{"name": user_name, "user_id": user_id}])
-                        
-                        # Call create_task to add the task to the database and get the task ID
-                        blocks, task_id = task_creator.create_task(desc, points, deadline, assignee, user_id)
-
-                        # Post success message to the user who created the task
-                        message = f"Task created successfully!\n*Description:* {desc}\n*Points:* {points}\n*Deadline:* {deadline}\n*Task ID:* {task_id}"
-                        slack_client.chat_postEphemeral(channel=channel_id, user=user_id, text=message)
-
-                        # If there's an assignee, fetch their name and notify them with the task ID and assigner's name
-                        if assignee:
-                            # Debugging: Log assignee ID to verify it's being passed correctly
-                            print(f"Assignee ID: {assignee}")
-
-                            # Fetch assignee's information from Slack API
-                            assignee_info = slack_client.users_info(user=assignee)
-
-                            # Debugging: Log assignee info to ensure response is correct
-                            print(f"Assignee Info: {assignee_info}")
-
-                            if assignee_info.get('ok', False):
-                                # Get the display name of the assignee
-                                assignee_display_name = assignee_info["user"]["profile"].get("display_name", "No display name")
-                                print(f"Assignee Display Name: {assignee_display_name}")
-
-                                # Prepare the message for the assignee
-                                assignee_message = f"Task #{task_id} has been assigned to you by {user_name}."
-            
-                                # Send the message to the assignee
-                                slack_client.chat_postEphemeral(channel=channel_id, user=assignee, text=assignee_message)
-                            else:
-                                print(f"Error: Unable to fetch assignee information for user ID: {assignee}")
+                handler = interactive_actions.get(actions[0]["action_id"])
+                if handler is None:
+                    return make_response("", 200)
+                if not Config.INTERACTIVE_ACK_FIRST:
+                    handler(payload)
+                elif not interactive_queue.submit(run_in_app_context, handler, payload):
+                    app.logger.warning("Interactive queue is full, rejecting action")
+                    return jsonify({"error": "Server is busy, please try again"}), 503
     except Exception as e:
         return jsonify({"error": str(e)}), 500
-    
+
     return make_response("", 200)
 
 
@@ -167,12 +440,11 @@ def vpending():
         vt = ViewMyTasks(user_id) 
         payload = vt.get_list()
     elif(text == "today"): 
-        vdt = ViewDeadlineTasks()
+        vdt = ViewDeadlineTasks(due_today)
         payload = vdt.get_list()
     elif(len(text) == 0):
         vp = ViewPoints(progress=0.0)
         payload = vp.get_list()
-    print(jsonify(payload))
     return jsonify(payload)
 
 
@@ -216,6 +488,7 @@ def taskdone():
         data = request.form
         td = TaskDone(data)
         payload = td.update_points()
+        due_today.invalidate()
     except Exception as e:
         return jsonify({"error": str(e)}), 500
     return jsonify(payload)
@@ -242,6 +515,8 @@ def create():
         ct = CreateTask(getUsers(channel_id))
         blocks = ct.create_task_input_blocks()
         slack_client.chat_postEphemeral(channel=channel_id, user=user_id, blocks=blocks)
+    except RateLimited:
+        return busy_response()
     except Exception as e:
         return jsonify({"error": str(e)}), 500
     # return Response(), 200
@@ -260,6 +535,7 @@ def create():
 
     return Response(), 200
 
+
 @app.route("/user", methods=["POST"])
 def get_user_id():
     """
@@ -279,14 +555,49 @@ def get_user_id():
         "text": f"Your Slack User ID: `{user_id}`\nYour Slack Username: `{user_name}`"
     }), 200
 
+
 @app.route("/test-help", methods=["GET"])
 def test_help():
     return jsonify({"message": "Test Help Endpoint"})
+
+
 @app.route("/health", methods=["GET"])
 def health():
     return jsonify({"message":"Hello World!"})
 
 
+@app.route("/ready", methods=["GET"])
+def ready():
+    """
+    Readiness probe: whether this worker's database pool has connections to spare and its dependencies answer
+
+    :param:
+    :type:
+    :raise:
+    :return: Response object with the outcome of each check, 503 if one failed
+    :rtype: Response
+
+    """
+    is_ready, checks = readiness.run()
+    return jsonify({"ready": is_ready, "checks": checks}), 200 if is_ready else 503
+
+
+@app.route("/live", methods=["GET"])
+def live():
+    """
+    Liveness probe: whether this worker's background threads still make progress
+
+    :param:
+    :type:
+    :raise:
+    :return: Response object with the wedged threads, 503 if there are any
+    :rtype: Response
+
+    """
+    problems = wedged_threads([interactive_queue], Config.LIVE_MAX_JOB_SECONDS, slack_async)
+    return jsonify({"live": not problems, "problems": problems}), 503 if problems else 200
+
+
 @app.route("/updatetask", methods=["POST"])
 def update(): 
     """
@@ -318,10 +629,13 @@ def update():
         else:
             app.logger.error("Task ID not found.")
             return jsonify({"status": "error", "message": "Task ID not found"}), 404
+    except RateLimited:
+        return busy_response()
     except Exception as e:
         app.logger.error(f"Exception occurred: {e}")
         return jsonify({"status": "error", "message": str(e)}), 500
 
+
 @app.route("/help", methods=["POST"])
 def help():
     """
@@ -334,11 +648,7 @@ def help():
     :rtype: Response
 
     """
-    print("Request Headers: ", request.headers)
-
-    h = Help()
-    payload = h.help_all()
-    return jsonify(payload)
+    return Response(HELP_ALL_JSON, mimetype="application/json")
 
 
 @app.route("/leaderboard", methods=["POST"])
@@ -359,5 +669,185 @@ def leaderboard():
     return jsonify(payload)
 
 
+@app.route("/import", methods=["POST"])
+def import_tasks():
+    """
+    Endpoint to import tasks from a CSV or JSON lines request body, streamed a chunk at a time
+
+    The request needs the IMPORT_TOKEN as a bearer token, the format (csv or jsonl) and the Slack user ID recorded as
+    the creator as query parameters. An import that runs out of IMPORT_MAX_SECONDS stops between chunks; its report
+    gives the last line read, so the rest of the file can be sent again.
+
+    :param:
+    :type:
+    :raise:
+    :return: Response object with the import report; the partial report with 400 if the file could not be read
+        further, 500 if a chunk or a lookup failed
+    :rtype: Response
+
+    """
+    token = request.headers.get("Authorization", "").removeprefix("Bearer ")
+    if not Config.IMPORT_TOKEN or not hmac.compare_digest(token, Config.IMPORT_TOKEN):
+        return jsonify({"error": "Forbidden"}), 403
+    fmt = request.args.get("format")
+    created_by = request.args.get("created_by")
+    if fmt not in FORMATS or not is_slack_user_id(created_by):
+        return jsonify({"error": f"Give format ({', '.join(FORMATS)}) and created_by, a Slack user ID"}), 400
+
+    stream = io.TextIOWrapper(request.stream, encoding="utf-8-sig", newline="")
+    importer = TaskImporter(
+        created_by,
+        chunk_size=Config.IMPORT_CHUNK_SIZE,
+        directory=directory,
+        max_seconds=Config.IMPORT_MAX_SECONDS,
+    )
+    try:
+        report = importer.run(read_rows(stream, fmt))
+    finally:
+        due_today.invalidate()
+    # a failed chunk leaves the chunks before it committed, the report tells the caller which rows were imported
+    if report.unreadable:
+        return jsonify(report.to_dict()), 400
+    return jsonify(report.to_dict()), 500 if report.chunk_failed or report.read_failed else 200
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """
+    Endpoint to scrape the metrics of every worker process in the Prometheus text format
+
+    :param:
+    :type:
+    :raise:
+    :return: Response object with the metrics, or 403 without the METRICS_TOKEN when one is set
+    :rtype: Response
+
+    """
+    if Config.METRICS_TOKEN:
+        token = request.headers.get("Authorization", "").removeprefix("Bearer ")
+        if not hmac.compare_digest(token, Config.METRICS_TOKEN):
+            return jsonify({"error": "Forbidden"}), 403
+    families = metrics_exporter.collect() if metrics_exporter is not None else REGISTRY.dump()
+    return Response(render(families), content_type=CONTENT_TYPE)
+
+
+@app.cli.command("rebuild-leaderboard")
+@click.option("--verify-only", is_flag=True, help="Only report differences, do not rewrite the rollup.")
+def rebuild_leaderboard(verify_only):
+    """
+    Verifies the user_points rollup against the completed task history and rebuilds it when they differ.
+    """
+    mismatches = Leaderboard.rebuild(verify_only=verify_only)
+    for user_id, (rollup, history) in sorted(mismatches.items()):
+        click.echo(f"user {user_id}: rollup has {rollup} points, history has {history}")
+    if not mismatches:
+        click.echo("Leaderboard rollup matches the task history.")
+    elif verify_only:
+        raise SystemExit(1)
+    else:
+        click.echo(f"Rebuilt the leaderboard rollup, {len(mismatches)} users corrected.")
+
+
+@app.cli.command("migrate-db")
+@click.option("--target", type=int, default=None, help="Highest migration version to apply.")
+def migrate_db(target):
+    """
+    Applies the pending migrations of db/migrations to the configured database.
+    """
+    applied = migrate(db.engine, target=target)
+    for migration in applied:
+        click.echo(f"Applied {migration.version:04d}_{migration.name}")
+    if not applied:
+        click.echo("Database schema is up to date.")
+
+
+@app.cli.command("import-tasks")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--created-by", required=True, help="Slack user ID recorded as the creator of the tasks.")
+@click.option("--format", "fmt", type=click.Choice(FORMATS), default=None, help="File format, from the extension by default.")
+@click.option("--chunk-size", type=int, default=None, help="Rows inserted per transaction, IMPORT_CHUNK_SIZE by default.")
+@click.option("--check-assignees", is_flag=True, help="Skip rows whose assignee is not a user of the workspace.")
+@click.option("--errors", "errors_path", type=click.Path(dir_okay=False), default=None, help="Write the row errors to this CSV file.")
+def import_tasks_command(path, created_by, fmt, chunk_size, check_assignees, errors_path):
+    """
+    Imports tasks from a CSV or JSON lines file with the columns description, points, deadline and assignee.
+    """
+    if not is_slack_user_id(created_by):
+        raise click.BadParameter("must be a Slack user ID", param_hint="--created-by")
+    importer = TaskImporter(
+        created_by,
+        chunk_size=chunk_size or Config.IMPORT_CHUNK_SIZE,
+        directory=directory if check_assignees else None,
+        max_errors=None,
+    )
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        report = importer.run(read_rows(f, fmt or detect_format(path)))
+    click.echo(f"Imported {report.imported} tasks, skipped {report.failed} rows.")
+    if report.aborted:
+        click.echo(f"Stopped early: {report.aborted}")
+    if errors_path:
+        with open(errors_path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=("line", "error"))
+            writer.writeheader()
+            writer.writerows(report.errors)
+    else:
+        for error in report.errors[:20]:
+            click.echo(f"line {error['line']}: {error['error']}")
+    if report.failed or report.aborted:
+        raise SystemExit(1)
+
+
+def send_deadline_digest():
+    """
+    Posts the digest of the tasks due today to every digest channel, DIGEST_BATCH_SIZE channels at a time
+
+    :param:
+    :type:
+    :raise:
+    :return: Number of messages posted
+    :rtype: int
+
+    """
+    with app.app_context():
+        day = due_today.today()
+        tasks = ViewDeadlineTasks.due_tasks(day)
+    messages = [
+        message
+        for channel in Config.DIGEST_CHANNELS
+        for message in digest_messages(channel, tasks, day)
+    ]
+    for i in range(0, len(messages), Config.DIGEST_BATCH_SIZE):
+        batch = messages[i:i + Config.DIGEST_BATCH_SIZE]
+        if slack_async is not None:
+            results = slack_async.call_many("chat_postMessage", batch, priority=BACKGROUND)
+        else:
+            results = []
+            for message in batch:
+                try:
+                    results.append(slack_client.background.chat_postMessage(**message))
+                except Exception as e:
+                    results.append(e)
+        for message, result in zip(batch, results):
+            if isinstance(result, Exception):
+                app.logger.warning("Could not post the digest to %s: %s", message["channel"], result)
+    app.logger.info("Posted %d digest messages for %s", len(messages), day)
+    return len(messages)
+
+
+@app.cli.command("run-jobs")
+@click.option("--once", is_flag=True, help="Send the deadline digest now and exit.")
+def run_jobs(once):
+    """
+    Runs the daily jobs: the deadline digest at DIGEST_TIME in the workspace timezone. Run it in one process only.
+    """
+    if once:
+        send_deadline_digest()
+        return
+    scheduler = DailyScheduler(workspace_tz)
+    scheduler.add("deadline-digest", datetime.time.fromisoformat(Config.DIGEST_TIME), send_deadline_digest)
+    scheduler.run()
+
+
 if __name__ == "__main__":
-    app.run(host="localhost", port=8000, debug=True)
+    # development server only, production runs gunicorn -c python:configuration.serving app:app
+    app.run(host="localhost", port=8000, debug=os.environ.get("FLASK_DEBUG") == "1")
@@ -0,0 +1,56 @@
+"""
+Microbenchmark of task listing rendering: the former deepcopy-per-row path against helpers.blocks.
+
+Usage: python -m benchmarks.bench_blocks [rows] [repeat]
+"""
+import sys
+import timeit
+from copy import deepcopy
+from types import SimpleNamespace
+
+from helpers.blocks import task_blocks
+
+base_point_block_format = {
+    "type": "section",
+    "text": {
+        "type": "mrkdwn",
+        "text": ">SP-{id} ({points} SlackPoints) {description} [Deadline: {deadline}]",
+    },
+}
+
+
+def deepcopy_blocks(tasks):
+    # rendering as the commands did it before helpers.blocks
+    blocks = []
+    for task in tasks:
+        point = deepcopy(base_point_block_format)
+        point["text"]["text"] = point["text"]["text"].format(
+            id=task.task_id,
+            points=task.points,
+            description=task.description,
+            deadline=task.deadline,
+        )
+        blocks.append(point)
+    return blocks
+
+
+def main(rows=1000, repeat=20):
+    tasks = [
+        SimpleNamespace(
+            task_id=i, points=i % 5 + 1, description=f"Task number {i}", deadline="2022-10-24"
+        )
+        for i in range(rows)
+    ]
+    assert deepcopy_blocks(tasks) == task_blocks(tasks)
+
+    results = {}
+    for name, fn in (("deepcopy", deepcopy_blocks), ("template", task_blocks)):
+        best = min(timeit.repeat(lambda: fn(tasks), number=1, repeat=repeat))
+        results[name] = best
+        print(f"{name:>9}: {best * 1000:8.3f} ms for {rows} rows ({best / rows * 1e6:.2f} us/row)")
+    print(f"  speedup: {results['deepcopy'] / results['template']:.1f}x")
+    return results
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,59 @@
+"""
+Throughput benchmark of the task import against a local Postgres: rows per second for a few chunk sizes.
+
+A CSV file of generated tasks is written once and imported with each chunk size, then the imported tasks and their
+assignments are deleted again. Point DATABASE_URL at a disposable database with the schema applied
+(flask --app app migrate-db) before running it.
+
+Usage: python -m benchmarks.bench_import [rows] [chunk size ...]
+"""
+import csv
+import os
+import sys
+import tempfile
+import time
+
+BENCH_CREATOR = "U0IMPORTBENCH"
+CHUNK_SIZES = (100, 1000, 5000)
+
+
+def write_rows(path, rows, assignees=50):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(("description", "points", "deadline", "assignee"))
+        for i in range(rows):
+            assignee = f"U0BENCH{i % assignees:04d}" if i % 10 else ""
+            writer.writerow((f"Imported task number {i}", i % 5 + 1, f"2024-{i % 12 + 1:02d}-15", assignee))
+
+
+def main(rows=100000, chunk_sizes=CHUNK_SIZES):
+    from sqlalchemy import delete, select
+
+    from app import app
+    from helpers.taskimport import TaskImporter, read_rows
+    from models import Assignment, Task, User, db
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp, app.app_context():
+        path = os.path.join(tmp, "tasks.csv")
+        write_rows(path, rows)
+        for chunk_size in chunk_sizes:
+            start = time.perf_counter()
+            with open(path, newline="") as f:
+                report = TaskImporter(BENCH_CREATOR, chunk_size=chunk_size).run(read_rows(f, "csv"))
+            elapsed = time.perf_counter() - start
+            assert report.imported == rows, report.to_dict()
+            results[chunk_size] = rows / elapsed
+            print(f"chunk {chunk_size:>6}: {elapsed:8.2f} s for {rows} rows ({rows / elapsed:10.0f} rows/s)")
+
+            creator = select(User.user_id).where(User.slack_user_id == BENCH_CREATOR).scalar_subquery()
+            imported = select(Task.task_id).where(Task.created_by == creator)
+            db.session.execute(delete(Assignment).where(Assignment.assignment_id.in_(imported)))
+            db.session.execute(delete(Task).where(Task.created_by == creator))
+            db.session.commit()
+    return results
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(*args[:1], tuple(args[1:]) or CHUNK_SIZES)
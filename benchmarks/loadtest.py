@@ -0,0 +1,363 @@
+"""
+Local load test of the slash command endpoints, to compare serving profiles and runs over time.
+
+Each client thread keeps one HTTP connection alive and posts slash command forms back to back for the given duration,
+then the throughput and latency percentiles of every route are printed.
+
+Usage:
+    python -m benchmarks.seed --users 2000 --tasks 100000 --completed 0.7 --reset
+    python -m benchmarks.loadtest --url http://localhost:8080 --users 2000 --tasks 100000
+    python -m benchmarks.loadtest --serve gthread --serve sync --serve dev --output results.json
+    python -m benchmarks.loadtest --serve gthread --compare results.json
+    python -m benchmarks.loadtest --serve gthread --reseed --output results.json
+
+With --serve the script starts the app itself (the Flask dev server, or gunicorn -c python:configuration.serving
+with WEB_WORKER_CLASS set to the given class) on --port, waits for /health and stops it after the run. The app reads
+its database and Slack settings from the environment as usual, so point DATABASE_URL at a database seeded by
+benchmarks.seed with the same --users and --tasks first.
+
+Slack is replaced by the local emulator of benchmarks.slackemulator, answering after --slack-latency: interactive
+payloads carry its URL as their response_url, and apps started with --serve get it as SLACK_API_BASE_URL. With
+ack-first interactive handling the latency of /slack/interactive-endpoint is the time to acknowledge, the reply is
+sent by a worker afterwards.
+
+--output stores the report with the run settings and git commit as JSON, and --compare prints the change of every
+route's throughput and percentiles against such a file.
+
+/taskdone completes the tasks it posts, so every run after the first would find fewer pending tasks than the seeded
+dataset has. Runs meant for comparison, with --compare or more than one --serve, leave such routes out unless
+--reseed is given, which seeds the database in DATABASE_URL again with benchmarks.seed before every run. Give
+--reseed (and the --completed share used to seed) to both the baseline and the compared run to load /taskdone.
+"""
+import argparse
+import datetime
+import http.client
+import json
+import math
+import os
+import random
+import signal
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import urlencode, urlsplit
+
+from sqlalchemy import create_engine
+
+from benchmarks.seed import seed, seed_slack_id
+from benchmarks.slackemulator import Latency, SlackEmulator
+
+
+def slash_command(text=""):
+    def form(rng, dataset):
+        user = rng.randint(1, dataset["users"])
+        return {"user_id": seed_slack_id(user), "channel_id": "C0LOADTEST", "text": text}
+
+    return form
+
+
+def view_pending(rng, dataset):
+    # the pending tasks view is served at //co: every pending task, the user's own, or the ones due today
+    form = slash_command()(rng, dataset)
+    form["text"] = rng.choice(("", "me", "today"))
+    return form
+
+
+def update_task(rng, dataset):
+    # opens the edit form of a random task, without changing it
+    form = slash_command()(rng, dataset)
+    form["text"] = str(rng.randint(1, dataset["tasks"]))
+    return form
+
+
+def task_done(rng, dataset):
+    # benchmarks.seed assigns task g to user 1 + g % users, a share of the posts complete pending tasks
+    task_id = rng.randint(1, dataset["tasks"])
+    user = 1 + task_id % dataset["users"]
+    return {"user_id": seed_slack_id(user), "channel_id": "C0LOADTEST", "text": str(task_id)}
+
+
+def next_page(rng, dataset):
+    # the next page button of /viewcompleted, starting after a random task
+    payload = {
+        "type": "block_actions",
+        "user": {"id": seed_slack_id(rng.randint(1, dataset["users"])), "name": "loadtest"},
+        "container": {"channel_id": "C0LOADTEST"},
+        "response_url": dataset["response_url"],
+        "actions": [
+            {
+                "action_id": "view_next_page",
+                "value": json.dumps({"view": "points", "after": rng.randint(0, dataset["tasks"]), "progress": 1.0}),
+            }
+        ],
+    }
+    return {"payload": json.dumps(payload)}
+
+
+# route -> builds the form of a request from a random number generator and the seeded dataset
+ROUTES = {
+    "/leaderboard": slash_command(),
+    "/viewcompleted": slash_command(),
+    "//co": view_pending,
+    "/create": slash_command(),
+    "/updatetask": update_task,
+    "/help": slash_command(),
+    "/taskdone": task_done,
+    "/slack/interactive-endpoint": next_page,
+}
+
+# routes that change the seeded data, see --reseed
+MUTATING_ROUTES = frozenset({"/taskdone"})
+
+PROFILES = ("dev", "sync", "gthread", "gevent")
+
+
+def percentile(samples, q):
+    """
+    Gets the q-th percentile of sorted samples, by the nearest rank
+
+    :param samples: Sorted samples
+    :type samples: list[float]
+    :param q: Percentile between 0 and 100
+    :type q: float
+    :raise:
+    :return: Percentile, 0 for no samples
+    :rtype: float
+
+    """
+    if not samples:
+        return 0.0
+    rank = max(0, min(len(samples) - 1, math.ceil(q / 100 * len(samples)) - 1))
+    return samples[rank]
+
+
+def client(url, routes, dataset, deadline, results, lock, rng):
+    parts = urlsplit(url)
+    connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=10)
+    headers = {"Content-Type": "application/x-www-form-urlencoded", "Connection": "keep-alive"}
+    order = list(routes)
+    latencies = {route: [] for route in routes}
+    statuses = {route: {} for route in routes}
+    i = 0
+    while time.perf_counter() < deadline:
+        route = order[i % len(order)]
+        body = urlencode(routes[route](rng, dataset))
+        i += 1
+        start = time.perf_counter()
+        try:
+            connection.request("POST", route, body=body, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            status = "error"
+        latencies[route].append(time.perf_counter() - start)
+        statuses[route][status] = statuses[route].get(status, 0) + 1
+    connection.close()
+    with lock:
+        for route in routes:
+            results[route]["latencies"].extend(latencies[route])
+            for status, count in statuses[route].items():
+                results[route]["statuses"][status] = results[route]["statuses"].get(status, 0) + count
+
+
+def run(url, dataset, concurrency=16, duration=10.0, routes=ROUTES, seed=0):
+    """
+    Runs the load test against a running app
+
+    :param url: Base URL of the app
+    :type url: str
+    :param dataset: Number of seeded users and tasks, and the response_url of interactive payloads
+    :type dataset: dict[str, Any]
+    :param concurrency: Number of client threads, each with its own keep-alive connection
+    :type concurrency: int
+    :param duration: Length of the run in seconds
+    :type duration: float
+    :param routes: Route -> builds the form that is posted to it
+    :type routes: dict[str, Callable[[random.Random, dict[str, Any]], dict[str, str]]]
+    :param seed: Seed of the random forms, the same seed posts the same forms
+    :type seed: int
+    :raise:
+    :return: Route -> requests, rps, status counts and p50/p95/p99 latency in milliseconds
+    :rtype: dict[str, dict[str, Any]]
+
+    """
+    results = {route: {"latencies": [], "statuses": {}} for route in routes}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+    threads = [
+        threading.Thread(
+            target=client, args=(url, routes, dataset, deadline, results, lock, random.Random(seed + n))
+        )
+        for n in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    report = {}
+    for route, result in results.items():
+        latencies = sorted(result["latencies"])
+        report[route] = {
+            "requests": len(latencies),
+            "rps": len(latencies) / duration,
+            "statuses": {str(status): count for status, count in result["statuses"].items()},
+            **{f"p{q}_ms": percentile(latencies, q) * 1000 for q in (50, 95, 99)},
+        }
+    return report
+
+
+def serve(profile, port, slack_api_url=None):
+    """
+    Starts the app in a serving profile and waits until /health answers
+
+    :param profile: One of dev, sync, gthread or gevent
+    :type profile: str
+    :param port: Port to bind
+    :type port: int
+    :param slack_api_url: Slack Web API base URL of the app, the environment's if not given
+    :type slack_api_url: str
+    :raise RuntimeError: If the app does not become healthy within 30 seconds
+    :return: Server process
+    :rtype: subprocess.Popen
+
+    """
+    env = dict(os.environ)
+    if slack_api_url:
+        env.update(SLACK_API_BASE_URL=slack_api_url, SLACK_BOT_TOKEN=env.get("SLACK_BOT_TOKEN") or "xoxb-loadtest")
+    if profile == "dev":
+        command = [sys.executable, "-m", "flask", "--app", "app", "run", "--port", str(port)]
+    else:
+        env.update(WEB_WORKER_CLASS=profile, WEB_BIND=f"127.0.0.1:{port}", WEB_ACCESS_LOG="")
+        command = [sys.executable, "-m", "gunicorn", "-c", "python:configuration.serving", "app:app"]
+    process = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    give_up = time.monotonic() + 30
+    while time.monotonic() < give_up:
+        if process.poll() is not None:
+            raise RuntimeError(f"{profile} server exited with {process.returncode}")
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            connection.request("GET", "/health")
+            if connection.getresponse().status == 200:
+                return process
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f"{profile} server did not become healthy")
+
+
+def print_report(name, report):
+    print(name)
+    for route, row in report.items():
+        statuses = ", ".join(f"{status}: {count}" for status, count in sorted(row["statuses"].items(), key=str))
+        print(
+            f"  {route:<28} {row['rps']:9.1f} req/s  p50 {row['p50_ms']:7.2f} ms  "
+            f"p95 {row['p95_ms']:7.2f} ms  p99 {row['p99_ms']:7.2f} ms  ({statuses})"
+        )
+
+
+def compare(name, report, baseline):
+    print(f"{name} against the baseline")
+    for route, row in report.items():
+        before = baseline.get(route)
+        if before is None:
+            continue
+        changes = "  ".join(
+            f"{key} {(row[key] - before[key]) / before[key] * 100 if before[key] else 0.0:+6.1f}%"
+            for key in ("rps", "p50_ms", "p95_ms", "p99_ms")
+        )
+        print(f"  {route:<28} {changes}")
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8080", help="app to load when --serve is not given")
+    parser.add_argument("--serve", action="append", choices=PROFILES, help="start the app in this profile")
+    parser.add_argument("--port", type=int, default=8099, help="port for --serve")
+    parser.add_argument("--route", action="append", choices=sorted(ROUTES), help="routes to load, default all")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--users", type=int, default=2000, help="users seeded by benchmarks.seed")
+    parser.add_argument("--tasks", type=int, default=100000, help="tasks seeded by benchmarks.seed")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the random forms")
+    parser.add_argument("--reseed", action="store_true", help="seed DATABASE_URL again before every run")
+    parser.add_argument("--completed", type=float, default=0.7, help="share of completed tasks for --reseed")
+    parser.add_argument("--slack-latency", default="50", help="latency of the Slack emulator, e.g. lognormal:40:0.5")
+    parser.add_argument("--slack-members", type=int, default=300, help="members of every channel of the emulator")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="print the change against the results in this JSON file")
+    args = parser.parse_args(argv)
+
+    routes = {route: ROUTES[route] for route in args.route or ROUTES}
+    if (args.compare or len(args.serve or ()) > 1) and not args.reseed:
+        skipped = sorted(MUTATING_ROUTES.intersection(routes))
+        if skipped:
+            print(f"Leaving out {', '.join(skipped)}, which change the data between runs, give --reseed to load them")
+            routes = {route: form for route, form in routes.items() if route not in MUTATING_ROUTES}
+    engine = create_engine(os.environ["DATABASE_URL"]) if args.reseed else None
+    slack = SlackEmulator(
+        users=args.users, members=args.slack_members, latency={"*": Latency.parse(args.slack_latency)}
+    ).start()
+    dataset = {"users": args.users, "tasks": args.tasks, "response_url": slack.url + "response"}
+    reports = {}
+    try:
+        if not args.serve:
+            if engine is not None:
+                seed(engine, args.users, args.tasks, args.completed)
+            reports[args.url] = run(args.url, dataset, args.concurrency, args.duration, routes, args.seed)
+        for profile in args.serve or ():
+            if engine is not None:
+                seed(engine, args.users, args.tasks, args.completed)
+            process = serve(profile, args.port, slack.api_url)
+            try:
+                reports[profile] = run(
+                    f"http://127.0.0.1:{args.port}", dataset, args.concurrency, args.duration, routes, args.seed
+                )
+            finally:
+                process.send_signal(signal.SIGTERM)
+                process.wait(timeout=30)
+    finally:
+        slack.stop()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["reports"]
+    for name, report in reports.items():
+        print_report(name, report)
+        if baseline is not None:
+            # the same profile, or the only one of the baseline
+            before = baseline.get(name) or (next(iter(baseline.values())) if len(baseline) == 1 else None)
+            if before is not None:
+                compare(name, report, before)
+
+    if args.output:
+        settings = {key: value for key, value in vars(args).items() if key not in ("output", "compare")}
+        with open(args.output, "w") as f:
+            json.dump(
+                {
+                    "started_at": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+                    "git_commit": git_commit(),
+                    "settings": settings,
+                    "reports": reports,
+                },
+                f,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Seeds a local Postgres with generated users, tasks and assignments for the load tests.
+
+Task g is assigned to user 1 + g % users, whose Slack user ID is seed_slack_id(1 + g % users), and a `completed` share
+of the tasks is done, spread evenly over the task IDs. Deadlines range from 30 days ago to 29 days ahead, so every
+listing has rows, and the leaderboard rollup is filled from the completed tasks. The load test computes the same
+assignment to post /taskdone as the right user.
+
+The tables are emptied first, so only point DATABASE_URL at a disposable database.
+
+Usage: python -m benchmarks.seed --users 2000 --tasks 100000 --completed 0.7 --reset
+"""
+import argparse
+import os
+import time
+
+from sqlalchemy import create_engine, text
+
+from helpers.migrations import migrate
+
+SEED_PREFIX = "U0SEED"
+
+SEED = """
+INSERT INTO "user" (slack_user_id)
+SELECT :prefix || g FROM generate_series(1, :users) g;
+
+INSERT INTO task (description, points, deadline, created_by, created_on)
+SELECT 'Seeded task ' || g, 1 + mod(g, 5), CURRENT_DATE + mod(g, 60) - 30, 1 + mod(g * 7, :users), now()
+FROM generate_series(1, :tasks) g;
+
+INSERT INTO assignment (assignment_id, user_id, progress, assignment_created_on)
+SELECT g, 1 + mod(g, :users), CASE WHEN mod(g * 7919, 1000) < :completed_per_mille THEN 1 ELSE 0 END, now()
+FROM generate_series(1, :tasks) g;
+
+INSERT INTO user_points (user_id, total_points)
+SELECT assignment.user_id, SUM(task.points)
+FROM assignment JOIN task ON task.task_id = assignment.assignment_id
+WHERE assignment.progress = 1
+GROUP BY assignment.user_id;
+"""
+
+
+def seed_slack_id(user):
+    """
+    Gets the Slack user ID of a seeded user
+
+    :param user: User ID, as in the user table
+    :type user: int
+    :raise:
+    :return: Slack user ID
+    :rtype: str
+
+    """
+    return f"{SEED_PREFIX}{user}"
+
+
+def seed(engine, users=2000, tasks=100000, completed=0.7):
+    """
+    Empties the task tables and fills them with generated rows
+
+    :param engine: SQLAlchemy engine of a migrated, disposable database
+    :type engine: Engine
+    :param users: Number of users
+    :type users: int
+    :param tasks: Number of tasks, each with an assignment
+    :type tasks: int
+    :param completed: Share of the tasks that are completed, between 0 and 1
+    :type completed: float
+    :raise:
+    :return: None
+    :rtype: None
+
+    """
+    params = {"prefix": SEED_PREFIX, "users": users, "tasks": tasks, "completed_per_mille": round(completed * 1000)}
+    with engine.begin() as connection:
+        connection.execute(text('TRUNCATE user_points, assignment, task, "user" RESTART IDENTITY CASCADE'))
+        for statement in SEED.split(";"):
+            if statement.strip():
+                connection.execute(text(statement), params)
+    with engine.connect() as connection:
+        connection.execution_options(isolation_level="AUTOCOMMIT").execute(text("ANALYZE"))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--tasks", type=int, default=100000)
+    parser.add_argument("--completed", type=float, default=0.7, help="share of completed tasks")
+    parser.add_argument("--reset", action="store_true", help="confirm that the tables may be emptied")
+    args = parser.parse_args(argv)
+    if not args.reset:
+        parser.error("seeding empties the task tables, pass --reset to confirm")
+
+    engine = create_engine(os.environ["DATABASE_URL"])
+    migrate(engine)
+    start = time.perf_counter()
+    seed(engine, args.users, args.tasks, args.completed)
+    print(f"Seeded {args.users} users and {args.tasks} tasks in {time.perf_counter() - start:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,385 @@
+"""
+Local Slack API emulator, so that performance and integration tests do not reach slack.com.
+
+It answers the Web API methods the app calls under /api/ (conversations.members, users.info, users.list,
+chat.postEphemeral and chat.postMessage) for a generated workspace of --users users, every channel having --members of
+them, with the Slack user IDs of benchmarks.seed. Any other path, e.g. the response_url of interactive payloads, is
+answered with {"ok": true}.
+
+Latencies are drawn from a distribution, for all methods or per method:
+    50                  fixed 50 ms
+    20-80               uniform between 20 and 80 ms
+    lognormal:40:0.5    log-normal with a 40 ms median and a sigma of 0.5
+
+A share of the calls can be answered with HTTP 429 and a Retry-After header, to exercise the rate limit handling.
+
+Point the app at it with SLACK_API_BASE_URL=http://127.0.0.1:8098/api/.
+
+Usage:
+    python -m benchmarks.slackemulator --users 2000 --members 300 --latency 50
+    python -m benchmarks.slackemulator --latency lognormal:40:0.5 --latency users.list=200-400 \\
+        --ratelimit 0.01 --ratelimit users.info=0.2 --retry-after 1
+"""
+import argparse
+import json
+import math
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl
+
+from benchmarks.seed import seed_slack_id
+
+# requests outside /api/ are counted under this name
+OTHER = "other"
+
+
+class Latency:
+    """
+    This class draws response latencies from a fixed, uniform or log-normal distribution.
+    """
+
+    def __init__(self, kind="fixed", *params):
+        """
+        Constructor to initialize the distribution
+
+        :param kind: fixed (milliseconds), uniform (low and high milliseconds) or lognormal (median milliseconds
+            and sigma)
+        :type kind: str
+        :param params: Parameters of the distribution
+        :type params: float
+        :raise ValueError: If the kind or its number of parameters is wrong
+        :return: None
+        :rtype: None
+
+        """
+        expected = {"fixed": 1, "uniform": 2, "lognormal": 2}
+        if expected.get(kind) != len(params):
+            raise ValueError(f"Invalid latency: {kind} {params}")
+        self.kind = kind
+        self.params = params
+
+    @classmethod
+    def parse(cls, spec):
+        """
+        Parses a latency such as "50", "20-80" or "lognormal:40:0.5"
+
+        :param spec: Latency
+        :type spec: str
+        :raise ValueError: If the latency cannot be parsed
+        :return: Latency distribution
+        :rtype: Latency
+
+        """
+        if spec.startswith("lognormal:"):
+            return cls("lognormal", *(float(value) for value in spec.split(":")[1:]))
+        if "-" in spec:
+            return cls("uniform", *(float(value) for value in spec.split("-")))
+        return cls("fixed", float(spec))
+
+    def draw(self, rng):
+        """
+        Draws the latency of one response
+
+        :param rng: Random number generator
+        :type rng: random.Random
+        :raise:
+        :return: Seconds to wait before answering
+        :rtype: float
+
+        """
+        if self.kind == "uniform":
+            milliseconds = rng.uniform(*self.params)
+        elif self.kind == "lognormal":
+            median, sigma = self.params
+            milliseconds = rng.lognormvariate(math.log(median), sigma) if median > 0 else 0.0
+        else:
+            milliseconds = self.params[0]
+        return milliseconds / 1000
+
+
+def parse_overrides(values, parse):
+    """
+    Parses repeated options such as ["50", "users.list=200-400"] into a default and per method values
+
+    :param values: Option values, "method=value" or a value for every method
+    :type values: list[str]
+    :param parse: Parses one value
+    :type parse: Callable[[str], Any]
+    :raise ValueError: If a value cannot be parsed
+    :return: Method -> value, "*" for the default
+    :rtype: dict[str, Any]
+
+    """
+    overrides = {}
+    for value in values or ():
+        method, _, spec = value.rpartition("=")
+        overrides[method or "*"] = parse(spec)
+    return overrides
+
+
+class SlackEmulator:
+    """
+    This class runs the emulator on a background thread.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, users=100, members=50, latency=None, ratelimit=None,
+                 retry_after=1, rng=None):
+        """
+        Constructor to initialize the workspace and the server, bound but not yet serving
+
+        :param host: Interface to bind
+        :type host: str
+        :param port: Port to bind, 0 for any free port
+        :type port: int
+        :param users: Number of users of the workspace
+        :type users: int
+        :param members: Number of members of every channel, at most the number of users
+        :type members: int
+        :param latency: Method -> latency distribution, "*" for the default, no latency if not given
+        :type latency: dict[str, Latency]
+        :param ratelimit: Method -> share of its calls answered with HTTP 429, "*" for the default
+        :type ratelimit: dict[str, float]
+        :param retry_after: Retry-After of the 429 responses, in seconds
+        :type retry_after: int
+        :param rng: Random number generator, overridable for repeatable runs
+        :type rng: random.Random
+        :raise:
+        :return: None
+        :rtype: None
+
+        """
+        self.users = users
+        self.members = min(members, users)
+        self.latency = latency or {}
+        self.ratelimit = ratelimit or {}
+        self.retry_after = retry_after
+        self.rng = rng or random.Random()
+        self.requests = {}
+        self.rate_limited = {}
+        self.posts = []
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        """
+        Gets the base URL of the server
+
+        :param:
+        :type:
+        :raise:
+        :return: Base URL, with a trailing slash
+        :rtype: str
+
+        """
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    @property
+    def api_url(self):
+        """
+        Gets the Web API base URL, the base_url of a WebClient
+
+        :param:
+        :type:
+        :raise:
+        :return: Web API base URL, with a trailing slash
+        :rtype: str
+
+        """
+        return self.url + "api/"
+
+    def start(self):
+        """
+        Starts serving on a background thread
+
+        :param:
+        :type:
+        :raise:
+        :return: The emulator itself
+        :rtype: SlackEmulator
+
+        """
+        self._thread = threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stops serving and closes the socket
+
+        :param:
+        :type:
+        :raise:
+        :return: None
+        :rtype: None
+
+        """
+        self.server.shutdown()
+        self.server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def user(self, number):
+        """
+        Builds the Slack user object of a workspace user
+
+        :param number: User number, from 1 to the number of users
+        :type number: int
+        :raise:
+        :return: Slack user object
+        :rtype: dict[str, Any]
+
+        """
+        return {
+            "id": seed_slack_id(number),
+            "name": f"user{number}",
+            "real_name": f"User {number}",
+            "deleted": False,
+            "is_bot": False,
+            "profile": {"real_name": f"User {number}", "display_name": f"user{number}"},
+        }
+
+    def handle(self, method, params):
+        """
+        Answers a request
+
+        :param method: Web API method, e.g. "users.list", None for paths outside /api/
+        :type method: str
+        :param params: Form, JSON or query parameters of the request
+        :type params: dict[str, Any]
+        :raise:
+        :return: HTTP status, headers and JSON body
+        :rtype: tuple[int, dict[str, str], dict[str, Any]]
+
+        """
+        name = method or OTHER
+        with self._lock:
+            self.requests[name] = self.requests.get(name, 0) + 1
+            share = self.ratelimit.get(method, self.ratelimit.get("*", 0.0)) if method else 0.0
+            limited = share > 0 and self.rng.random() < share
+            if limited:
+                self.rate_limited[name] = self.rate_limited.get(name, 0) + 1
+            latency = self.latency.get(name) or self.latency.get("*")
+            delay = latency.draw(self.rng) if latency is not None else 0.0
+        time.sleep(delay)
+        if limited:
+            return 429, {"Retry-After": str(self.retry_after)}, {"ok": False, "error": "ratelimited"}
+
+        if method == "users.list":
+            return 200, {}, self._page(range(1, self.users + 1), params, self.user)
+        if method == "conversations.members":
+            return 200, {}, self._page(range(1, self.members + 1), params, seed_slack_id)
+        if method == "users.info":
+            number = self._user_number(params.get("user"))
+            if number is None:
+                return 200, {}, {"ok": False, "error": "user_not_found"}
+            return 200, {}, {"ok": True, "user": self.user(number)}
+        if method in ("chat.postEphemeral", "chat.postMessage"):
+            with self._lock:
+                self.posts.append((method, params))
+            ts = f"{time.time():.6f}"
+            if method == "chat.postEphemeral":
+                return 200, {}, {"ok": True, "message_ts": ts}
+            return 200, {}, {"ok": True, "channel": params.get("channel"), "ts": ts}
+        if method is not None:
+            return 200, {}, {"ok": False, "error": "unknown_method"}
+        return 200, {}, {"ok": True}
+
+    def _page(self, numbers, params, item):
+        limit = int(params.get("limit") or 100)
+        start = int(params.get("cursor") or 0)
+        page = numbers[start:start + limit]
+        cursor = str(start + limit) if start + limit < len(numbers) else ""
+        return {
+            "ok": True,
+            "members": [item(number) for number in page],
+            "response_metadata": {"next_cursor": cursor},
+        }
+
+    def _user_number(self, slack_id):
+        prefix = seed_slack_id("")
+        if not slack_id or not slack_id.startswith(prefix) or not slack_id[len(prefix):].isdigit():
+            return None
+        number = int(slack_id[len(prefix):])
+        return number if 1 <= number <= self.users else None
+
+    def _handler(self):
+        emulator = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                self._serve(dict(parse_qsl(self.path.partition("?")[2])))
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0)).decode("utf-8")
+                if self.headers.get("Content-Type", "").startswith("application/json"):
+                    params = json.loads(body or "{}")
+                else:
+                    params = dict(parse_qsl(body))
+                params.update(parse_qsl(self.path.partition("?")[2]))
+                self._serve(params)
+
+            def _serve(self, params):
+                path = self.path.partition("?")[0]
+                method = path[len("/api/"):] if path.startswith("/api/") else None
+                status, headers, body = emulator.handle(method, params)
+                data = json.dumps(body).encode("utf-8")
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json; charset=utf-8")
+                    self.send_header("Content-Length", str(len(data)))
+                    for name, value in headers.items():
+                        self.send_header(name, value)
+                    self.end_headers()
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    # the client gave up, e.g. an app worker that was stopped while waiting
+                    self.close_connection = True
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8098)
+    parser.add_argument("--users", type=int, default=2000, help="users of the workspace")
+    parser.add_argument("--members", type=int, default=300, help="members of every channel")
+    parser.add_argument("--latency", action="append", help="latency, or method=latency, repeatable")
+    parser.add_argument("--ratelimit", action="append", help="share of calls answered 429, or method=share")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After of the 429s, in seconds")
+    parser.add_argument("--seed", type=int, default=None, help="seed of the latencies and 429s")
+    args = parser.parse_args(argv)
+
+    emulator = SlackEmulator(
+        args.host,
+        args.port,
+        users=args.users,
+        members=args.members,
+        latency=parse_overrides(args.latency, Latency.parse),
+        ratelimit=parse_overrides(args.ratelimit, float),
+        retry_after=args.retry_after,
+        rng=random.Random(args.seed),
+    )
+    print(f"Slack emulator listening on {emulator.url}, set SLACK_API_BASE_URL={emulator.api_url}")
+    try:
+        emulator.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        emulator.server.server_close()
+        print(json.dumps({"requests": emulator.requests, "rate_limited": emulator.rate_limited}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
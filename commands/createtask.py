@@ -1,6 +1,8 @@
-from copy import deepcopy
 import random
+from sqlalchemy import Float, Integer, literal
+
 from models import *
+from helpers.blocks import task_created_block
 
 
 class CreateTask:
@@ -8,14 +10,6 @@ class CreateTask:
     This class handles the Create Task functionality.
     """
 
-    base_create_task_block_format = {
-        "type": "section",
-        "text": {
-            "type": "mrkdwn",
-            "text": ">{greeting}! Your task SP-{id} was created successfully.",
-        },
-    }
-
     greetings = ["Awesome", "Great", "Congratulations", "Well done", "Let's go"]
 
     def __init__(self, users=[]):
@@ -140,64 +134,62 @@ class CreateTask:
         """
         Creates a task in database and returns payload with success message along with the newly created Task ID
 
+        The creator and assignee are upserted and the task and its assignment are inserted in a single transaction.
+
         :param desc: Description of task
         :type desc: str
         :param points: Points of task
         :type points: int
         :param deadline: Deadline of task
         :type deadline: Date
+        :param assignee: Slack user ID of the assignee, None if unassigned
+        :type assignee: str
+        :param created_by: Slack user ID of the creator
+        :type created_by: str
         :raise:
         :return: Blocks list of response payload
         :rtype: list
 
         """
-        # DB call to add task, returns id
-        task = Task()
-        task.description = desc
-        task.points = points
-        task.deadline = deadline
-
-        exists = db.session.query(db.exists().where(User.slack_user_id == created_by)).scalar()
-        if not exists: 
-            user = User()
-            user.slack_user_id = created_by
-            db.session.add(user)
+        try:
+            # one statement makes sure both users exist and fetches their ids
+            user_ids = upsert_users(
+                [slack_id for slack_id in (created_by, assignee) if slack_id is not None]
+            )
+            # one statement inserts the task and its assignment, returning the task id
+            id = db.session.execute(
+                self._insert_task_stmt(desc, points, deadline, user_ids[created_by], user_ids.get(assignee))
+            ).scalar_one()
             db.session.commit()
-            db.session.refresh(user)
-
-        created_user_id = User.query.filter_by(slack_user_id=created_by).all()[0].user_id
-
-        task.created_by = created_user_id
-        db.session.add(task)
-        db.session.commit()
-        db.session.refresh(task)
-
-        # task id
-        id = task.task_id
-
-        # check if user already exists in the user table
-        # if he/she doesn't exist, then add to the user table
-        # using the primary key id from the user table, assign user_id in the next block
-        exists = db.session.query(db.exists().where(User.slack_user_id == assignee)).scalar()
-        if not exists: 
-            user = User()
-            user.slack_user_id = assignee
-            db.session.add(user)
-            db.session.commit()
-            db.session.refresh(user)
-
-
-        # add the task in assignment, depending on whether assignee is None or not
-        assignment = Assignment()
-        assignment.assignment_id = id
-        if(assignee is not None): 
-            assignee_user_id = User.query.filter_by(slack_user_id=assignee).all()
-            assignment.user_id = assignee_user_id[0].user_id
-        assignment.progress = 0
-        db.session.add(assignment)
-        db.session.commit()
-
-        response = deepcopy(self.base_create_task_block_format)
-        response["text"]["text"] = response["text"]["text"].format(greeting=random.choice(self.greetings), id=id)
-        self.payload["blocks"].append(response)
+        except Exception:
+            db.session.rollback()
+            raise
+
+        self.payload["blocks"].append(task_created_block(random.choice(self.greetings), id))
         return self.payload["blocks"], id
+
+    @staticmethod
+    def _insert_task_stmt(desc, points, deadline, created_by, assignee):
+        new_task = (
+            insert(Task)
+            .values(
+                description=desc,
+                points=points,
+                deadline=deadline,
+                created_by=created_by,
+            )
+            .returning(Task.task_id)
+            .cte("new_task")
+        )
+        return (
+            insert(Assignment)
+            .from_select(
+                ["assignment_id", "user_id", "progress"],
+                select(
+                    new_task.c.task_id,
+                    literal(assignee, Integer),
+                    literal(0.0, Float),
+                ),
+            )
+            .returning(Assignment.assignment_id)
+        )
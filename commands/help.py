@@ -1,59 +1,60 @@
-from copy import deepcopy
+from types import MappingProxyType
 
+from helpers.blocks import section, serialize
 
-class Help:
-    """
-    This class handles the Help functionality.
-    """
-
-    commands_dictionary = {}
-
-    command_help = {
-        "type": "section",
-        "text": {"type": "mrkdwn", "text": "{command_help}"},
-    }
-
-    def __init__(self):
-        """
-        Constructor to initialize command dictionary and payload object
 
-        :param:
-        :type:
-        :raise:
-        :return: None
-        :rtype: None
-
-        """
-        self.commands_dictionary["createtask"] = [
+# command name -> (title, description), in the order /help lists them
+COMMANDS = MappingProxyType(
+    {
+        "createtask": (
             "*Create Task*",
             ">To create a task, just try the command */create-task* and you would receive a message from Slack to fill out the details of the task.\n>Enter the description, deadline and the points of the task.\n>For example:\n>*Description*: Hey! This is my new task\n>*Deadline*: 12/31/2022 (just select a date from the date picker)\n>*Points*: 5 (select a point from 1 to 5)\n>And that's it! You should receive a reply from Slack with the generated *Task ID*.",
-        ]
-        self.commands_dictionary["viewcompleted"] = [
+        ),
+        "viewcompleted": (
             "*View Completed Tasks*",
             ">To view completed tasks, just try the command */view-completed*, and there you go! SlackPoint would show you a list of completed tasks.",
-        ]
-        self.commands_dictionary["viewpending"] = [
+        ),
+        "viewpending": (
             "*View Pending Task*",
             ">To view pending tasks, just try the command */view-pending*, and there you go! SlackPoint would show you a list of completed tasks. To view pending tasks only for yourself, just try the command */view-pending me*, and there you go! SlackPoint would show you a list of tasks assigned to you. To view pending tasks due today, just try the command */view-pending today*, and SlackPoint will show you a list of tasks with today's deadline.",
-        ]
-        self.commands_dictionary["updatetask"] = [
+        ),
+        "updatetask": (
             "*Update Task*",
             ">To update a task, just run the command */update-task* <Task ID>, edit the details and hit submit!",
-        ]
-        self.commands_dictionary["leaderboard"] = [
+        ),
+        "leaderboard": (
             "*Leaderboard*",
             ">To view the leaderboard, just try the command */leaderboard*, and SlackPoint would show you the top five contenders!",
-        ]
-        self.commands_dictionary["taskdone"] = [
+        ),
+        "taskdone": (
             "*Complete Task*",
-            ">To mark a task as Completed, just try the command */task-done* <Task ID>, and now you are one step closer at being one of the top five contenders!",
-        ]
-        self.commands_dictionary["help"] = [
+            ">To mark a task as Completed, just try the command */task-done* <Task ID>, or several IDs and ranges such as */task-done* 12 13 14-20, and now you are one step closer at being one of the top five contenders!",
+        ),
+        "help": (
             "*Help*",
             ">Well, you are viewing it. You don't need my help in that case :D",
-        ]
+        ),
+    }
+)
 
-        self.payload = {"response_type": "ephemeral", "blocks": []}
+# /help response, built and serialized once at import. Shared by every caller, never modified.
+HELP_ALL = {
+    "response_type": "ephemeral",
+    "blocks": [
+        block
+        for title, description in COMMANDS.values()
+        for block in (section(title), section(description))
+    ],
+}
+HELP_ALL_JSON = serialize(HELP_ALL)
+
+
+class Help:
+    """
+    This class handles the Help functionality.
+    """
+
+    commands_dictionary = COMMANDS
 
     def help_all(self):
         """
@@ -62,15 +63,12 @@ class Help:
         :param:
         :type:
         :raise:
-        :return: Payload object containing helper details of all commands
+        :return: Payload object containing helper details of all commands, the cached payload which must not be
+            modified
         :rtype: dict[str, Any]
 
         """
-        response_payload = deepcopy(self.payload)
-        for name in self.commands_dictionary.keys():
-            blocks = self.help(name)
-            response_payload["blocks"].extend(blocks)
-        return response_payload
+        return HELP_ALL
 
     def help(self, command_name):
         """
@@ -83,17 +81,5 @@ class Help:
         :rtype: list
 
         """
-        blocks = []
-        command_name_block = deepcopy(self.command_help)
-        command_help_desc_block = deepcopy(self.command_help)
-        command_help = self.commands_dictionary.get(command_name)
-        command_name_block["text"]["text"] = command_name_block["text"]["text"].format(
-            command_help=command_help[0]
-        )
-        command_help_desc_block["text"]["text"] = command_help_desc_block["text"][
-            "text"
-        ].format(command_help=command_help[1])
-
-        blocks.append(command_name_block)
-        blocks.append(command_help_desc_block)
-        return blocks
+        title, description = self.commands_dictionary[command_name]
+        return [section(title), section(description)]
@@ -1,7 +1,6 @@
-from copy import deepcopy
-
+from helpers.blocks import leaderboard_blocks, section
 from models import *
-from sqlalchemy import desc, func
+from sqlalchemy import delete, desc, func, text
 
 
 class Leaderboard:
@@ -9,11 +8,6 @@ class Leaderboard:
     This class handles the Create Leaderboard functionality.
     """
 
-    base_leaderboard_block_format = {
-        "type": "section",
-        "text": {"type": "mrkdwn", "text": "{pos}. <@{userid}> has {points} points!"},
-    }
-
     def __init__(self):
         """
         Constructor to initialize payload object
@@ -31,6 +25,9 @@ class Leaderboard:
         """
         Generates leaderboard according to the highest points scorers, returns top five contenders from DB
 
+        Reads the user_points rollup through its total_points index, so the cost depends on top_k and not on the
+        size of the completed task history.
+
         :param top_k: Provision to generate top k contenders in leaderboard, default value: 5
         :type top_k: int
         :raise:
@@ -39,35 +36,108 @@ class Leaderboard:
 
         """
         top_5_leaderboard = (
-            Assignment.query.join(Task)
-            .join(User)
+            UserPoints.query.join(User)
             .with_entities(
                 User.user_id,
                 User.slack_user_id,
-                func.sum(Task.points).label("total_points"),
+                UserPoints.total_points,
             )
-            .filter(Assignment.progress == 1)
-            .group_by(User.user_id)
-            .order_by(desc("total_points"))[:top_k]
+            .filter(UserPoints.total_points > 0)
+            .order_by(desc(UserPoints.total_points))[:top_k]
         )
 
         # parse them
-        count = 0
-        for user in top_5_leaderboard:
-            count += 1
-            point = deepcopy(self.base_leaderboard_block_format)
-            point["text"]["text"] = point["text"]["text"].format(
-                pos=count, userid=user.slack_user_id, points=user.total_points
-            )
-            self.payload["blocks"].append(point)
+        self.payload["blocks"].extend(leaderboard_blocks(top_5_leaderboard))
         if not self.payload["blocks"]:
             self.payload["blocks"].append(
-                {
-                    "type": "section",
-                    "text": {
-                        "type": "mrkdwn",
-                        "text": ">Looks like the competition hasn't started yet :(",
-                    },
-                }
+                section(">Looks like the competition hasn't started yet :(")
             )
         return self.payload
+
+    @staticmethod
+    def credit_points(user_id, points):
+        """
+        Adds points to the rollup of a user, negative points take them away. The caller owns the transaction.
+
+        :param user_id: User ID, as in the user table
+        :type user_id: int
+        :param points: Points to add
+        :type points: int
+        :raise:
+        :return: None
+        :rtype: None
+
+        """
+        if user_id is None or not points:
+            return
+        stmt = insert(UserPoints).values(user_id=user_id, total_points=points)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[UserPoints.user_id],
+            set_={"total_points": UserPoints.total_points + stmt.excluded.total_points},
+        )
+        db.session.execute(stmt)
+
+    @staticmethod
+    def points_from_history():
+        """
+        Computes every user's points from the full completed task history, the slow query the rollup replaces
+
+        :param:
+        :type:
+        :raise:
+        :return: Mapping of user ID to total points
+        :rtype: dict[int, int]
+
+        """
+        rows = (
+            Assignment.query.join(Task)
+            .with_entities(Assignment.user_id, func.sum(Task.points).label("total_points"))
+            .filter(Assignment.progress == 1)
+            .filter(Assignment.user_id.isnot(None))
+            .group_by(Assignment.user_id)
+            .all()
+        )
+        return {row.user_id: int(row.total_points or 0) for row in rows}
+
+    @classmethod
+    def rebuild(cls, verify_only=False):
+        """
+        Compares the rollup with the completed task history and, unless verifying only, rewrites it from the history
+
+        The rebuild locks user_points against writes until it commits, so points credited by tasks completed meanwhile
+        wait for it and are added on top of the rewritten rollup instead of being lost.
+
+        :param verify_only: Only report differences, leave the rollup untouched
+        :type verify_only: bool
+        :raise:
+        :return: Mapping of user ID to (rollup points, history points) for every user that differs
+        :rtype: dict[int, tuple[int, int]]
+
+        """
+        try:
+            if not verify_only:
+                # taken before the history is read: credit_points conflicts with this mode, readers do not
+                db.session.execute(text("LOCK TABLE user_points IN SHARE ROW EXCLUSIVE MODE"))
+            expected = cls.points_from_history()
+            actual = {
+                row.user_id: row.total_points
+                for row in UserPoints.query.with_entities(UserPoints.user_id, UserPoints.total_points).all()
+            }
+            mismatches = {
+                user_id: (actual.get(user_id, 0), expected.get(user_id, 0))
+                for user_id in set(expected) | set(actual)
+                if actual.get(user_id, 0) != expected.get(user_id, 0)
+            }
+            if not verify_only:
+                if mismatches:
+                    db.session.execute(delete(UserPoints))
+                    if expected:
+                        db.session.execute(
+                            insert(UserPoints),
+                            [{"user_id": user_id, "total_points": points} for user_id, points in expected.items()],
+                        )
+                db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return mismatches
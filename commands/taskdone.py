@@ -1,5 +1,50 @@
+import re
+
+from sqlalchemy import select, update
+
 from models import *
 from helpers.errorhelper import ErrorHelper
+from commands.leaderboard import Leaderboard
+
+# largest number of tasks one /taskdone can complete, bounds ranges such as 1-1000000
+MAX_TASK_IDS = 100
+
+# outcome -> label of the per-ID summary of a bulk completion, in the order it lists them
+OUTCOME_LABELS = {
+    "task_done": "Completed",
+    "task_already_done": "Already completed",
+    "task_cannot_be_updated": "Not assigned to you",
+    "no_task_id": "Not found",
+}
+
+_TASK_ID_TOKEN = re.compile(r"^(\d+)(?:-(\d+))?$")
+
+
+def parse_task_ids(text):
+    """
+    Parses a list of task IDs and ranges such as "12 13 14-20", separated by spaces or commas
+
+    :param text: Command text
+    :type text: str
+    :raise ValueError: If a token is not an ID or an ascending range, or there are more than MAX_TASK_IDS IDs
+    :return: Task IDs in the given order, without duplicates
+    :rtype: list[int]
+
+    """
+    task_ids = {}
+    for token in re.split(r"[\s,]+", (text or "").strip()):
+        match = _TASK_ID_TOKEN.match(token)
+        if match is None:
+            raise ValueError(f"Invalid task ID: {token!r}")
+        first = int(match.group(1))
+        last = int(match.group(2) or first)
+        if last < first or last - first >= MAX_TASK_IDS:
+            raise ValueError(f"Invalid task ID range: {token!r}")
+        for task_id in range(first, last + 1):
+            task_ids[task_id] = None
+        if len(task_ids) > MAX_TASK_IDS:
+            raise ValueError(f"At most {MAX_TASK_IDS} tasks can be completed at once")
+    return list(task_ids)
 
 
 class TaskDone:
@@ -24,66 +69,93 @@ class TaskDone:
             "blocks": []
         }
 
-    # if get user id of given slack id/ create if not exists and return user id
-    def get_or_create(self, uid):
+    def complete(self, task_ids, slack_user_id):
         """
-        Fetches user instance, generates the user if the user id is not present in DB
+        Marks the given tasks as complete when they are pending and assigned to the user
 
-        :param uid: Slack User ID
-        :type uid: str
+        The completion is a single conditional UPDATE ... RETURNING that only matches pending tasks assigned to the
+        calling user, so the checks and the write cannot race. When it misses some IDs, one lookup tells which check
+        failed for each of them. The points are credited to the leaderboard in the same transaction.
+
+        :param task_ids: Task IDs
+        :type task_ids: list[int]
+        :param slack_user_id: Slack user ID of the caller
+        :type slack_user_id: str
         :raise:
-        :return: instance of user fetched/generated from DB
-        :rtype: Any
+        :return: Mapping of task ID to outcome, one of the OUTCOME_LABELS keys, in the given order
+        :rtype: dict[int, str]
 
         """
-        instance = db.session.query(User).filter_by(slack_user_id=uid).first()
-        if instance:
-            return instance
-        else:
-            instance = db.session.add(User(slack_user_id = uid))
+        caller = select(User.user_id).where(User.slack_user_id == slack_user_id).scalar_subquery()
+        points = select(Task.points).where(Task.task_id == Assignment.assignment_id).scalar_subquery()
+        completed = db.session.execute(
+            update(Assignment)
+            .where(Assignment.assignment_id.in_(task_ids))
+            .where(Assignment.progress < 1)
+            .where(Assignment.user_id == caller)
+            .values(progress=1.0)
+            .returning(Assignment.assignment_id, Assignment.user_id, points.label("points"))
+        ).all()
+
+        outcomes = dict.fromkeys(task_ids, "no_task_id")
+        for row in completed:
+            outcomes[row.assignment_id] = "task_done"
+        missed = [task_id for task_id in task_ids if outcomes[task_id] != "task_done"]
+        if missed:
+            tasks = db.session.execute(
+                select(Task.task_id, Assignment.progress)
+                .outerjoin(Assignment, Assignment.assignment_id == Task.task_id)
+                .where(Task.task_id.in_(missed))
+            ).all()
+            for task in tasks:
+                pending = task.progress is not None and task.progress < 1
+                outcomes[task.task_id] = "task_cannot_be_updated" if pending else "task_already_done"
+
+        if completed:
+            # every completed row is assigned to the caller, so one upsert credits them all
+            Leaderboard.credit_points(completed[0].user_id, sum(row.points or 0 for row in completed))
             db.session.commit()
-            return instance
+        return outcomes
 
     def update_points(self):
         """
-        Marks the task as complete, validates whether the task exists and the task is yet to be completed
+        Marks the given tasks as complete, validates whether the tasks exist and are yet to be completed
 
         :param:
         :type:
         :raise:
-        :return: Success message on completion of task, Error message in case of failure of validation checks
+        :return: Success message on completion of a task, Error message in case of failure of validation checks, or
+            a per-ID summary when several tasks are given
         :rtype: str
 
         """
         helper = ErrorHelper()
-        current_task_id = int(self.data.get('text'))
-        current_slack_id = self.data.get('user_id')
-
-        # check if task id exists
-        exists = db.session.query(db.exists().where(Task.task_id == current_task_id)).scalar()
-
-        task_progress = Assignment.query.filter_by(assignment_id=current_task_id, progress=0.0).all()
-
-        if exists is False:
-            return helper.get_command_help("no_task_id") 
-
-        # check if task is done
-        elif exists is True and len(task_progress) == 0:
-            return helper.get_command_help("task_already_done")
-        # if task is not done
-        elif exists is True and task_progress[0].progress == 0.0:
-
-            my_query = self.get_or_create(current_slack_id)
-
-            # check if the person who has been assigned the task is the one updating it
-            userId = db.session.query(Assignment).filter_by(assignment_id=current_task_id).all()[0].user_id
-            sameUser = db.session.query(User).filter_by(slack_user_id=current_slack_id).all()[0].user_id == userId
+        try:
+            task_ids = parse_task_ids(self.data.get('text'))
+        except ValueError:
+            return helper.get_command_help("task_ids_invalid")
+
+        outcomes = self.complete(task_ids, self.data.get('user_id'))
+        if len(task_ids) == 1:
+            return helper.get_command_help(outcomes[task_ids[0]])
+        return self.summary(outcomes)
+
+    @staticmethod
+    def summary(outcomes):
+        """
+        Builds the summary of a bulk completion, one line per outcome listing its task IDs
 
-            if(sameUser): 
-                user_id = my_query.user_id
+        :param outcomes: Mapping of task ID to outcome
+        :type outcomes: dict[int, str]
+        :raise:
+        :return: Summary message
+        :rtype: str
 
-                db.session.query(Assignment).filter_by(assignment_id=current_task_id).update(dict(progress=1.0, user_id=user_id))
-                db.session.commit()
-                return helper.get_command_help("task_done")
-            else: 
-                return helper.get_command_help("task_cannot_be_updated")
+        """
+        done = sum(1 for outcome in outcomes.values() if outcome == "task_done")
+        lines = [f"{done} of {len(outcomes)} tasks completed."]
+        for outcome, label in OUTCOME_LABELS.items():
+            task_ids = [f"#{task_id}" for task_id, result in outcomes.items() if result == outcome]
+            if task_ids:
+                lines.append(f"{label}: {', '.join(task_ids)}")
+        return "\n".join(lines)
@@ -1,7 +1,8 @@
-from copy import deepcopy
 import random
 from models import *
+from helpers.blocks import section, task_updated_block
 from helpers.errorhelper import ErrorHelper
+from commands.leaderboard import Leaderboard
 import datetime
 
 class UpdateTask: 
@@ -9,14 +10,6 @@ class UpdateTask:
     This class handles the Update Task functionality. 
     """
 
-    base_create_task_block_format = {
-        "type": "section",
-        "text": {
-            "type": "mrkdwn",
-            "text": ">{greeting}! Your task SP-{id} was updated successfully.",
-        },
-    }
-
     greetings = ["Awesome", "Great", "Congratulations", "Well done", "Let's go"]
 
     def __init__(self, user_id="", data=[], users=[]):
@@ -157,13 +150,10 @@ class UpdateTask:
         :param assignee: Assignee Slack user ID
         :return: Blocks list of response payload
         """
-        response = deepcopy(self.base_create_task_block_format)
-
         creatorUserId = db.session.query(Task).filter_by(task_id=id).first().created_by
         sameUser = (creatorUserId == self.user_id)
         if not sameUser: 
-            response["text"]["text"] = "You are not allowed to make changes to this task."
-            return response
+            return section("You are not allowed to make changes to this task.")
 
         # Check if the assignee exists
         exists = db.session.query(db.exists().where(User.slack_user_id == assignee)).scalar()
@@ -177,16 +167,30 @@ class UpdateTask:
         user_id = db.session.query(User).filter_by(slack_user_id=assignee).first().user_id
 
         try:
+            # A completed task already counts on the leaderboard: move its points from the old to the new values.
+            # The rows stay locked until the commit, so a /taskdone of the same task either completes it before this
+            # read or waits for the update, and the rollup is credited once with the right points.
+            previous = (
+                db.session.query(Task.points, Assignment.user_id, Assignment.progress)
+                .join(Assignment, Assignment.assignment_id == Task.task_id)
+                .filter(Task.task_id == id)
+                .with_for_update()
+                .first()
+            )
+            if previous is not None and previous.progress == 1.0:
+                Leaderboard.credit_points(previous.user_id, -(previous.points or 0))
+                Leaderboard.credit_points(user_id, int(points))
+
             # Update the task
             db.session.query(Task).filter_by(task_id=id).update(dict(description=desc, points=points, deadline=deadline))  
             db.session.query(Assignment).filter_by(assignment_id=id).update(dict(user_id=user_id))
             db.session.commit()
 
             # Prepare success response
-            response["text"]["text"] = response["text"]["text"].format(greeting=random.choice(self.greetings), id=id)
+            response = task_updated_block(random.choice(self.greetings), id)
         except Exception as e:
             db.session.rollback()
-            response["text"]["text"] = f"Error: {str(e)}"
+            response = section(f"Error: {str(e)}")
         
         self.payload["blocks"].append(response)
         return self.payload["blocks"]
@@ -1,82 +1,80 @@
-from copy import deepcopy
+from bisect import bisect_right
 
 from models import *
+from helpers.blocks import section, task_blocks
+from helpers.jobs import DueTodayCache
+from helpers.pagination import next_page_block
 
 class ViewDeadlineTasks:
     """
     This class is used to view a list of tasks on the slack bot as per the user they have been assigned to
     """
 
-    base_point_block_format = {
-        "type": "section",
-        "text": {
-            "type": "mrkdwn",
-            "text": ">SP-{id} ({points} SlackPoints) {description} [Deadline: {deadline}]",
-        },
-    }
+    page_size = 20
 
-    def __init__(self):
+    def __init__(self, due_today=None):
         """
-        Initialise ViewTasks Class. Set progress for filtering tasks.
+        Initialise ViewDeadlineTasks Class.
 
-        :param progress: Optional Filter on tasks according to their progress.
-        :type progress: float
+        :param due_today: Cache of the tasks due today, shared between requests; without one the tasks are queried
+        :type due_today: DueTodayCache
         :raise:
-        :return: ViewPoints object
-        :rtype: ViewPoints object
+        :return: ViewDeadlineTasks object
+        :rtype: ViewDeadlineTasks object
 
         """
         self.payload = {"response_type": "ephemeral", "blocks": []}
-    
-    def get_list(self):
+        self.due_today = due_today or DueTodayCache(self.due_tasks)
+
+    @staticmethod
+    def due_tasks(day):
         """
-        Return a list of tasks formatted in a slack message payload.
+        Queries the pending tasks due on a day
 
-        :param None:
-        :type None:
-        :raise None:
-        :return: Slack message payload with list of tasks.
-        :rtype: dict
+        :param day: Due date
+        :type day: date
+        :raise:
+        :return: Rows with task_id, points, description, deadline and the assignee's user_id, ordered by task ID
+        :rtype: list[Row]
 
         """
-        tasks = []
-        # db query to get all tasks that have progress < 1
-        
-        tasks_with_deadline = (
+        return (
             Task.query.join(Assignment)
-            .add_columns(
-                Assignment.user_id,
-                Assignment.progress,
+            .with_entities(
                 Task.task_id,
                 Task.points,
                 Task.description,
                 Task.deadline,
+                Assignment.user_id,
             )
-            .filter(Task.deadline == datetime.now().strftime("%Y-%m-%d"))
+            .filter(Task.deadline == day)
             .filter(Assignment.progress < 1)
+            .order_by(Task.task_id)
             .all()
         )
-        tasks.extend(tasks_with_deadline)
+
+    def get_list(self, after=0):
+        """
+        Return a page of tasks formatted in a slack message payload.
+
+        :param after: Task ID of the last task of the previous page, 0 for the first page.
+        :type after: int
+        :raise None:
+        :return: Slack message payload with list of tasks.
+        :rtype: dict
+
+        """
+        due = self.due_today.get()
+        # the due set is ordered by task ID, the page starts right after the previous one
+        start = bisect_right([task.task_id for task in due], after) if after else 0
+        tasks = due[start:start + self.page_size]
 
         # parse them
-        for task in tasks:
-            point = deepcopy(self.base_point_block_format)
-            point["text"]["text"] = point["text"]["text"].format(
-                id=task.task_id,
-                points=task.points,
-                description=task.description,
-                deadline=task.deadline,
-            )
-            self.payload["blocks"].append(point)
+        self.payload["blocks"].extend(task_blocks(tasks))
+        if start + self.page_size < len(due):
+            self.payload["blocks"].append(next_page_block("today", tasks[-1].task_id))
         if not self.payload["blocks"]:
             self.payload["blocks"].append(
-                {
-                    "type": "section",
-                    "text": {
-                        "type": "mrkdwn",
-                        "text": ">Currently there are no SlackPoints available",
-                    },
-                }
+                section(">Currently there are no SlackPoints available")
             )
         return self.payload
-
@@ -1,18 +1,12 @@
-from copy import deepcopy
-
 from models import *
+from helpers.blocks import section, task_blocks
+from helpers.pagination import fetch_page, next_page_block
 class ViewMyTasks:
     """
     This class is used to view a list of tasks on the slack bot as per the user they have been assigned to
     """
 
-    base_point_block_format = {
-        "type": "section",
-        "text": {
-            "type": "mrkdwn",
-            "text": ">SP-{id} ({points} SlackPoints) {description} [Deadline: {deadline}]",
-        },
-    }
+    page_size = 20
 
     def __init__(self, user_id):
         """
@@ -28,12 +22,12 @@ class ViewMyTasks:
         self.user_id = user_id
         self.payload = {"response_type": "ephemeral", "blocks": []}
 
-    def get_list(self):
+    def get_list(self, after=0):
         """
-        Return a list of tasks formatted in a slack message payload.
+        Return a page of tasks formatted in a slack message payload.
 
-        :param None:
-        :type None:
+        :param after: Task ID of the last task of the previous page, 0 for the first page.
+        :type after: int
         :raise None:
         :return: Slack message payload with list of tasks.
         :rtype: dict
@@ -43,7 +37,7 @@ class ViewMyTasks:
         # db query to get all tasks that have progress < 1
 
         user_id = User.query.filter_by(slack_user_id=self.user_id).all()[0].user_id
-        tasks_with_progress = (
+        query = (
             Task.query.join(Assignment)
             .add_columns(
                 Assignment.user_id,
@@ -55,28 +49,16 @@ class ViewMyTasks:
             )
             .filter(Assignment.user_id == user_id)
             .filter(Assignment.progress < 1)
-            .all()
         )
+        tasks_with_progress, next_after = fetch_page(query, after, self.page_size)
         tasks.extend(tasks_with_progress)
 
         # parse them
-        for task in tasks:
-            point = deepcopy(self.base_point_block_format)
-            point["text"]["text"] = point["text"]["text"].format(
-                id=task.task_id,
-                points=task.points,
-                description=task.description,
-                deadline=task.deadline,
-            )
-            self.payload["blocks"].append(point)
+        self.payload["blocks"].extend(task_blocks(tasks))
+        if next_after is not None:
+            self.payload["blocks"].append(next_page_block("me", next_after))
         if not self.payload["blocks"]:
             self.payload["blocks"].append(
-                {
-                    "type": "section",
-                    "text": {
-                        "type": "mrkdwn",
-                        "text": ">Currently there are no SlackPoints available",
-                    },
-                }
+                section(">Currently there are no SlackPoints available")
             )
         return self.payload
\ No newline at end of file
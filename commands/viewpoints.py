@@ -1,6 +1,6 @@
-from copy import deepcopy
-
 from models import Task, Assignment
+from helpers.blocks import section, task_blocks
+from helpers.pagination import fetch_page, next_page_block
 
 
 class ViewPoints:
@@ -8,13 +8,7 @@ class ViewPoints:
     This class is used to view a list of tasks on the slack bot as per their progress.
     """
 
-    base_point_block_format = {
-        "type": "section",
-        "text": {
-            "type": "mrkdwn",
-            "text": ">SP-{id} ({points} SlackPoints) {description} [Deadline: {deadline}]",
-        },
-    }
+    page_size = 20
 
     def __init__(self, progress: float = 0.0):
         """
@@ -30,20 +24,20 @@ class ViewPoints:
         self.progress = progress
         self.payload = {"response_type": "ephemeral", "blocks": []}
 
-    def get_list(self):
+    def get_list(self, after: int = 0):
         """
-        Return a list of tasks formatted in a slack message payload.
+        Return a page of tasks formatted in a slack message payload.
 
-        :param None:
-        :type None:
+        :param after: Task ID of the last task of the previous page, 0 for the first page.
+        :type after: int
         :raise None:
         :return: Slack message payload with list of tasks.
         :rtype: dict
 
         """
         tasks = []
-        # db query to get all tasks that have progress = progress
-        tasks_with_progress = (
+        # db query to get a page of tasks that have progress = progress
+        query = (
             Task.query.join(Assignment)
             .add_columns(
                 Assignment.progress,
@@ -53,27 +47,17 @@ class ViewPoints:
                 Task.deadline,
             )
             .filter(Assignment.progress == self.progress)
-            .all()
         )
+        tasks_with_progress, next_after = fetch_page(query, after, self.page_size)
         tasks.extend(tasks_with_progress)
         # parse them
-        for task in tasks:
-            point = deepcopy(self.base_point_block_format)
-            point["text"]["text"] = point["text"]["text"].format(
-                id=task.task_id,
-                points=task.points,
-                description=task.description,
-                deadline=task.deadline,
+        self.payload["blocks"].extend(task_blocks(tasks))
+        if next_after is not None:
+            self.payload["blocks"].append(
+                next_page_block("points", next_after, progress=self.progress)
             )
-            self.payload["blocks"].append(point)
         if not self.payload["blocks"]:
             self.payload["blocks"].append(
-                {
-                    "type": "section",
-                    "text": {
-                        "type": "mrkdwn",
-                        "text": ">Currently there are no SlackPoints available",
-                    },
-                }
+                section(">Currently there are no SlackPoints available")
             )
         return self.payload
\ No newline at end of file
@@ -1,18 +1,96 @@
+import logging
 import os
 
+from configuration.serving import workers as _web_workers
+
 
 class Config(object):
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SQLALCHEMY_DATABASE_URI = os.environ.get("DATABASE_URL")
-    SQLALCHEMY_ECHO = True
+    # Logs every SQL statement, for debugging only
+    SQLALCHEMY_ECHO = os.environ.get("SQLALCHEMY_ECHO", "false").lower() == "true"
+    # Logging: root level, per-module levels as logger=LEVEL pairs, JSON lines and the share of payload logs kept
+    LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
+    LOG_LEVELS = os.environ.get("LOG_LEVELS", "sqlalchemy.engine=WARNING,slack_sdk=WARNING,slack=WARNING")
+    LOG_JSON = os.environ.get("LOG_JSON", "true").lower() == "true"
+    LOG_PAYLOAD_SAMPLE_RATE = float(os.environ.get("LOG_PAYLOAD_SAMPLE_RATE", "0.01"))
+    # Send the time a request spent on the database, Slack and rendering as a Server-Timing response header
+    SERVER_TIMING_HEADER = os.environ.get("SERVER_TIMING_HEADER", "true").lower() == "true"
+    # Database connection pool, per worker process. pool size + overflow should cover the worker's threads.
+    DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "5"))
+    DB_POOL_MAX_OVERFLOW = int(os.environ.get("DB_POOL_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT_SECONDS = float(os.environ.get("DB_POOL_TIMEOUT_SECONDS", "5"))
+    DB_POOL_RECYCLE_SECONDS = int(os.environ.get("DB_POOL_RECYCLE_SECONDS", "1800"))
+    DB_POOL_PRE_PING = os.environ.get("DB_POOL_PRE_PING", "true").lower() == "true"
+    # Connections opened when a worker boots, before it serves its first request
+    DB_POOL_MIN_CONNECTIONS = int(os.environ.get("DB_POOL_MIN_CONNECTIONS", "2"))
+    # Server side limit on a single statement, in milliseconds, 0 for none
+    DB_STATEMENT_TIMEOUT_MS = int(os.environ.get("DB_STATEMENT_TIMEOUT_MS", "5000"))
     # SLACK API key:
     SLACK_SIGNING_SECRET = os.environ.get("SLACK_SIGNING_SECRET")
     SLACK_BOT_TOKEN = os.environ.get("SLACK_BOT_TOKEN")
     VERIFICATION_TOKEN = os.environ.get("VERIFICATION_TOKEN")
+    # Slack Web API base URL, e.g. http://127.0.0.1:8098/api/ for the local emulator of benchmarks/slackemulator.py
+    SLACK_API_BASE_URL = os.environ.get("SLACK_API_BASE_URL", "https://slack.com/api/").rstrip("/") + "/"
+    # Slack HTTP transport: timeout of a call, idle connections kept per worker and retries of failed connections
+    # and rate limited calls
+    SLACK_TIMEOUT_SECONDS = float(os.environ.get("SLACK_TIMEOUT_SECONDS", "5"))
+    SLACK_POOL_SIZE = int(os.environ.get("SLACK_POOL_SIZE", "10"))
+    SLACK_MAX_RETRIES = int(os.environ.get("SLACK_MAX_RETRIES", "2"))
+    # Slack rate limits: share of each tier's limit one worker process may use, and how long a user-facing call may
+    # wait for its turn before the user is asked to try again. Slack counts the limits per workspace, so by default
+    # the gunicorn workers of configuration/serving.py (WEB_CONCURRENCY) split them evenly.
+    SLACK_RATE_LIMIT_SCALE = float(os.environ.get("SLACK_RATE_LIMIT_SCALE", str(1 / _web_workers)))
+    SLACK_RATE_LIMIT_MAX_WAIT_SECONDS = float(os.environ.get("SLACK_RATE_LIMIT_MAX_WAIT_SECONDS", "2"))
+    # Fan out independent Slack calls (profile lookups, messages to many users) on an async client, at most
+    # SLACK_ASYNC_CONCURRENCY at a time per worker
+    SLACK_ASYNC = os.environ.get("SLACK_ASYNC", "false").lower() == "true"
+    SLACK_ASYNC_CONCURRENCY = int(os.environ.get("SLACK_ASYNC_CONCURRENCY", "8"))
+    # Channel roster cache lifetime, in seconds
+    ROSTER_TTL_SECONDS = float(os.environ.get("ROSTER_TTL_SECONDS", "300"))
+    # Directory for lock files that let the worker processes of a host share channel roster fetches, unset to share
+    # them between the threads of a worker only
+    ROSTER_SHARED_FETCH_DIR = os.environ.get("ROSTER_SHARED_FETCH_DIR")
+    # Workspace user directory reload interval, in seconds
+    DIRECTORY_TTL_SECONDS = float(os.environ.get("DIRECTORY_TTL_SECONDS", "3600"))
+    # Interactive actions: acknowledge first and do the work on a bounded worker pool
+    INTERACTIVE_ACK_FIRST = os.environ.get("INTERACTIVE_ACK_FIRST", "true").lower() == "true"
+    INTERACTIVE_WORKERS = int(os.environ.get("INTERACTIVE_WORKERS", "4"))
+    INTERACTIVE_QUEUE_SIZE = int(os.environ.get("INTERACTIVE_QUEUE_SIZE", "100"))
+    # Timezone of the workspace, the day of "due today" and of the digest schedule
+    WORKSPACE_TIMEZONE = os.environ.get("WORKSPACE_TIMEZONE", "UTC")
+    # Tasks due today are cached for the day and reloaded after a write, and after this many seconds so that tasks
+    # written by other workers show up, 0 to keep them until midnight or a write in the same worker
+    DUE_TODAY_MAX_AGE_SECONDS = float(os.environ.get("DUE_TODAY_MAX_AGE_SECONDS", "60"))
+    # Local file the worker processes of a host bump on task writes, so that they all reload the tasks due today at
+    # once; unset to rely on DUE_TODAY_MAX_AGE_SECONDS
+    DUE_TODAY_VERSION_FILE = os.environ.get("DUE_TODAY_VERSION_FILE")
+    # Daily digest of the tasks due today: comma separated channel IDs, time of day, and channels posted at once
+    DIGEST_CHANNELS = [c.strip() for c in os.environ.get("DIGEST_CHANNELS", "").split(",") if c.strip()]
+    DIGEST_TIME = os.environ.get("DIGEST_TIME", "09:00")
+    DIGEST_BATCH_SIZE = int(os.environ.get("DIGEST_BATCH_SIZE", "20"))
+    # Task import: bearer token of the /import endpoint, unset to disable it, and rows inserted per transaction
+    IMPORT_TOKEN = os.environ.get("IMPORT_TOKEN")
+    IMPORT_CHUNK_SIZE = int(os.environ.get("IMPORT_CHUNK_SIZE", "1000"))
+    # Seconds an /import request may spend before it stops and reports where it got to, below the worker timeout
+    IMPORT_MAX_SECONDS = float(os.environ.get("IMPORT_MAX_SECONDS", "20"))
+    # Prometheus metrics at /metrics: bearer token needed to scrape them, unset to serve them without one
+    METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+    # Local directory the worker processes of a host share their metrics through, and how often each worker writes
+    # its own, in seconds. Unset when the app runs as a single process.
+    METRICS_DIR = os.environ.get("METRICS_DIR")
+    METRICS_WRITE_INTERVAL_SECONDS = float(os.environ.get("METRICS_WRITE_INTERVAL_SECONDS", "5"))
+    # Readiness probe (/ready): seconds a database check is reused, share of the pool in use above which a worker
+    # takes no more traffic, and seconds a check of the Slack token is reused, 0 to skip it
+    READY_CHECK_TTL_SECONDS = float(os.environ.get("READY_CHECK_TTL_SECONDS", "5"))
+    READY_POOL_SATURATION = float(os.environ.get("READY_POOL_SATURATION", "0.9"))
+    READY_SLACK_TTL_SECONDS = float(os.environ.get("READY_SLACK_TTL_SECONDS", "300"))
+    # Liveness probe (/live): a background job running longer than this many seconds means its thread is wedged
+    LIVE_MAX_JOB_SECONDS = float(os.environ.get("LIVE_MAX_JOB_SECONDS", "120"))
 def check_env_variables():
-    print("SQLALCHEMY_DATABASE_URI:", os.environ.get("DATABASE_URL"))
-    print("SLACK_SIGNING_SECRET:", os.environ.get("SLACK_SIGNING_SECRET"))
-    print("SLACK_BOT_TOKEN:", os.environ.get("SLACK_BOT_TOKEN"))
-    print("VERIFICATION_TOKEN:", os.environ.get("VERIFICATION_TOKEN"))
+    # only names are logged, the values are secrets
+    for name in ("DATABASE_URL", "SLACK_SIGNING_SECRET", "SLACK_BOT_TOKEN", "VERIFICATION_TOKEN"):
+        if not os.environ.get(name):
+            logging.getLogger(__name__).warning(f"{name} is not set")
 
-check_env_variables()
\ No newline at end of file
+check_env_variables()
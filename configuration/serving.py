@@ -0,0 +1,83 @@
+import multiprocessing
+import os
+import sys
+
+# Gunicorn settings for serving the app in production:
+#
+#     gunicorn -c python:configuration.serving app:app
+#
+# Every value can be overridden from the environment. Send SIGHUP to the master for a graceful reload: new workers
+# are started with the new code and configuration and old ones finish their in-flight requests first.
+
+# "gthread" (default) runs several threads per worker, which suits the Slack and database I/O every command waits
+# on. "gevent" needs the gevent package (and psycogreen for psycopg2); "sync" is gunicorn's one request per worker.
+worker_class = os.environ.get("WEB_WORKER_CLASS", "gthread")
+
+_cpus = multiprocessing.cpu_count()
+if worker_class == "gevent":
+    # one process per core, each multiplexing many connections
+    _default_workers = _cpus
+else:
+    _default_workers = _cpus * 2 + 1
+
+workers = int(os.environ.get("WEB_CONCURRENCY", _default_workers))
+threads = int(os.environ.get("WEB_THREADS", "8" if worker_class == "gthread" else "1"))
+worker_connections = int(os.environ.get("WEB_WORKER_CONNECTIONS", "1000"))
+
+bind = os.environ.get("WEB_BIND", f"0.0.0.0:{os.environ.get('PORT', '8080')}")
+
+# Slack keeps connections to the app open between slash commands
+keepalive = int(os.environ.get("WEB_KEEPALIVE", "75"))
+# Slack gives up on a request after 3 seconds, anything far beyond that is a stuck worker
+timeout = int(os.environ.get("WEB_TIMEOUT", "30"))
+graceful_timeout = int(os.environ.get("WEB_GRACEFUL_TIMEOUT", "30"))
+
+# recycle workers now and then so that slow leaks cannot accumulate
+max_requests = int(os.environ.get("WEB_MAX_REQUESTS", "2000"))
+max_requests_jitter = int(os.environ.get("WEB_MAX_REQUESTS_JITTER", "200"))
+
+# restart workers on code changes, for local development only
+reload = os.environ.get("WEB_RELOAD", "false").lower() == "true"
+
+# an empty WEB_ACCESS_LOG turns the access log off
+accesslog = os.environ.get("WEB_ACCESS_LOG", "-") or None
+errorlog = "-"
+loglevel = os.environ.get("WEB_LOG_LEVEL", "info")
+
+
+# worker processes share their metrics through files in this directory, see helpers/metrics.py
+metrics_dir = os.environ.get("METRICS_DIR")
+
+
+def on_starting(server):
+    # files left by a previous server would be added to this one's metrics
+    if metrics_dir:
+        from helpers.metrics import clear_directory
+
+        clear_directory(metrics_dir)
+
+
+def post_worker_init(worker):
+    # open the database connections before the worker takes its first request. Each worker builds its own pool
+    # here, after the fork, so no connection is ever shared between processes.
+    from app import metrics_exporter, warm_up_database
+
+    warm_up_database()
+    if metrics_exporter is not None:
+        metrics_exporter.start()
+
+
+def worker_exit(server, worker):
+    # runs in the worker: write its last metrics, unless the app never loaded
+    app_module = sys.modules.get("app")
+    exporter = getattr(app_module, "metrics_exporter", None)
+    if exporter is not None:
+        exporter.stop()
+
+
+def child_exit(server, worker):
+    # runs in the master: keep the counters of the exited worker, drop its gauges
+    if metrics_dir:
+        from helpers.metrics import mark_process_dead
+
+        mark_process_dead(metrics_dir, worker.pid)
@@ -0,0 +1,25 @@
+-- Tables as declared in models.py. IF NOT EXISTS keeps this a no-op on
+-- databases that were created with db.create_all() or db/schema.sql.
+
+CREATE TABLE IF NOT EXISTS "user" (
+   user_id SERIAL PRIMARY KEY,
+   slack_user_id VARCHAR UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS task (
+   task_id SERIAL PRIMARY KEY,
+   description TEXT,
+   points INT,
+   deadline DATE,
+   created_on TIMESTAMP,
+   updated_on TIMESTAMP,
+   created_by INT
+);
+
+CREATE TABLE IF NOT EXISTS assignment (
+   user_id INT REFERENCES "user"(user_id),
+   assignment_id INT PRIMARY KEY REFERENCES task(task_id),
+   progress FLOAT,
+   assignment_created_on TIMESTAMP,
+   assignment_updated_on TIMESTAMP
+);
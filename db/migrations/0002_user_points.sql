@@ -0,0 +1,15 @@
+-- Leaderboard rollup, filled from the completed task history.
+
+CREATE TABLE IF NOT EXISTS user_points (
+   user_id INT PRIMARY KEY REFERENCES "user"(user_id),
+   total_points INT NOT NULL DEFAULT 0
+);
+
+CREATE INDEX IF NOT EXISTS ix_user_points_total_points ON user_points (total_points DESC);
+
+INSERT INTO user_points (user_id, total_points)
+SELECT assignment.user_id, SUM(task.points)
+FROM assignment JOIN task ON task.task_id = assignment.assignment_id
+WHERE assignment.progress = 1 AND assignment.user_id IS NOT NULL
+GROUP BY assignment.user_id
+ON CONFLICT (user_id) DO NOTHING;
@@ -0,0 +1,19 @@
+-- Indexes for the listing and task completion predicates. Listings page by
+-- task_id (= assignment_id), so the partial indexes are ordered on it.
+
+-- /view-pending
+CREATE INDEX IF NOT EXISTS ix_assignment_pending
+   ON assignment (assignment_id) WHERE progress < 1;
+
+-- /view-completed
+CREATE INDEX IF NOT EXISTS ix_assignment_completed
+   ON assignment (assignment_id) WHERE progress = 1;
+
+-- /view-pending me
+CREATE INDEX IF NOT EXISTS ix_assignment_pending_user
+   ON assignment (user_id, assignment_id) WHERE progress < 1;
+
+-- /view-pending today. progress lives on assignment, so the deadline index
+-- cannot be partial on it; the join checks progress on the few rows due.
+CREATE INDEX IF NOT EXISTS ix_task_deadline
+   ON task (deadline, task_id);
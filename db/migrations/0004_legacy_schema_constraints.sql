@@ -0,0 +1,80 @@
+-- Brings databases created from the first db/schema.sql in line with
+-- models.py. 0001 leaves their tables as they are (CREATE TABLE IF NOT
+-- EXISTS), and they lack what the upserts on slack_user_id need. Every
+-- statement is a no-op on a database created by 0001 or db.create_all().
+
+-- "user".user_id was a plain INT, give it the SERIAL default of models.py
+DO $$
+BEGIN
+   IF (SELECT column_default FROM information_schema.columns
+       WHERE table_schema = current_schema() AND table_name = 'user' AND column_name = 'user_id') IS NULL THEN
+      CREATE SEQUENCE IF NOT EXISTS user_user_id_seq OWNED BY "user".user_id;
+      PERFORM setval('user_user_id_seq', COALESCE((SELECT MAX(user_id) FROM "user"), 0) + 1, false);
+      ALTER TABLE "user" ALTER COLUMN user_id SET DEFAULT nextval('user_user_id_seq');
+   END IF;
+END $$;
+
+-- Merge users recorded more than once into the one with the lowest user_id
+CREATE TEMPORARY TABLE duplicate_user ON COMMIT DROP AS
+SELECT user_id, MIN(user_id) OVER (PARTITION BY slack_user_id) AS keep_id
+FROM "user"
+WHERE slack_user_id IS NOT NULL;
+
+DELETE FROM duplicate_user WHERE user_id = keep_id;
+
+UPDATE assignment SET user_id = duplicate_user.keep_id
+FROM duplicate_user WHERE assignment.user_id = duplicate_user.user_id;
+
+UPDATE task SET created_by = duplicate_user.keep_id
+FROM duplicate_user WHERE task.created_by = duplicate_user.user_id;
+
+INSERT INTO user_points (user_id, total_points)
+SELECT duplicate_user.keep_id, SUM(user_points.total_points)
+FROM user_points JOIN duplicate_user ON duplicate_user.user_id = user_points.user_id
+GROUP BY duplicate_user.keep_id
+ON CONFLICT (user_id) DO UPDATE SET total_points = user_points.total_points + excluded.total_points;
+
+DELETE FROM user_points USING duplicate_user WHERE user_points.user_id = duplicate_user.user_id;
+
+DELETE FROM "user" USING duplicate_user WHERE "user".user_id = duplicate_user.user_id;
+
+-- ON CONFLICT (slack_user_id) needs a unique index; 0001 and db.create_all()
+-- already made one with the column's UNIQUE constraint
+DO $$
+BEGIN
+   IF NOT EXISTS (
+      SELECT 1
+      FROM pg_index
+      JOIN pg_attribute ON pg_attribute.attrelid = pg_index.indrelid AND pg_attribute.attnum = pg_index.indkey[0]
+      WHERE pg_index.indrelid = '"user"'::regclass
+        AND pg_index.indisunique
+        AND pg_index.indnatts = 1
+        AND pg_index.indpred IS NULL
+        AND pg_attribute.attname = 'slack_user_id'
+   ) THEN
+      CREATE UNIQUE INDEX IF NOT EXISTS ix_user_slack_user_id ON "user" (slack_user_id);
+   END IF;
+END $$;
+
+-- Column types and names of models.py
+ALTER TABLE "user" ALTER COLUMN slack_user_id TYPE VARCHAR;
+ALTER TABLE task ALTER COLUMN description TYPE TEXT;
+
+DO $$
+BEGIN
+   IF EXISTS (SELECT 1 FROM information_schema.columns
+              WHERE table_schema = current_schema() AND table_name = 'assignment'
+                AND column_name = 'dassignment_updated_on')
+      AND NOT EXISTS (SELECT 1 FROM information_schema.columns
+                      WHERE table_schema = current_schema() AND table_name = 'assignment'
+                        AND column_name = 'assignment_updated_on') THEN
+      ALTER TABLE assignment RENAME COLUMN dassignment_updated_on TO assignment_updated_on;
+   END IF;
+END $$;
+
+-- Indexes of 0002 and 0003, in case their tables predate them
+CREATE INDEX IF NOT EXISTS ix_user_points_total_points ON user_points (total_points DESC);
+CREATE INDEX IF NOT EXISTS ix_assignment_pending ON assignment (assignment_id) WHERE progress < 1;
+CREATE INDEX IF NOT EXISTS ix_assignment_completed ON assignment (assignment_id) WHERE progress = 1;
+CREATE INDEX IF NOT EXISTS ix_assignment_pending_user ON assignment (user_id, assignment_id) WHERE progress < 1;
+CREATE INDEX IF NOT EXISTS ix_task_deadline ON task (deadline, task_id);
@@ -14,8 +14,8 @@ CREATE TABLE task (
 );
 
 CREATE TABLE "user" (
-   user_id INT PRIMARY KEY,
-   slack_user_id VARCHAR(255)
+   user_id SERIAL PRIMARY KEY,
+   slack_user_id VARCHAR(255) UNIQUE
 );
 
 CREATE TABLE assignment (
@@ -35,3 +35,17 @@ ADD COLUMN created_by INT;
 ALTER TABLE task
 ADD CONSTRAINT fk_task_user FOREIGN KEY(created_by) REFERENCES "user"(user_id);
 
+
+CREATE TABLE user_points (
+   user_id INT PRIMARY KEY,
+   total_points INT NOT NULL DEFAULT 0,
+   FOREIGN KEY(user_id)
+      REFERENCES "user"(user_id)
+);
+CREATE INDEX ix_user_points_total_points ON user_points (total_points DESC);
+
+-- Hot path indexes, see db/migrations/0003_hot_path_indexes.sql
+CREATE INDEX ix_assignment_pending ON assignment (assignment_id) WHERE progress < 1;
+CREATE INDEX ix_assignment_completed ON assignment (assignment_id) WHERE progress = 1;
+CREATE INDEX ix_assignment_pending_user ON assignment (user_id, assignment_id) WHERE progress < 1;
+CREATE INDEX ix_task_deadline ON task (deadline, task_id);
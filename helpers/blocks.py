@@ -0,0 +1,125 @@
+import json
+
+from helpers.timing import RENDER, timed
+
+# Templates are bound to str.format once, at import, and every block is built as a fresh dict literal, so
+# rendering a row costs one format call and two small dicts instead of a deepcopy of a base block.
+_TASK_LINE = ">SP-{id} ({points} SlackPoints) {description} [Deadline: {deadline}]".format
+_LEADERBOARD_LINE = "{pos}. <@{userid}> has {points} points!".format
+_TASK_CREATED = ">{greeting}! Your task SP-{id} was created successfully.".format
+_TASK_UPDATED = ">{greeting}! Your task SP-{id} was updated successfully.".format
+
+
+def serialize(payload):
+    """
+    Serializes a payload in flask.jsonify's compact, key sorted form, so cached bytes can be served as a response body
+
+    :param payload: Slack message payload
+    :type payload: dict[str, Any]
+    :raise:
+    :return: JSON encoded payload
+    :rtype: bytes
+
+    """
+    return json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+
+def section(text):
+    """
+    Creates a markdown section block
+
+    :param text: Markdown text of the section
+    :type text: str
+    :raise:
+    :return: Section block
+    :rtype: dict[str, Any]
+
+    """
+    return {"type": "section", "text": {"type": "mrkdwn", "text": text}}
+
+
+@timed(RENDER)
+def task_blocks(tasks):
+    """
+    Creates one section block per task of a listing
+
+    :param tasks: Rows with task_id, points, description and deadline
+    :type tasks: Iterable[Any]
+    :raise:
+    :return: Section blocks
+    :rtype: list[dict[str, Any]]
+
+    """
+    return [
+        {
+            "type": "section",
+            "text": {
+                "type": "mrkdwn",
+                "text": _TASK_LINE(
+                    id=task.task_id,
+                    points=task.points,
+                    description=task.description,
+                    deadline=task.deadline,
+                ),
+            },
+        }
+        for task in tasks
+    ]
+
+
+@timed(RENDER)
+def leaderboard_blocks(rows):
+    """
+    Creates one section block per leaderboard position
+
+    :param rows: Rows with slack_user_id and total_points, best first
+    :type rows: Iterable[Any]
+    :raise:
+    :return: Section blocks
+    :rtype: list[dict[str, Any]]
+
+    """
+    return [
+        {
+            "type": "section",
+            "text": {
+                "type": "mrkdwn",
+                "text": _LEADERBOARD_LINE(
+                    pos=pos, userid=row.slack_user_id, points=row.total_points
+                ),
+            },
+        }
+        for pos, row in enumerate(rows, 1)
+    ]
+
+
+def task_created_block(greeting, id):
+    """
+    Creates the section block confirming a task creation
+
+    :param greeting: Greeting word
+    :type greeting: str
+    :param id: Task ID
+    :type id: int
+    :raise:
+    :return: Section block
+    :rtype: dict[str, Any]
+
+    """
+    return section(_TASK_CREATED(greeting=greeting, id=id))
+
+
+def task_updated_block(greeting, id):
+    """
+    Creates the section block confirming a task update
+
+    :param greeting: Greeting word
+    :type greeting: str
+    :param id: Task ID
+    :type id: int
+    :raise:
+    :return: Section block
+    :rtype: dict[str, Any]
+
+    """
+    return section(_TASK_UPDATED(greeting=greeting, id=id))
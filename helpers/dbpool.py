@@ -0,0 +1,136 @@
+import logging
+import time
+
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+from helpers.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+checkout_wait_seconds = REGISTRY.histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a connection from the database pool",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+checkout_timeouts = REGISTRY.counter(
+    "db_pool_checkout_timeouts_total",
+    "Checkouts that gave up waiting for a database connection",
+)
+connections_opened = REGISTRY.counter(
+    "db_pool_connections_opened_total", "Database connections opened by the pool"
+)
+
+
+def observe_pool(engine, registry=REGISTRY):
+    """
+    Reports the size and use of an engine's connection pool as gauges, read whenever the registry is dumped
+
+    Only a QueuePool keeps these statistics, other pools are not reported.
+
+    :param engine: Engine whose pool is reported
+    :type engine: sqlalchemy.engine.Engine
+    :param registry: Metrics registry of the gauges
+    :type registry: Registry
+    :raise:
+    :return: None
+    :rtype: None
+
+    """
+    if not isinstance(engine.pool, QueuePool):
+        return
+    size = registry.gauge("db_pool_size", "Connections the database pool keeps open").labels()
+    checked_out = registry.gauge("db_pool_checked_out", "Database connections in use").labels()
+    overflow = registry.gauge("db_pool_overflow", "Database connections open beyond the pool size").labels()
+
+    def update():
+        # read through the engine, which gets a new pool when it is disposed
+        pool = engine.pool
+        size.set(pool.size())
+        checked_out.set(pool.checkedout())
+        # negative while the pool has not opened pool_size connections yet
+        overflow.set(max(pool.overflow(), 0))
+
+    registry.on_collect(update)
+
+
+class TimedQueuePool(QueuePool):
+    """
+    This class is a QueuePool that records how long every checkout waits for a connection.
+    """
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            checkout_timeouts.inc()
+            raise
+        finally:
+            checkout_wait_seconds.observe(time.perf_counter() - start)
+
+    def _create_connection(self):
+        connections_opened.inc()
+        return super()._create_connection()
+
+
+def engine_options(config):
+    """
+    Builds the SQLALCHEMY_ENGINE_OPTIONS for the configured database
+
+    Pool settings only apply to server databases, an SQLite URL (used by the tests) gets the dialect's own pool.
+
+    :param config: Configuration object, see configuration.env_config.Config
+    :type config: type
+    :raise:
+    :return: Keyword arguments for create_engine
+    :rtype: dict[str, Any]
+
+    """
+    url = config.SQLALCHEMY_DATABASE_URI or ""
+    if not url.startswith(("postgres://", "postgresql")):
+        return {}
+    options = {
+        "poolclass": TimedQueuePool,
+        "pool_size": config.DB_POOL_SIZE,
+        "max_overflow": config.DB_POOL_MAX_OVERFLOW,
+        "pool_timeout": config.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": config.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": config.DB_POOL_PRE_PING,
+    }
+    if config.DB_STATEMENT_TIMEOUT_MS:
+        options["connect_args"] = {
+            "options": f"-c statement_timeout={config.DB_STATEMENT_TIMEOUT_MS}"
+        }
+    return options
+
+
+def warm_up(engine, connections):
+    """
+    Opens connections up front so that the first requests of a worker do not pay for connection setup
+
+    Every connection is checked out at the same time, so the pool really opens that many, and returned after a
+    round trip. A database that cannot be reached is logged and left to the requests to retry.
+
+    :param engine: Engine whose pool is warmed up
+    :type engine: sqlalchemy.engine.Engine
+    :param connections: Number of connections to open
+    :type connections: int
+    :raise:
+    :return: Number of connections opened
+    :rtype: int
+
+    """
+    opened = []
+    try:
+        for _ in range(connections):
+            connection = engine.connect()
+            opened.append(connection)
+            connection.execute(text("SELECT 1"))
+    except Exception:
+        logger.exception("Database warm-up stopped after %d connections", len(opened))
+    finally:
+        for connection in opened:
+            connection.close()
+    return len(opened)
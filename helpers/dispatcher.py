@@ -0,0 +1,147 @@
+import logging
+import queue
+import threading
+import time
+
+from helpers.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+
+class WorkQueue:
+    """
+    This class runs deferred work on a bounded pool of worker threads fed by a bounded queue.
+    """
+
+    def __init__(self, name, workers=4, maxsize=100, registry=REGISTRY):
+        """
+        Constructor to initialize the queue, its metrics and the worker threads
+
+        :param name: Queue name, used in thread names and metric labels
+        :type name: str
+        :param workers: Number of worker threads
+        :type workers: int
+        :param maxsize: Maximum number of jobs waiting in the queue
+        :type maxsize: int
+        :param registry: Metrics registry the queue reports to
+        :type registry: Registry
+        :raise:
+        :return: None
+        :rtype: None
+
+        """
+        self.name = name
+        self.workers = workers
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._threads = []
+        # worker thread name -> (time its current job started, job name), to tell a wedged thread from a busy one
+        self._busy = {}
+        self._started = False
+        self._start_lock = threading.Lock()
+
+        self.depth = registry.gauge(
+            "work_queue_depth", "Jobs waiting in a work queue", ("queue",)
+        ).labels(name)
+        self.jobs = registry.counter(
+            "work_queue_jobs_total", "Jobs by queue and outcome", ("queue", "outcome")
+        )
+        self.wait_seconds = registry.histogram(
+            "work_queue_wait_seconds", "Time jobs spent waiting in a work queue", ("queue",)
+        ).labels(name)
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        Enqueues a job without blocking, starting the workers on first use
+
+        :param fn: Callable to run on a worker thread
+        :type fn: Callable
+        :raise:
+        :return: True if the job was enqueued, False if the queue is full
+        :rtype: bool
+
+        """
+        self._ensure_started()
+        try:
+            self._queue.put_nowait((time.monotonic(), fn, args, kwargs))
+        except queue.Full:
+            self.jobs.labels(self.name, "rejected").inc()
+            return False
+        self.jobs.labels(self.name, "submitted").inc()
+        self.depth.set(self._queue.qsize())
+        return True
+
+    def qsize(self):
+        """
+        Returns the number of jobs waiting in the queue
+
+        :param:
+        :type:
+        :raise:
+        :return: Number of waiting jobs
+        :rtype: int
+
+        """
+        return self._queue.qsize()
+
+    def stalled(self, max_seconds):
+        """
+        Returns the worker threads that died or have been running one job for longer than max_seconds
+
+        :param max_seconds: Longest a job may run before its thread counts as wedged
+        :type max_seconds: float
+        :raise:
+        :return: Descriptions of the stalled threads, empty when every thread is healthy
+        :rtype: list[str]
+
+        """
+        now = time.monotonic()
+        stalled = [f"{thread.name} died" for thread in self._threads if not thread.is_alive()]
+        for name, (started, job) in list(self._busy.items()):
+            if now - started > max_seconds:
+                stalled.append(f"{name} has been running {job} for {now - started:.0f} s")
+        return stalled
+
+    def join(self):
+        """
+        Blocks until every enqueued job has been processed
+
+        :param:
+        :type:
+        :raise:
+        :return: None
+        :rtype: None
+
+        """
+        self._queue.join()
+
+    def _ensure_started(self):
+        # started lazily so that gunicorn forks before the threads exist
+        if self._started:
+            return
+        with self._start_lock:
+            if self._started:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(
+                    target=self._run, name=f"{self.name}-{i}", daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+            self._started = True
+
+    def _run(self):
+        while True:
+            enqueued_at, fn, args, kwargs = self._queue.get()
+            self.depth.set(self._queue.qsize())
+            self.wait_seconds.observe(time.monotonic() - enqueued_at)
+            name = threading.current_thread().name
+            self._busy[name] = (time.monotonic(), getattr(fn, "__name__", repr(fn)))
+            try:
+                fn(*args, **kwargs)
+                self.jobs.labels(self.name, "completed").inc()
+            except Exception:
+                self.jobs.labels(self.name, "failed").inc()
+                logger.exception("Job failed on work queue %s", self.name)
+            finally:
+                self._busy.pop(name, None)
+                self._queue.task_done()
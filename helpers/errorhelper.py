@@ -1,32 +1,56 @@
-from copy import deepcopy
+from functools import lru_cache
+
 from commands.help import Help
+from helpers.blocks import section, serialize
 
+error_block_text = ">Oops! Something went wrong. Please try again with the correct command rules."
 
-class ErrorHelper:
-    error_payload = {"response_type": "ephemeral", "blocks": []}
+# command -> fixed help message, see ErrorHelper.get_command_help
+COMMAND_HELP = {
+    "create": ">To create a task, follow the format: \n*-d* [description of task] *-p* [points of the task] *-ddl* [deadline of the task].\nFor example: */create* *-d* Hey! This is my new task *-p* 100 *-ddl* 15/10/2022",
+    "no_task_id": "The given Task ID does not exist! Please try again...",
+    "task_already_done": "The given Task was already completed!",
+    "task_done": "Congratulations your task is completed now!",
+    "task_updated": "The task has been updated!",
+    "task_cannot_be_updated": "The task has not been assigned to you.",
+    "task_ids_invalid": "Please give task IDs as numbers or ranges, for example: /task-done 12 13 14-20 (at most 100 tasks).",
+    "not_created_by_you": "You cannot modify this task.",
+}
 
-    error_block_1 = {
-        "type": "section",
-        "text": {
-            "type": "mrkdwn",
-            "text": ">Oops! Something went wrong. Please try again with the correct command rules.",
-        },
-    }
 
-    def __init__(self) -> None:
-        """
-        Constructor to initialize command_help object
+@lru_cache(maxsize=None)
+def error_payload(command):
+    """
+    Returns the error payload of a command, built once per command and shared by every caller
 
-        :param:
-        :type:
-        :raise:
-        :return: None
-        :rtype: None
+    :param command: Command name
+    :type command: str
+    :raise KeyError: If the command has no help entry
+    :return: Payload, which must not be modified
+    :rtype: dict[str, Any]
 
-        """
+    """
+    blocks = [section(error_block_text)]
+    blocks.extend(Help().help(command_name=command))
+    return {"response_type": "ephemeral", "blocks": blocks}
 
-        self.command_help = Help()
 
+@lru_cache(maxsize=None)
+def error_payload_json(command):
+    """
+    Returns the serialized error payload of a command, built once per command
+
+    :param command: Command name
+    :type command: str
+    :raise KeyError: If the command has no help entry
+    :return: JSON encoded payload
+    :rtype: bytes
+
+    """
+    return serialize(error_payload(command))
+
+
+class ErrorHelper:
     def get_error_payload_blocks(self, command):
         """
         Get compiled error blocks for a particular command
@@ -34,16 +58,11 @@ class ErrorHelper:
         :param command:  Command name
         :type command: str
         :raise:
-        :return: List of blocks
+        :return: List of blocks, cached per command and shared, so it must not be modified
         :rtype: list[dict[str, Any]]
 
         """
-        error = deepcopy(self.error_payload)
-        errorBlock_1 = deepcopy(self.error_block_1)
-        errorBlock_2 = self.command_help.help(command_name=command)
-        error["blocks"].append(errorBlock_1)
-        error["blocks"].extend(errorBlock_2)
-        return error["blocks"]
+        return error_payload(command)["blocks"]
 
     def get_command_help(self, command, args=[]):
         """
@@ -56,21 +75,6 @@ class ErrorHelper:
         :rtype: str
 
         """
-        command_help = ""
-        if command == "create":
-            command_help = ">To create a task, follow the format: \n*-d* [description of task] *-p* [points of the task] *-ddl* [deadline of the task].\nFor example: */create* *-d* Hey! This is my new task *-p* 100 *-ddl* 15/10/2022"
-        elif command == "no_task_id":
-            command_help = "The given Task ID does not exist! Please try again..."
-        elif command == "task_already_done":
-            command_help = "The given Task was already completed!"
-        elif command == "task_done":
-            command_help = "Congratulations your task is completed now!"
-        elif command == "task_updated": 
-            command_help = "The task has been updated!"
-        elif command == "task_cannot_be_updated": 
-            command_help = "The task has not been assigned to you."
-        elif command == "task_assigned": 
-            command_help = "You have been assigned task #" + str(args[1]) + " by " + args[0]
-        elif command == "not_created_by_you": 
-            command_help = "You cannot modify this task."
-        return command_help
+        if command == "task_assigned":
+            return "You have been assigned task #" + str(args[1]) + " by " + args[0]
+        return COMMAND_HELP.get(command, "")
@@ -0,0 +1,197 @@
+import logging
+import time
+
+from slack_sdk.errors import SlackApiError
+from sqlalchemy import text
+
+from helpers.metrics import REGISTRY
+from helpers.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# auth.test errors that mean the token itself is broken, other failures are Slack's and not the worker's
+SLACK_AUTH_ERRORS = ("invalid_auth", "not_authed", "account_inactive", "token_revoked", "token_expired")
+
+
+class NotReady(Exception):
+    """
+    This class is raised by a dependency check whose dependency cannot serve requests.
+    """
+
+
+class CachedCheck:
+    """
+    This class runs a dependency check at most once per TTL, so that frequent probes do not load the dependency.
+
+    Probes arriving while the check runs share its outcome instead of starting their own.
+    """
+
+    def __init__(self, name, check, ttl=5.0, clock=time.monotonic, registry=REGISTRY):
+        """
+        Constructor to initialize the check and its empty cache
+
+        :param name: Check name, shown in the probe response
+        :type name: str
+        :param check: Returns a detail when the dependency is usable, raises otherwise (NotReady for known causes)
+        :type check: Callable[[], str]
+        :param ttl: Number of seconds an outcome is reused
+        :type ttl: float
+        :param clock: Monotonic clock, overridable for tests
+        :type clock: Callable[[], float]
+        :param registry: Metrics registry of the shared check runs
+        :type registry: Registry
+        :raise:
+        :return: None
+        :rtype: None
+
+        """
+        self.name = name
+        self.check = check
+        self.ttl = ttl
+        self.clock = clock
+        self._flight = SingleFlight("health", registry=registry)
+        self._result = None
+        self._expiry = 0.0
+
+    def __call__(self):
+        """
+        Returns the outcome of the check, running it when the cached one has expired
+
+        :param:
+        :type:
+        :raise:
+        :return: Whether the dependency is usable, and why
+        :rtype: dict[str, Any]
+
+        """
+        if self._result is not None and self._expiry > self.clock():
+            return self._result
+        return self._flight.do(self.name, self._refresh)
+
+    def _refresh(self):
+        try:
+            result = {"ok": True, "detail": self.check()}
+        except NotReady as e:
+            result = {"ok": False, "detail": str(e)}
+        except Exception as e:
+            # database errors name hosts and users, so the probe response only gets the error type
+            logger.warning("Readiness check %s failed", self.name, exc_info=True)
+            result = {"ok": False, "detail": type(e).__name__}
+        self._result = result
+        self._expiry = self.clock() + self.ttl
+        return result
+
+
+class Readiness:
+    """
+    This class tells whether a worker can serve requests, from the cached checks of its dependencies.
+    """
+
+    def __init__(self, checks):
+        """
+        Constructor to initialize the checks
+
+        :param checks: Dependency checks, all of them must pass
+        :type checks: list[CachedCheck]
+        :raise:
+        :return: None
+        :rtype: None
+
+        """
+        self.checks = checks
+
+    def run(self):
+        """
+        Runs, or reuses the outcome of, every check
+
+        :param:
+        :type:
+        :raise:
+        :return: Whether every check passed, and the outcome of each check by name
+        :rtype: tuple[bool, dict[str, dict[str, Any]]]
+
+        """
+        results = {check.name: check() for check in self.checks}
+        return all(result["ok"] for result in results.values()), results
+
+
+def database_check(engine, capacity, saturation=0.9):
+    """
+    Builds a check that the pool has connections to spare and the database answers
+
+    A saturated pool is reported without checking out a connection, which would wait for the pool timeout.
+
+    :param engine: Engine of the worker
+    :type engine: sqlalchemy.engine.Engine
+    :param capacity: Most connections the pool opens, pool size plus overflow
+    :type capacity: int
+    :param saturation: Share of the capacity in use above which the worker is not ready
+    :type saturation: float
+    :raise:
+    :return: Check for CachedCheck
+    :rtype: Callable[[], str]
+
+    """
+    def check():
+        checkedout = getattr(engine.pool, "checkedout", None)
+        in_use = checkedout() if checkedout is not None else 0
+        detail = f"{in_use} of {capacity} connections in use"
+        if capacity and in_use >= capacity * saturation:
+            raise NotReady(f"pool saturated, {detail}")
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+        return detail
+
+    return check
+
+
+def slack_check(client):
+    """
+    Builds a check that Slack accepts the bot token
+
+    Slack being unreachable or failing does not make the worker unready: every worker would fail alike, and taking
+    them all out of the service would not help.
+
+    :param client: Slack client of the worker
+    :type client: WebClient
+    :raise:
+    :return: Check for CachedCheck
+    :rtype: Callable[[], str]
+
+    """
+    def check():
+        try:
+            response = client.auth_test()
+        except SlackApiError as e:
+            error = e.response.get("error") if e.response is not None else None
+            if error in SLACK_AUTH_ERRORS:
+                raise NotReady(f"Slack rejected the token: {error}")
+            return f"Slack unavailable: {error or 'HTTP error'}"
+        except Exception as e:
+            return f"Slack unreachable: {type(e).__name__}"
+        return f"authenticated as {response.get('user')} in {response.get('team')}"
+
+    return check
+
+
+def wedged_threads(queues, max_job_seconds, slack_async=None, timeout=1.0):
+    """
+    Finds the background threads of the worker that no longer make progress
+
+    :param queues: Work queues of the worker
+    :type queues: list[WorkQueue]
+    :param max_job_seconds: Longest a queued job may run before its thread counts as wedged
+    :type max_job_seconds: float
+    :param slack_async: Async Slack client of the worker, whose loop thread is checked too
+    :type slack_async: AsyncSlack
+    :param timeout: Number of seconds to wait for the async loop
+    :type timeout: float
+    :raise:
+    :return: Description of each wedged thread, empty when the worker is live
+    :rtype: list[str]
+
+    """
+    problems = [f"{queue.name}: {problem}" for queue in queues for problem in queue.stalled(max_job_seconds)]
+    if slack_async is not None and not slack_async.ping(timeout):
+        problems.append(f"slack-async: the event loop did not answer within {timeout} s")
+    return problems
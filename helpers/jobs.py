@@ -0,0 +1,286 @@
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+from helpers.blocks import section, task_blocks
+from helpers.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+# Slack accepts at most 50 blocks per message
+MAX_BLOCKS_PER_MESSAGE = 50
+
+
+class SharedVersion:
+    """
+    This class is a version the worker processes of a host share through a file, replaced on every bump.
+    """
+
+    def __init__(self, path):
+        """
+        Constructor to initialize the version file, created when missing
+
+        :param path: Path of the version file, on a local file system shared by the worker processes
+        :type path: str
+        :raise OSError: If the file cannot be created
+        :return: None
+        :rtype: None
+
+        """
+        self.path = path
+        if self.get() is None:
+            self.bump()
+
+    def get(self):
+        """
+        Returns the current version
+
+        :param:
+        :type:
+        :raise:
+        :return: Version, compared for equality only, None if the file is missing
+        :rtype: tuple[int, int]
+
+        """
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        # a bump replaces the file, so the inode changes even when the clock does not move between two bumps
+        return stat.st_ino, stat.st_mtime_ns
+
+    def bump(self):
+        """
+        Changes the version seen by every process
+
+        :param:
+        :type:
+        :raise OSError: If the file cannot be replaced
+        :return: None
+        :rtype: None
+
+        """
+        tmp = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w"):
+            pass
+        os.replace(tmp, self.path)
+
+
+class DueTodayCache:
+    """
+    This class keeps the tasks due today, computed once per day in the workspace timezone.
+
+    The set is reloaded when the date changes, after invalidate (called on task writes), once it is older than
+    max_age, and, with a shared version, as soon as another worker process of the host invalidates its own set.
+    """
+
+    def __init__(
+        self, load, tz=None, max_age=None, version=None, clock=time.monotonic, now=datetime.now, registry=REGISTRY
+    ):
+        """
+        Constructor to initialize the loader and the empty cache
+
+        :param load: Returns the tasks due on a date, ordered by task ID
+        :type load: Callable[[date], list[Any]]
+        :param tz: Workspace timezone, the server's local time if not given
+        :type tz: tzinfo
+        :param max_age: Number of seconds after which the set is reloaded within a day, None to keep it all day
+        :type max_age: float
+        :param version: Version shared with the other worker processes, bumped by invalidate
+        :type version: SharedVersion
+        :param clock: Monotonic clock, overridable for tests
+        :type clock: Callable[[], float]
+        :param now: Wall clock taking a timezone, overridable for tests
+        :type now: Callable[[tzinfo], datetime]
+        :param registry: Metrics registry the cache hits and misses are counted in
+        :type registry: Registry
+        :raise:
+        :return: None
+        :rtype: None
+
+        """
+        self.load = load
+        self.tz = tz
+        self.max_age = max_age
+        self.version = version
+        self.clock = clock
+        self.now = now
+        self._lock = threading.Lock()
+        self._day = None
+        self._loaded_at = 0.0
+        self._loaded_version = None
+        self._tasks = []
+        lookups = registry.counter("cache_requests_total", "Cache lookups by cache and result (hit, miss)", ("cache", "result"))
+        self._hits = lookups.labels("due_today", "hit")
+        self._misses = lookups.labels("due_today", "miss")
+
+    def today(self):
+        """
+        Returns the current date in the workspace timezone
+
+        :param:
+        :type:
+        :raise:
+        :return: Current date
+        :rtype: date
+
+        """
+        return self.now(self.tz).date()
+
+    def get(self):
+        """
+        Returns the tasks due today, loading them on the first call of the day
+
+        :param:
+        :type:
+        :raise:
+        :return: Tasks due today, ordered by task ID
+        :rtype: list[Any]
+
+        """
+        day = self.today()
+        version = self.version.get() if self.version is not None else None
+        with self._lock:
+            fresh = self.max_age is None or self.clock() - self._loaded_at < self.max_age
+            if self._day == day and fresh and self._loaded_version == version:
+                self._hits.inc()
+                return self._tasks
+            self._misses.inc()
+            # loading under the lock makes concurrent first callers of the day share one query
+            self._tasks = list(self.load(day))
+            self._day = day
+            self._loaded_at = self.clock()
+            self._loaded_version = version
+            return self._tasks
+
+    def invalidate(self):
+        """
+        Drops the cached set so that the next call reloads it, in every process sharing the version
+
+        :param:
+        :type:
+        :raise:
+        :return: None
+        :rtype: None
+
+        """
+        with self._lock:
+            self._day = None
+        if self.version is not None:
+            self.version.bump()
+
+
+def digest_messages(channel, tasks, day, blocks_per_message=MAX_BLOCKS_PER_MESSAGE):
+    """
+    Builds the messages of a channel's digest of the tasks due on a day, split to fit Slack's block limit
+
+    :param channel: Slack channel ID
+    :type channel: str
+    :param tasks: Rows with task_id, points, description and deadline
+    :type tasks: list[Any]
+    :param day: Due date
+    :type day: date
+    :param blocks_per_message: Maximum number of blocks of a message
+    :type blocks_per_message: int
+    :raise:
+    :return: chat.postMessage arguments of each message, none when nothing is due
+    :rtype: list[dict[str, Any]]
+
+    """
+    if not tasks:
+        return []
+    header = f"*{len(tasks)} task{'s' if len(tasks) != 1 else ''} due today ({day.isoformat()})*"
+    blocks = [section(header)] + task_blocks(tasks)
+    return [
+        {"channel": channel, "text": header, "blocks": blocks[i:i + blocks_per_message]}
+        for i in range(0, len(blocks), blocks_per_message)
+    ]
+
+
+def next_run(at, tz, now):
+    """
+    Returns the next time a daily job runs
+
+    :param at: Time of day of the job
+    :type at: datetime.time
+    :param tz: Workspace timezone
+    :type tz: tzinfo
+    :param now: Current time, aware
+    :type now: datetime
+    :raise:
+    :return: Next run time, after now
+    :rtype: datetime
+
+    """
+    run = datetime.combine(now.date(), at, tzinfo=tz)
+    if run <= now:
+        run = datetime.combine(now.date() + timedelta(days=1), at, tzinfo=tz)
+    return run
+
+
+class DailyScheduler:
+    """
+    This class runs jobs once a day at a set time in the workspace timezone.
+    """
+
+    def __init__(self, tz, now=datetime.now):
+        """
+        Constructor to initialize the timezone and the empty job list
+
+        :param tz: Workspace timezone
+        :type tz: tzinfo
+        :param now: Wall clock taking a timezone, overridable for tests
+        :type now: Callable[[tzinfo], datetime]
+        :raise:
+        :return: None
+        :rtype: None
+
+        """
+        self.tz = tz
+        self.now = now
+        self.jobs = []
+
+    def add(self, name, at, fn):
+        """
+        Schedules a job
+
+        :param name: Job name, used in logs
+        :type name: str
+        :param at: Time of day the job runs
+        :type at: datetime.time
+        :param fn: Job, called without arguments
+        :type fn: Callable[[], Any]
+        :raise:
+        :return: None
+        :rtype: None
+
+        """
+        self.jobs.append((name, at, fn))
+
+    def run(self, stop=None):
+        """
+        Runs the jobs at their times until stopped; a failing job is logged and runs again the next day
+
+        :param stop: Event that ends the loop when set
+        :type stop: threading.Event
+        :raise:
+        :return: None
+        :rtype: None
+
+        """
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            now = self.now(self.tz)
+            when, name, fn = min(
+                ((next_run(at, self.tz, now), name, fn) for name, at, fn in self.jobs),
+                key=lambda job: job[0],
+            )
+            if stop.wait((when - now).total_seconds()):
+                return
+            logger.info("Running job %s", name)
+            try:
+                fn()
+            except Exception:
+                logger.exception("Job %s failed", name)
@@ -0,0 +1,177 @@
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+
+# Logger of verbose request and response payloads, only a sample of its records is kept
+PAYLOAD_LOGGER = "slackpoint.payloads"
+
+# LogRecord attributes that are not extra fields passed by the caller
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    This class formats a log record as a single line JSON object, with the caller's extra fields as keys.
+    """
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class SampleFilter(logging.Filter):
+    """
+    This class keeps a random share of the records passing through it.
+    """
+
+    def __init__(self, rate, random=random.random):
+        """
+        Constructor to initialize the sampling rate
+
+        :param rate: Share of records kept, between 0 and 1
+        :type rate: float
+        :param random: Source of uniform numbers in [0, 1)
+        :type random: Callable[[], float]
+        :raise:
+        :return: None
+        :rtype: None
+
+        """
+        super().__init__()
+        self.rate = rate
+        self.random = random
+
+    def filter(self, record):
+        return self.rate >= 1 or (self.rate > 0 and self.random() < self.rate)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    # The stock handler formats the record into its message on the logging thread, which would leave the listener's
+    # formatter nothing to structure. Only the message and the traceback are rendered here, where args and
+    # exc_info are still valid, and the fields are left to the listener's formatter.
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+
+def parse_levels(spec):
+    """
+    Parses per-module log levels, e.g. "sqlalchemy.engine=WARNING,helpers.roster=DEBUG"
+
+    :param spec: Comma separated logger=LEVEL pairs
+    :type spec: str
+    :raise ValueError: If a pair is malformed or names an unknown level
+    :return: Logger name -> level
+    :rtype: dict[str, int]
+
+    """
+    levels = {}
+    for pair in filter(None, (part.strip() for part in (spec or "").split(","))):
+        name, sep, level = pair.partition("=")
+        value = logging.getLevelName(level.strip().upper())
+        if not sep or not name.strip() or not isinstance(value, int):
+            raise ValueError(f"Invalid log level setting: {pair}")
+        levels[name.strip()] = value
+    return levels
+
+
+def configure_logging(level="INFO", module_levels="", json_output=True, payload_sample_rate=0.0, stream=None):
+    """
+    Routes every log record through a queue to a background listener that formats and writes it
+
+    Request threads only put records on an in-memory queue, formatting and writing happen on the listener thread.
+    Calling it again replaces the previous configuration.
+
+    :param level: Root log level
+    :type level: str
+    :param module_levels: Per-module levels, see parse_levels
+    :type module_levels: str
+    :param json_output: Write JSON lines instead of plain text
+    :type json_output: bool
+    :param payload_sample_rate: Share of payload log records kept, between 0 and 1
+    :type payload_sample_rate: float
+    :param stream: Stream the records are written to, standard error by default
+    :type stream: TextIO
+    :raise ValueError: If a level is invalid
+    :return: The started listener
+    :rtype: logging.handlers.QueueListener
+
+    """
+    global _listener
+    levels = parse_levels(module_levels)
+    root_level = logging.getLevelName(str(level).upper())
+    if not isinstance(root_level, int):
+        raise ValueError(f"Invalid log level: {level}")
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    if json_output:
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+
+    stop_logging()
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(_QueueHandler(log_queue))
+    root.setLevel(root_level)
+    for name, module_level in levels.items():
+        logging.getLogger(name).setLevel(module_level)
+
+    payloads = logging.getLogger(PAYLOAD_LOGGER)
+    for existing in payloads.filters[:]:
+        payloads.removeFilter(existing)
+    payloads.addFilter(SampleFilter(payload_sample_rate))
+
+    listener.start()
+    _listener = listener
+    return listener
+
+
+def stop_logging():
+    """
+    Stops the listener, after it has written every queued record
+
+    :param:
+    :type:
+    :raise:
+    :return: None
+    :rtype: None
+
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_logging)
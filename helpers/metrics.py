@@ -0,0 +1,579 @@
+import abc
+import bisect
+import json
+import logging
+import math
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# content type of the Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class _Metric(abc.ABC):
+    """
+    This class is the base of every metric family kept in a registry.
+    """
+
+    kind = "untyped"
+
+    def __init__(self, name, documentation, labelnames=()):
+        """
+        Constructor to initialize the metric name, help text and label names
+
+        :param name: Metric name
+        :type name: str
+        :param documentation: Help text of the metric
+        :type documentation: str
+        :param labelnames: Names of the labels the metric is split by
+        :type labelnames: tuple[str, ...]
+        :raise:
+        :return: None
+        :rtype: None
+
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children = {}
+
+    def labels(self, *values):
+        """
+        Returns the child metric for one combination of label values
+
+        :param values: Label values, in the order of the label names
+        :type values: str
+        :raise ValueError: If the number of values does not match the label names
+        :return: Child metric
+        :rtype: Any
+
+        """
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def samples(self):
+        """
+        Returns a snapshot of every child of the metric
+
+        :param:
+        :type:
+        :raise:
+        :return: List of label values and child snapshots
+        :rtype: list[tuple[tuple[str, ...], Any]]
+
+        """
+        with self._lock:
+            children = list(self._children.items())
+        return [(key, child.snapshot()) for key, child in children]
+
+    def _default(self):
+        return self.labels()
+
+    @abc.abstractmethod
+    def _new_child(self):
+        """
+        Builds the value of one label combination of the family
+        """
+
+
+class _CounterChild:
+    __slots__ = ("_lock", "value")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount=1.0):
+        with self._lock:
+            self.value += amount
+
+    def snapshot(self):
+        return self.value
+
+
+class _GaugeChild(_CounterChild):
+    __slots__ = ()
+
+    def set(self, value):
+        self.value = value
+
+    def dec(self, amount=1.0):
+        self.inc(-amount)
+
+
+class _HistogramChild:
+    __slots__ = ("_lock", "buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self._lock = threading.Lock()
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        with self._lock:
+            self.sum += value
+            self.count += 1
+            # first bucket whose bound is at least the value, the last one is +Inf
+            self.counts[bisect.bisect_left(self.buckets, value)] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "buckets": list(zip(self.buckets, self.counts)),
+                "sum": self.sum,
+                "count": self.count,
+            }
+
+
+class Counter(_Metric):
+    """
+    This class is a monotonically increasing counter.
+    """
+
+    kind = "counter"
+
+    def inc(self, amount=1.0):
+        self._default().inc(amount)
+
+    def _new_child(self):
+        return _CounterChild()
+
+
+class Gauge(_Metric):
+    """
+    This class is a value that can go up and down.
+    """
+
+    kind = "gauge"
+
+    def set(self, value):
+        self._default().set(value)
+
+    def inc(self, amount=1.0):
+        self._default().inc(amount)
+
+    def dec(self, amount=1.0):
+        self._default().dec(amount)
+
+    def _new_child(self):
+        return _GaugeChild()
+
+
+class Histogram(_Metric):
+    """
+    This class counts observations into fixed buckets.
+    """
+
+    kind = "histogram"
+
+    default_buckets = (
+        0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float("inf"),
+    )
+
+    def __init__(self, name, documentation, labelnames=(), buckets=None):
+        super().__init__(name, documentation, labelnames)
+        buckets = tuple(buckets or self.default_buckets)
+        if buckets[-1] != float("inf"):
+            buckets = buckets + (float("inf"),)
+        self.buckets = buckets
+
+    def observe(self, value):
+        self._default().observe(value)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+
+class Registry:
+    """
+    This class holds every metric family of the process, keyed by name.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+        self._hooks = []
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=None):
+        return self._get_or_create(
+            Histogram, name, documentation, labelnames, buckets=buckets
+        )
+
+    def collect(self):
+        """
+        Returns every registered metric family
+
+        :param:
+        :type:
+        :raise:
+        :return: List of metric families
+        :rtype: list[_Metric]
+
+        """
+        with self._lock:
+            return list(self._metrics.values())
+
+    def on_collect(self, hook):
+        """
+        Registers a function that refreshes metrics just before they are dumped, e.g. gauges read from a pool
+
+        :param hook: Function without arguments
+        :type hook: Callable[[], None]
+        :raise:
+        :return: None
+        :rtype: None
+
+        """
+        with self._lock:
+            self._hooks.append(hook)
+
+    def dump(self):
+        """
+        Returns a JSON serializable snapshot of every metric family, after running the collect hooks
+
+        :param:
+        :type:
+        :raise:
+        :return: Metric families with their kind, help text, label names and samples
+        :rtype: list[dict[str, Any]]
+
+        """
+        with self._lock:
+            hooks = list(self._hooks)
+        for hook in hooks:
+            hook()
+        return [
+            {
+                "name": metric.name,
+                "kind": metric.kind,
+                "documentation": metric.documentation,
+                "labelnames": list(metric.labelnames),
+                "samples": [[list(key), value] for key, value in metric.samples()],
+            }
+            for metric in self.collect()
+        ]
+
+    def _get_or_create(self, cls, name, documentation, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = cls(name, documentation, labelnames, **kwargs)
+                self._metrics[name] = metric
+            elif not isinstance(metric, cls):
+                raise ValueError(f"{name} is already registered as a {metric.kind}")
+            return metric
+
+
+REGISTRY = Registry()
+
+
+def merge(dumps):
+    """
+    Adds up the dumps of several registries, e.g. of every worker process: values of the same metric and labels are
+    summed, histograms bucket by bucket
+
+    :param dumps: Registry dumps, see Registry.dump
+    :type dumps: Iterable[list[dict[str, Any]]]
+    :raise:
+    :return: Merged metric families, in the format of a dump
+    :rtype: list[dict[str, Any]]
+
+    """
+    families = {}
+    for dump in dumps:
+        for family in dump:
+            merged = families.setdefault(family["name"], dict(family, samples={}))
+            for labels, value in family["samples"]:
+                key = tuple(labels)
+                current = merged["samples"].get(key)
+                if current is None:
+                    merged["samples"][key] = value
+                elif isinstance(value, dict):
+                    counts = dict(current["buckets"])
+                    for bound, count in value["buckets"]:
+                        counts[bound] = counts.get(bound, 0) + count
+                    merged["samples"][key] = {
+                        "buckets": sorted(counts.items()),
+                        "sum": current["sum"] + value["sum"],
+                        "count": current["count"] + value["count"],
+                    }
+                else:
+                    merged["samples"][key] = current + value
+    return [
+        dict(family, samples=[[list(key), value] for key, value in family["samples"].items()])
+        for family in families.values()
+    ]
+
+
+def _format_value(value):
+    if isinstance(value, int):
+        return str(value)
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+def _escape(text, quotes=True):
+    text = str(text).replace("\\", "\\\\").replace("\n", "\\n")
+    return text.replace('"', '\\"') if quotes else text
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def render(families):
+    """
+    Formats metric families in the Prometheus text exposition format
+
+    :param families: Metric families, in the format of a dump
+    :type families: list[dict[str, Any]]
+    :raise:
+    :return: Exposition text, see CONTENT_TYPE
+    :rtype: str
+
+    """
+    lines = []
+    for family in sorted(families, key=lambda f: f["name"]):
+        name = family["name"]
+        names = family["labelnames"]
+        lines.append(f"# HELP {name} {_escape(family['documentation'], quotes=False)}")
+        lines.append(f"# TYPE {name} {family['kind']}")
+        for labels, value in sorted(family["samples"], key=lambda sample: sample[0]):
+            if family["kind"] != "histogram":
+                lines.append(f"{name}{_format_labels(names, labels)} {_format_value(value)}")
+                continue
+            cumulative = 0
+            for bound, count in value["buckets"]:
+                cumulative += count
+                le = (("le", _format_value(bound)),)
+                lines.append(f"{name}_bucket{_format_labels(names, labels, le)} {_format_value(cumulative)}")
+            lines.append(f"{name}_sum{_format_labels(names, labels)} {_format_value(value['sum'])}")
+            lines.append(f"{name}_count{_format_labels(names, labels)} {_format_value(value['count'])}")
+    return "\n".join(lines) + "\n"
+
+
+class MultiProcessExporter:
+    """
+    This class shares the metrics of the worker processes of a host through a directory, one file per process.
+
+    Every process writes a dump of its registry to <pid>.json every interval seconds and when it exits, from a
+    background thread, so recording a metric stays an in-memory increment. A scrape rewrites the file of the process
+    serving it and merges every file: counters and histograms are summed over all processes, including those that
+    exited since the server started (see mark_process_dead), gauges over the live ones only.
+    """
+
+    def __init__(self, directory, registry=REGISTRY, interval=5.0, pid=os.getpid):
+        """
+        Constructor to initialize the directory, registry and write interval
+
+        :param directory: Directory shared by the worker processes, emptied by the server before it starts workers
+        :type directory: str
+        :param registry: Registry of this process
+        :type registry: Registry
+        :param interval: Number of seconds between writes of this process's file
+        :type interval: float
+        :param pid: Returns the ID of this process, overridable for tests
+        :type pid: Callable[[], int]
+        :raise:
+        :return: None
+        :rtype: None
+
+        """
+        self.directory = directory
+        self.registry = registry
+        self.interval = interval
+        self.pid = pid
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """
+        Starts writing this process's file periodically, to be called in each worker after the fork
+
+        :param:
+        :type:
+        :raise:
+        :return: None
+        :rtype: None
+
+        """
+        if self._thread is not None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="metrics-exporter", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops the periodic writes after a last one
+
+        :param:
+        :type:
+        :raise:
+        :return: None
+        :rtype: None
+
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.write()
+
+    def write(self):
+        """
+        Writes the dump of this process's registry, replacing the previous one atomically
+
+        :param:
+        :type:
+        :raise:
+        :return: None
+        :rtype: None
+
+        """
+        path = os.path.join(self.directory, f"{self.pid()}.json")
+        _write_json(path, self.registry.dump())
+
+    def collect(self):
+        """
+        Merges the metrics of every process, after writing the current ones of this process
+
+        :param:
+        :type:
+        :raise:
+        :return: Merged metric families, in the format of a dump
+        :rtype: list[dict[str, Any]]
+
+        """
+        self.write()
+        dumps = []
+        # an exited worker's file is read either before or after it is folded into the totals, never both
+        with _directory_lock(self.directory, exclusive=False):
+            filenames = [filename for filename in os.listdir(self.directory) if filename.endswith(".json")]
+            for filename in filenames:
+                dump = _read_json(os.path.join(self.directory, filename))
+                if dump is None:
+                    continue
+                stem = filename[:-len(".json")]
+                if not stem.isdigit() or not _alive(int(stem)):
+                    # gauges of exited processes no longer describe anything
+                    dump = [family for family in dump if family["kind"] != "gauge"]
+                dumps.append(dump)
+        return merge(dumps)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.write()
+            except OSError:
+                logger.exception("Could not write metrics to %s", self.directory)
+
+
+def mark_process_dead(directory, pid):
+    """
+    Folds the file of an exited worker into the totals of exited workers, called by the server when a worker exits
+
+    Counters and histograms are kept, so totals do not drop when a worker is recycled, and a new worker reusing the
+    process ID starts from its own file.
+
+    :param directory: Directory of the MultiProcessExporter
+    :type directory: str
+    :param pid: ID of the exited process
+    :type pid: int
+    :raise:
+    :return: None
+    :rtype: None
+
+    """
+    path = os.path.join(directory, f"{pid}.json")
+    with _directory_lock(directory, exclusive=True):
+        dump = _read_json(path)
+        if dump is None:
+            return
+        totals_path = os.path.join(directory, "exited.json")
+        dead = [family for family in dump if family["kind"] != "gauge"]
+        _write_json(totals_path, merge([_read_json(totals_path) or [], dead]))
+        os.remove(path)
+
+
+def clear_directory(directory):
+    """
+    Removes the files of a previous server, called once before the workers start
+
+    :param directory: Directory of the MultiProcessExporter
+    :type directory: str
+    :raise:
+    :return: None
+    :rtype: None
+
+    """
+    os.makedirs(directory, exist_ok=True)
+    for filename in os.listdir(directory):
+        if filename.endswith((".json", ".tmp")):
+            os.remove(os.path.join(directory, filename))
+
+
+@contextmanager
+def _directory_lock(directory, exclusive):
+    if fcntl is None:
+        yield
+        return
+    with open(os.path.join(directory, ".lock"), "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _write_json(path, data):
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def _read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # alive, but owned by another user
+        pass
+    return True
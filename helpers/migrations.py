@@ -0,0 +1,120 @@
+import os
+import re
+
+from sqlalchemy import text
+
+MIGRATIONS_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "db", "migrations"
+)
+
+_MIGRATION_FILE = re.compile(r"^(\d+)_(\w+)\.sql$")
+
+# Postgres advisory lock key held while migrating, any constant the app uses for nothing else
+MIGRATION_LOCK_KEY = 0x5C4E3A
+
+
+class Migration:
+    """
+    This class describes one versioned SQL migration file.
+    """
+
+    def __init__(self, version, name, path):
+        self.version = version
+        self.name = name
+        self.path = path
+
+    def sql(self):
+        with open(self.path, encoding="utf-8") as fd:
+            return fd.read()
+
+
+def discover(path=MIGRATIONS_DIR):
+    """
+    Lists the migration files of a directory, ordered by version
+
+    :param path: Directory holding ``<version>_<name>.sql`` files
+    :type path: str
+    :raise ValueError: If two files share a version
+    :return: Migrations, oldest first
+    :rtype: list[Migration]
+
+    """
+    migrations = {}
+    for filename in sorted(os.listdir(path)):
+        match = _MIGRATION_FILE.match(filename)
+        if match is None:
+            continue
+        version = int(match.group(1))
+        if version in migrations:
+            raise ValueError(f"Duplicate migration version {version}: {filename}")
+        migrations[version] = Migration(version, match.group(2), os.path.join(path, filename))
+    return [migrations[version] for version in sorted(migrations)]
+
+
+def applied_versions(connection):
+    """
+    Returns the versions already applied to a database, creating the bookkeeping table on first use
+
+    :param connection: SQLAlchemy connection
+    :type connection: Connection
+    :raise:
+    :return: Applied versions
+    :rtype: set[int]
+
+    """
+    connection.execute(
+        text(
+            "CREATE TABLE IF NOT EXISTS schema_migrations ("
+            " version INT PRIMARY KEY,"
+            " name VARCHAR NOT NULL,"
+            " applied_on TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP)"
+        )
+    )
+    return {row[0] for row in connection.execute(text("SELECT version FROM schema_migrations"))}
+
+
+def migrate(engine, path=MIGRATIONS_DIR, target=None):
+    """
+    Applies every pending migration up to the target version, each one in its own transaction
+
+    On Postgres the migrations run under an advisory lock, so concurrent callers apply each version once.
+
+    :param engine: SQLAlchemy engine of the database to migrate
+    :type engine: Engine
+    :param path: Directory holding the migration files
+    :type path: str
+    :param target: Highest version to apply, every version when None
+    :type target: int
+    :raise:
+    :return: Migrations that were applied
+    :rtype: list[Migration]
+
+    """
+    with engine.connect() as connection:
+        # on Postgres, processes migrating at the same time (e.g. workers starting together) take turns, and the
+        # later ones find the versions applied by the first
+        locked = connection.dialect.name == "postgresql"
+        if locked:
+            connection.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+            connection.commit()
+        try:
+            with connection.begin():
+                done = applied_versions(connection)
+
+            applied = []
+            for migration in discover(path):
+                if migration.version in done or (target is not None and migration.version > target):
+                    continue
+                with connection.begin():
+                    connection.exec_driver_sql(migration.sql())
+                    connection.execute(
+                        text("INSERT INTO schema_migrations (version, name) VALUES (:version, :name)"),
+                        {"version": migration.version, "name": migration.name},
+                    )
+                applied.append(migration)
+            return applied
+        finally:
+            if locked:
+                connection.rollback()
+                connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
+                connection.commit()
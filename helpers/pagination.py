@@ -0,0 +1,80 @@
+import json
+
+from models import Task
+
+NEXT_PAGE_ACTION_ID = "view_next_page"
+
+
+def fetch_page(query, after=0, page_size=20):
+    """
+    Reads one page of a task listing with keyset pagination on the task ID
+
+    :param query: Task listing query, without ordering or limit
+    :type query: Query
+    :param after: Task ID of the last row of the previous page, 0 for the first page
+    :type after: int
+    :param page_size: Number of rows in a page
+    :type page_size: int
+    :raise:
+    :return: Rows of the page and the task ID the next page starts after, None on the last page
+    :rtype: tuple[list, int]
+
+    """
+    rows = (
+        query.filter(Task.task_id > after)
+        .order_by(Task.task_id)
+        .limit(page_size + 1)
+        .all()
+    )
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        return rows, rows[-1].task_id
+    return rows, None
+
+
+def next_page_block(view, after, **params):
+    """
+    Creates an actions block with a button that asks the interactive endpoint for the next page of a listing
+
+    :param view: Name of the listing, see ``parse_next_page``
+    :type view: str
+    :param after: Task ID the next page starts after
+    :type after: int
+    :param params: Extra parameters the listing needs to build the next page
+    :type params: Any
+    :raise:
+    :return: Actions block
+    :rtype: dict[str, Any]
+
+    """
+    return {
+        "type": "actions",
+        "elements": [
+            {
+                "type": "button",
+                "text": {"type": "plain_text", "text": "Next page"},
+                "action_id": NEXT_PAGE_ACTION_ID,
+                "value": json.dumps({"view": view, "after": after, **params}),
+            }
+        ],
+    }
+
+
+def parse_next_page(value):
+    """
+    Parses the value of a next page button
+
+    :param value: Button value
+    :type value: str
+    :raise ValueError: If the value is not a next page button value
+    :return: Name of the listing, the task ID the page starts after and the extra parameters
+    :rtype: tuple[str, int, dict[str, Any]]
+
+    """
+    try:
+        params = json.loads(value)
+        view = str(params.pop("view"))
+        after = int(params.pop("after"))
+    except (KeyError, TypeError, AttributeError) as e:
+        raise ValueError(f"Invalid next page value: {value}") from e
+    return view, after, params
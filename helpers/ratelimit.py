@@ -0,0 +1,360 @@
+import asyncio
+import functools
+import itertools
+import threading
+import time
+
+from slack_sdk.errors import SlackApiError
+
+from helpers.metrics import REGISTRY
+from helpers.singleflight import SingleFlight
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+
+# Slack's documented rate limit tiers, in calls per minute. Posting is limited per channel instead of per method.
+TIER_RATES = {
+    "tier1": 1,
+    "tier2": 20,
+    "tier3": 50,
+    "tier4": 100,
+    "post": 60,
+}
+
+# WebClient method -> tier, methods not listed are treated as tier 3
+METHOD_TIERS = {
+    "users_list": "tier2",
+    "users_info": "tier4",
+    "conversations_members": "tier4",
+    "conversations_info": "tier3",
+    "chat_postEphemeral": "post",
+    "chat_postMessage": "post",
+}
+
+# Read-only methods whose identical concurrent calls share one request
+COALESCED_METHODS = frozenset(
+    {"users_list", "users_info", "conversations_members", "conversations_info"}
+)
+
+# Share of a bucket that background calls leave for user-facing ones
+INTERACTIVE_RESERVE = 0.25
+
+
+class RateLimited(Exception):
+    """
+    This class is raised when a Slack call would have to wait longer for its rate limit than its caller allows.
+    """
+
+    def __init__(self, method, wait):
+        super().__init__(f"{method} is rate limited for another {wait:.1f} seconds")
+        self.method = method
+        self.wait = wait
+
+
+class TokenBucket:
+    """
+    This class is a token bucket refilled at a steady rate, which can also be paused for a server's Retry-After.
+    """
+
+    def __init__(self, rate, capacity, clock=time.monotonic):
+        """
+        Constructor to initialize a full bucket
+
+        :param rate: Tokens added per second
+        :type rate: float
+        :param capacity: Maximum number of tokens, the allowed burst
+        :type capacity: float
+        :param clock: Monotonic clock, overridable for tests
+        :type clock: Callable[[], float]
+        :raise:
+        :return: None
+        :rtype: None
+
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.tokens = capacity
+        self.paused_until = 0.0
+        self.waiting_interactive = 0
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def try_acquire(self, priority=INTERACTIVE):
+        """
+        Takes a token if one is available to the given priority
+
+        Background calls only take tokens above the interactive reserve, and none while user-facing calls wait.
+
+        :param priority: INTERACTIVE or BACKGROUND
+        :type priority: str
+        :raise:
+        :return: 0 if a token was taken, otherwise the number of seconds to wait before trying again
+        :rtype: float
+
+        """
+        with self._lock:
+            now = self.clock()
+            if now < self.paused_until:
+                return self.paused_until - now
+            self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            needed = 1.0
+            if priority == BACKGROUND:
+                if self.waiting_interactive:
+                    return 1.0 / self.rate
+                needed = min(self.capacity, needed + self.capacity * INTERACTIVE_RESERVE)
+            if self.tokens >= needed:
+                self.tokens -= 1.0
+                return 0.0
+            return (needed - self.tokens) / self.rate
+
+    def pause_until(self, until):
+        """
+        Hands out no tokens before the given time, then one for the retried call, and refills from there
+
+        :param until: Clock time the pause ends
+        :type until: float
+        :raise:
+        :return: None
+        :rtype: None
+
+        """
+        with self._lock:
+            self.paused_until = max(self.paused_until, until)
+            self.tokens = 1.0
+            self._updated = self.paused_until
+
+    def waiting(self, delta):
+        with self._lock:
+            self.waiting_interactive += delta
+
+
+def _retry_after(response):
+    headers = getattr(response, "headers", None) or {}
+    value = headers.get("Retry-After") or headers.get("retry-after")
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 1.0
+
+
+class RateLimitedClient:
+    """
+    This class schedules the calls of a Slack WebClient within the rate limit of each API tier.
+
+    Methods of the wrapped client are called on it as usual, e.g. ``client.users_info(user=...)``, at interactive
+    priority; ``client.background`` calls at background priority. A call waits for a token of its tier's bucket, a
+    429 pauses the bucket for the Retry-After the server sent and is retried, and identical concurrent read calls are
+    coalesced into one request.
+    """
+
+    def __init__(
+        self,
+        client,
+        rates=TIER_RATES,
+        scale=1.0,
+        max_wait=5.0,
+        background_max_wait=60.0,
+        max_retries=2,
+        clock=time.monotonic,
+        sleep=time.sleep,
+        registry=REGISTRY,
+    ):
+        """
+        Constructor to initialize the wrapped client, the limits and the metrics
+
+        :param client: Slack WebClient
+        :type client: WebClient
+        :param rates: Tier -> calls per minute
+        :type rates: dict[str, float]
+        :param scale: Share of the limits this process may use, e.g. 1 / number of worker processes
+        :type scale: float
+        :param max_wait: Longest an interactive call waits for its rate limit, in seconds
+        :type max_wait: float
+        :param background_max_wait: Longest a background call waits for its rate limit, in seconds
+        :type background_max_wait: float
+        :param max_retries: Retries of a call answered with 429
+        :type max_retries: int
+        :param clock: Monotonic clock, overridable for tests
+        :type clock: Callable[[], float]
+        :param sleep: Sleep function, overridable for tests
+        :type sleep: Callable[[float], None]
+        :param registry: Metrics registry the scheduler reports to
+        :type registry: Registry
+        :raise:
+        :return: None
+        :rtype: None
+
+        """
+        self.client = client
+        self.rates = rates
+        self.scale = scale
+        self.max_wait = max_wait
+        self.background_max_wait = background_max_wait
+        self.max_retries = max_retries
+        self.clock = clock
+        self.sleep = sleep
+        self.background = _PriorityView(self, BACKGROUND)
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._flight = SingleFlight("slack_calls", registry=registry)
+        self.throttled = registry.counter(
+            "slack_throttled_total",
+            "Slack calls held back by a rate limit, by method and reason (bucket, retry_after, rejected)",
+            ("method", "reason"),
+        )
+        self.wait_seconds = registry.histogram(
+            "slack_rate_limit_wait_seconds", "Time Slack calls waited for their rate limit", ("tier",)
+        )
+        self.rate_limited = registry.counter(
+            "slack_rate_limited_total", "Slack calls answered with HTTP 429, by method", ("method",)
+        )
+
+    def call(self, method, priority=INTERACTIVE, **kwargs):
+        """
+        Calls a method of the wrapped client within its rate limit
+
+        :param method: WebClient method name, e.g. "users_info"
+        :type method: str
+        :param priority: INTERACTIVE or BACKGROUND
+        :type priority: str
+        :param kwargs: Arguments of the method
+        :type kwargs: Any
+        :raise RateLimited: If the call would wait longer than its priority allows
+        :raise SlackApiError: If Slack fails the call, or still rate limits it after the retries
+        :return: Slack response
+        :rtype: SlackResponse
+
+        """
+        if method in COALESCED_METHODS:
+            try:
+                key = (method, frozenset(kwargs.items()))
+            except TypeError:
+                key = None
+            if key is not None:
+                return self._flight.do(key, self._call, method, priority, kwargs)
+        return self._call(method, priority, kwargs)
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return functools.partial(self.call, name)
+
+    async def acquire_async(self, method, priority=INTERACTIVE, channel=None):
+        """
+        Waits for a token of a method's rate limit without blocking the event loop, for calls made on an async client
+
+        :param method: WebClient method name, e.g. "chat_postMessage"
+        :type method: str
+        :param priority: INTERACTIVE or BACKGROUND
+        :type priority: str
+        :param channel: Channel of a posting method, which is limited per channel
+        :type channel: str
+        :raise RateLimited: If the call would wait longer than its priority allows
+        :return: None
+        :rtype: None
+
+        """
+        waits = self._waits(method, priority, channel)
+        try:
+            for wait in waits:
+                await asyncio.sleep(wait)
+        finally:
+            waits.close()
+
+    def rate_limited_response(self, method, response, attempt, channel=None):
+        """
+        Accounts for a call answered with 429: counts it and, while retries are left, pauses the method's bucket for
+        the Retry-After the server sent
+
+        :param method: WebClient method name
+        :type method: str
+        :param response: Slack response of the 429
+        :type response: SlackResponse
+        :param attempt: Number of retries the call already made
+        :type attempt: int
+        :param channel: Channel of a posting method
+        :type channel: str
+        :raise:
+        :return: True if the call should be retried
+        :rtype: bool
+
+        """
+        self.rate_limited.labels(method).inc()
+        if attempt >= self.max_retries:
+            return False
+        self._bucket_of(method, channel).pause_until(self.clock() + _retry_after(response))
+        self.throttled.labels(method, "retry_after").inc()
+        return True
+
+    def _call(self, method, priority, kwargs):
+        channel = kwargs.get("channel")
+        for attempt in itertools.count():
+            waits = self._waits(method, priority, channel)
+            try:
+                for wait in waits:
+                    self.sleep(wait)
+            finally:
+                waits.close()
+            try:
+                return getattr(self.client, method)(**kwargs)
+            except SlackApiError as e:
+                if getattr(e.response, "status_code", None) != 429:
+                    raise
+                if not self.rate_limited_response(method, e.response, attempt, channel):
+                    raise
+
+    def _waits(self, method, priority, channel):
+        # yields the waits before a token is taken, so that sync and async callers sleep their own way
+        tier = METHOD_TIERS.get(method, "tier3")
+        bucket = self._bucket_of(method, channel)
+        start = self.clock()
+        deadline = start + (self.max_wait if priority == INTERACTIVE else self.background_max_wait)
+        throttled = False
+        if priority == INTERACTIVE:
+            bucket.waiting(1)
+        try:
+            while True:
+                wait = bucket.try_acquire(priority)
+                if not wait:
+                    break
+                if not throttled:
+                    self.throttled.labels(method, "bucket").inc()
+                    throttled = True
+                if self.clock() + wait > deadline:
+                    self.throttled.labels(method, "rejected").inc()
+                    raise RateLimited(method, wait)
+                yield wait
+        finally:
+            if priority == INTERACTIVE:
+                bucket.waiting(-1)
+        self.wait_seconds.labels(tier).observe(self.clock() - start)
+
+    def _bucket_of(self, method, channel=None):
+        tier = METHOD_TIERS.get(method, "tier3")
+        return self._bucket(tier, channel if tier == "post" else None)
+
+    def _bucket(self, tier, channel=None):
+        key = (tier, channel)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            with self._lock:
+                bucket = self._buckets.get(key)
+                if bucket is None:
+                    per_minute = self.rates[tier] * self.scale
+                    bucket = TokenBucket(per_minute / 60.0, max(1.0, per_minute / 4), clock=self.clock)
+                    self._buckets[key] = bucket
+        return bucket
+
+
+class _PriorityView:
+    # the scheduler's methods, called at another priority
+    def __init__(self, scheduler, priority):
+        self._scheduler = scheduler
+        self._priority = priority
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return functools.partial(self._scheduler.call, name, self._priority)
@@ -0,0 +1,146 @@
+import threading
+import time
+
+from helpers.metrics import REGISTRY
+from helpers.singleflight import SingleFlight
+
+
+class ChannelRoster:
+    """
+    This class keeps an in-memory, TTL-bound roster of the members of each Slack channel.
+    """
+
+    page_size = 1000
+
+    def __init__(self, client, directory, ttl=300, clock=time.monotonic, flight=None, registry=REGISTRY):
+        """
+        Constructor to initialize the Slack client, user directory, cache lifetime and the empty cache
+
+        :param client: Slack WebClient used to page through channel members
+        :type client: WebClient
+        :param directory: Workspace user directory used to resolve member names
+        :type directory: UserDirectory
+        :param ttl: Number of seconds a cached roster stays valid
+        :type ttl: float
+        :param clock: Monotonic clock, overridable for tests
+        :type clock: Callable[[], float]
+        :param flight: Coalesces concurrent fetches of a channel, per process if not given
+        :type flight: SingleFlight | FileSingleFlight
+        :param registry: Metrics registry the cache hits and misses are counted in
+        :type registry: Registry
+        :raise:
+        :return: None
+        :rtype: None
+
+        """
+        self.client = client
+        self.directory = directory
+        self.ttl = ttl
+        self.clock = clock
+        self.flight = flight or SingleFlight("roster")
+        self._lock = threading.Lock()
+        # channel id -> (expiry, [member slack ids])
+        self._channels = {}
+        lookups = registry.counter("cache_requests_total", "Cache lookups by cache and result (hit, miss)", ("cache", "result"))
+        self._hits = lookups.labels("roster", "hit")
+        self._misses = lookups.labels("roster", "miss")
+
+    def get(self, channel_id):
+        """
+        Returns the human members of a channel, serving from cache while it is fresh
+
+        :param channel_id: Slack channel ID
+        :type channel_id: str
+        :raise:
+        :return: List of users with their name and Slack user ID
+        :rtype: list[dict[str, str]]
+
+        """
+        now = self.clock()
+        with self._lock:
+            entry = self._channels.get(channel_id)
+        if entry is None or entry[0] <= now:
+            self._misses.inc()
+            # callers missing the same channel at the same time share one fetch
+            members = self.flight.do(channel_id, self._fetch_members, channel_id)
+            with self._lock:
+                self._channels[channel_id] = (now + self.ttl, members)
+        else:
+            self._hits.inc()
+            members = entry[1]
+        return self._resolve(members)
+
+    def invalidate(self, channel_id=None):
+        """
+        Drops one cached channel, or every cached channel when no channel is given
+
+        :param channel_id: Slack channel ID
+        :type channel_id: str
+        :raise:
+        :return: None
+        :rtype: None
+
+        """
+        with self._lock:
+            if channel_id is None:
+                self._channels.clear()
+            else:
+                self._channels.pop(channel_id, None)
+
+    def handle_member_joined(self, event):
+        """
+        Applies a ``member_joined_channel`` event to the cached channel roster
+
+        :param event: Slack event body
+        :type event: dict[str, Any]
+        :raise:
+        :return: None
+        :rtype: None
+
+        """
+        channel_id = event.get("channel")
+        user_id = event.get("user")
+        with self._lock:
+            entry = self._channels.get(channel_id)
+            if entry is not None and user_id not in entry[1]:
+                self._channels[channel_id] = (entry[0], entry[1] + [user_id])
+
+    def handle_member_left(self, event):
+        """
+        Applies a ``member_left_channel`` event to the cached channel roster
+
+        :param event: Slack event body
+        :type event: dict[str, Any]
+        :raise:
+        :return: None
+        :rtype: None
+
+        """
+        channel_id = event.get("channel")
+        user_id = event.get("user")
+        with self._lock:
+            entry = self._channels.get(channel_id)
+            if entry is not None and user_id in entry[1]:
+                members = [member for member in entry[1] if member != user_id]
+                self._channels[channel_id] = (entry[0], members)
+
+    def _resolve(self, members):
+        self.directory.load_missing(members)
+        users = []
+        for member in members:
+            record = self.directory.get(member)
+            if record is not None and record.assignable:
+                users.append({"name": record.real_name, "user_id": member})
+        return users
+
+    def _fetch_members(self, channel_id):
+        members = []
+        cursor = None
+        while True:
+            result = self.client.conversations_members(
+                channel=channel_id, limit=self.page_size, cursor=cursor
+            )
+            members.extend(result["members"])
+            cursor = (result.get("response_metadata") or {}).get("next_cursor")
+            if not cursor:
+                return members
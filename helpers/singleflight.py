@@ -0,0 +1,171 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from helpers.metrics import REGISTRY
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    This class lets concurrent callers of the same key share one execution of a function.
+    """
+
+    def __init__(self, name, registry=REGISTRY):
+        """
+        Constructor to initialize the in-flight calls and metrics
+
+        :param name: Group name, used in metric labels
+        :type name: str
+        :param registry: Metrics registry the group reports to
+        :type registry: Registry
+        :raise:
+        :return: None
+        :rtype: None
+
+        """
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.shared = registry.counter(
+            "singleflight_shared_total", "Calls answered by another caller's execution", ("group",)
+        ).labels(name)
+
+    def do(self, key, fn, *args, **kwargs):
+        """
+        Runs fn, unless a call of the same key is already running, in which case its outcome is shared
+
+        :param key: Hashable key of identical calls
+        :type key: Hashable
+        :param fn: Callable to run
+        :type fn: Callable
+        :raise Exception: Whatever the shared execution raised
+        :return: Result of the shared execution
+        :rtype: Any
+
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            self.shared.inc()
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+class FileSingleFlight:
+    """
+    This class extends SingleFlight across the worker processes of a host with a lock file per key.
+
+    The first process to take a key's lock runs the function and writes its result next to the lock; processes that
+    were waiting for the lock meanwhile read that result instead of running the function again. Results must be
+    JSON serializable.
+    """
+
+    def __init__(self, name, directory, registry=REGISTRY, clock=time.time):
+        """
+        Constructor to initialize the lock directory and the in-process group
+
+        :param name: Group name, used in metric labels and file names
+        :type name: str
+        :param directory: Directory of the lock and result files, shared by the worker processes
+        :type directory: str
+        :param registry: Metrics registry the group reports to
+        :type registry: Registry
+        :param clock: Wall clock, shared by the processes
+        :type clock: Callable[[], float]
+        :raise RuntimeError: If the platform has no fcntl file locks
+        :return: None
+        :rtype: None
+
+        """
+        if fcntl is None:
+            raise RuntimeError("File single-flight needs fcntl file locks")
+        self.name = name
+        self.directory = directory
+        self.clock = clock
+        os.makedirs(directory, exist_ok=True)
+        self._local = SingleFlight(name, registry=registry)
+        self.shared = registry.counter(
+            "singleflight_shared_across_processes_total",
+            "Calls answered by another process's execution",
+            ("group",),
+        ).labels(name)
+
+    def do(self, key, fn, *args, **kwargs):
+        """
+        Runs fn, unless a call of the same key is running in this or another worker process
+
+        :param key: Key of identical calls, its string form names the files
+        :type key: Hashable
+        :param fn: Callable to run
+        :type fn: Callable
+        :raise Exception: Whatever the execution in this process raised
+        :return: Result of the shared execution
+        :rtype: Any
+
+        """
+        return self._local.do(key, self._do_locked, key, fn, args, kwargs)
+
+    def _do_locked(self, key, fn, args, kwargs):
+        digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+        base = os.path.join(self.directory, f"{self.name}-{digest}")
+        started = self.clock()
+        with open(base + ".lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                shared = self._read(base + ".json", started)
+                if shared is not None:
+                    self.shared.inc()
+                    return shared["result"]
+                result = fn(*args, **kwargs)
+                self._write(base + ".json", result)
+                return result
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _read(self, path, started):
+        # only a result finished while this caller waited for the lock is shared, an older one may be stale
+        try:
+            with open(path) as f:
+                shared = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return shared if shared.get("at", 0) >= started else None
+
+    def _write(self, path, result):
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"at": self.clock(), "result": result}, f)
+        os.replace(tmp, path)
@@ -0,0 +1,225 @@
+import asyncio
+import concurrent.futures
+import logging
+import itertools
+import ssl
+import threading
+
+import aiohttp
+from slack_sdk.http_retry.builtin_async_handlers import (
+    AsyncConnectionErrorRetryHandler,
+    AsyncRateLimitErrorRetryHandler,
+)
+from slack_sdk.errors import SlackApiError
+from slack_sdk.web.async_client import AsyncWebClient
+
+from helpers.metrics import REGISTRY
+from helpers.ratelimit import COALESCED_METHODS, INTERACTIVE
+
+logger = logging.getLogger(__name__)
+
+
+def async_retry_handlers(max_retries, rate_limited=True):
+    """
+    Builds the retry handlers of the async client, the same policy as helpers.slacktransport.retry_handlers
+
+    :param max_retries: Maximum number of retries of a call
+    :type max_retries: int
+    :param rate_limited: Also retry 429s, off when the AsyncSlack scheduler handles them
+    :type rate_limited: bool
+    :raise:
+    :return: Retry handlers
+    :rtype: list[AsyncRetryHandler]
+
+    """
+    handlers = [AsyncConnectionErrorRetryHandler(max_retry_count=max_retries)]
+    if rate_limited:
+        handlers.append(AsyncRateLimitErrorRetryHandler(max_retry_count=max_retries))
+    return handlers
+
+
+class AsyncSlack:
+    """
+    This class fans Slack API calls out concurrently on an AsyncWebClient, from synchronous code.
+
+    The client lives on one event loop thread per worker process with one aiohttp session, so its connections are
+    kept alive across requests, and a semaphore bounds the calls in flight. With a scheduler, every call takes a
+    token of the same rate limit buckets as the synchronous client, 429s pause those buckets, and identical
+    concurrent read calls share one request.
+    """
+
+    def __init__(self, token, concurrency=8, timeout=5.0, ssl_context=None, scheduler=None, registry=REGISTRY,
+                 **client_kwargs):
+        """
+        Constructor to initialize the client settings, the loop thread starts on first use
+
+        :param token: Bot token
+        :type token: str
+        :param concurrency: Maximum number of calls in flight
+        :type concurrency: int
+        :param timeout: Timeout of a call, in seconds
+        :type timeout: float
+        :param ssl_context: TLS settings of the connections, the system defaults if not given
+        :type ssl_context: ssl.SSLContext
+        :param scheduler: Rate limit scheduler shared with the synchronous client, calls are not paced if not given
+        :type scheduler: RateLimitedClient
+        :param registry: Metrics registry of the coalesced calls
+        :type registry: Registry
+        :param client_kwargs: Other AsyncWebClient arguments, e.g. base_url or retry_handlers
+        :type client_kwargs: Any
+        :raise:
+        :return: None
+        :rtype: None
+
+        """
+        self.token = token
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.ssl_context = ssl_context or ssl.create_default_context()
+        self.client_kwargs = client_kwargs
+        self.scheduler = scheduler
+        self.shared = registry.counter(
+            "singleflight_shared_total", "Calls answered by another caller's execution", ("group",)
+        ).labels("slack_async")
+        self.client = None
+        # coalesced calls in flight on the loop, only touched from the loop thread
+        self._in_flight = {}
+        self._loop = None
+        self._semaphore = None
+        self._start_lock = threading.Lock()
+
+    def call_many(self, method, calls, priority=INTERACTIVE):
+        """
+        Runs one API method for many argument sets concurrently and waits for all of them
+
+        :param method: AsyncWebClient method name, e.g. "chat_postEphemeral"
+        :type method: str
+        :param calls: Keyword arguments of each call
+        :type calls: list[dict[str, Any]]
+        :param priority: INTERACTIVE or BACKGROUND, the rate limit priority of the calls
+        :type priority: str
+        :raise:
+        :return: Response data of each call in order, or the exception the call raised
+        :rtype: list[dict[str, Any] | Exception]
+
+        """
+        if not calls:
+            return []
+        self._start()
+        future = asyncio.run_coroutine_threadsafe(self._gather(method, calls, priority), self._loop)
+        return future.result()
+
+    def users_info_many(self, user_ids):
+        """
+        Looks up the profiles of many users concurrently
+
+        :param user_ids: Slack user IDs
+        :type user_ids: list[str]
+        :raise:
+        :return: Slack user objects of the users found, and the IDs Slack does not know; other failed lookups
+            (rate limits, timeouts) are logged and in neither
+        :rtype: tuple[list[dict[str, Any]], set[str]]
+
+        """
+        users = []
+        not_found = set()
+        for user_id, result in zip(user_ids, self.call_many("users_info", [{"user": u} for u in user_ids])):
+            if isinstance(result, SlackApiError) and result.response.get("error") == "user_not_found":
+                not_found.add(user_id)
+            elif isinstance(result, Exception):
+                logger.warning("users.info failed for %s: %s", user_id, result)
+            else:
+                users.append(result["user"])
+        return users, not_found
+
+    def ping(self, timeout=1.0):
+        """
+        Checks that the loop thread still runs callbacks, i.e. that nothing blocks it
+
+        :param timeout: Number of seconds to wait for the loop
+        :type timeout: float
+        :raise:
+        :return: True if the loop answered in time or has not been started, False otherwise
+        :rtype: bool
+
+        """
+        loop = self._loop
+        if loop is None:
+            return True
+        future = asyncio.run_coroutine_threadsafe(asyncio.sleep(0), loop)
+        try:
+            future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            return False
+        return True
+
+    def close(self):
+        """
+        Closes the session and stops the loop thread
+
+        :param:
+        :type:
+        :raise:
+        :return: None
+        :rtype: None
+
+        """
+        with self._start_lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self.client.session.close(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+
+    async def _gather(self, method, calls, priority):
+        return await asyncio.gather(
+            *(self._coalesced(method, kwargs, priority) for kwargs in calls), return_exceptions=True
+        )
+
+    async def _coalesced(self, method, kwargs, priority):
+        if method not in COALESCED_METHODS:
+            return await self._call(method, kwargs, priority)
+        key = (method, frozenset(kwargs.items()))
+        task = self._in_flight.get(key)
+        if task is None:
+            task = self._in_flight[key] = asyncio.ensure_future(self._call(method, kwargs, priority))
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        else:
+            self.shared.inc()
+        # a cancelled caller must not cancel the call the others wait for
+        return await asyncio.shield(task)
+
+    async def _call(self, method, kwargs, priority):
+        channel = kwargs.get("channel")
+        for attempt in itertools.count():
+            if self.scheduler is not None:
+                await self.scheduler.acquire_async(method, priority, channel)
+            async with self._semaphore:
+                try:
+                    response = await getattr(self.client, method)(**kwargs)
+                    return response.data
+                except SlackApiError as e:
+                    if self.scheduler is None or getattr(e.response, "status_code", None) != 429:
+                        raise
+                    if not self.scheduler.rate_limited_response(method, e.response, attempt, channel):
+                        raise
+
+    def _start(self):
+        with self._start_lock:
+            if self._loop is not None:
+                return
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="slack-async", daemon=True).start()
+            asyncio.run_coroutine_threadsafe(self._setup(), loop).result()
+            self._loop = loop
+
+    async def _setup(self):
+        # the session and semaphore belong to the loop they are created on
+        session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.concurrency, ssl=self.ssl_context)
+        )
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self.client = AsyncWebClient(
+            token=self.token, session=session, timeout=self.timeout, **self.client_kwargs
+        )
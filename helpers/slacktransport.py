@@ -0,0 +1,237 @@
+import http.client
+import io
+import ssl
+import threading
+from urllib.error import HTTPError
+from urllib.parse import urlsplit
+
+from slack_sdk import WebClient
+from slack_sdk.http_retry.builtin_handlers import ConnectionErrorRetryHandler, RateLimitErrorRetryHandler
+from slack_sdk.webhook import WebhookClient, WebhookResponse
+
+from helpers.metrics import REGISTRY
+
+connections_opened = REGISTRY.counter(
+    "slack_http_connections_opened_total", "Connections opened to Slack", ("host",)
+)
+requests_sent = REGISTRY.counter(
+    "slack_http_requests_total", "Requests sent to Slack, by whether a kept-alive connection was reused", ("host", "reused")
+)
+
+# Errors of a kept-alive connection that the server closed while it sat idle
+_STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+
+
+class ConnectionPool:
+    """
+    This class keeps idle HTTP/1.1 connections per host open between requests, so that consecutive Slack calls of a
+    worker reuse one TLS session instead of each opening its own.
+    """
+
+    def __init__(self, timeout=5.0, maxsize=10, ssl_context=None):
+        """
+        Constructor to initialize the pool
+
+        :param timeout: Connect and read timeout of a request, in seconds
+        :type timeout: float
+        :param maxsize: Maximum number of idle connections kept per host
+        :type maxsize: int
+        :param ssl_context: TLS settings of https connections, the system defaults if not given
+        :type ssl_context: ssl.SSLContext
+        :raise:
+        :return: None
+        :rtype: None
+
+        """
+        self.timeout = timeout
+        self.maxsize = maxsize
+        self.ssl_context = ssl_context or ssl.create_default_context()
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def request(self, method, url, body=None, headers=None):
+        """
+        Sends a request on an idle connection to the URL's host, or on a new one if there is none
+
+        A request that fails because the server had closed the reused connection is sent once more on a new one.
+
+        :param method: HTTP method
+        :type method: str
+        :param url: Absolute http or https URL
+        :type url: str
+        :param body: Request body
+        :type body: bytes
+        :param headers: Request headers
+        :type headers: dict[str, str]
+        :raise OSError: If the request fails on a new connection
+        :raise http.client.HTTPException: If the server sends an invalid response
+        :return: Status, response headers and body
+        :rtype: tuple[int, http.client.HTTPMessage, bytes]
+
+        """
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.hostname, parts.port)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+
+        connection, reused = self._checkout(key)
+        try:
+            try:
+                response = self._send(connection, method, path, body, headers)
+            except _STALE_CONNECTION_ERRORS:
+                if not reused:
+                    raise
+                connection.close()
+                connection, reused = self._connect(key), False
+                response = self._send(connection, method, path, body, headers)
+            requests_sent.labels(parts.hostname, str(reused).lower()).inc()
+            data = response.read()
+        except BaseException:
+            connection.close()
+            raise
+        if response.will_close:
+            connection.close()
+        else:
+            self._checkin(key, connection)
+        return response.status, response.msg, data
+
+    def close(self):
+        """
+        Closes every idle connection
+
+        :param:
+        :type:
+        :raise:
+        :return: None
+        :rtype: None
+
+        """
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for connection in connections:
+                connection.close()
+
+    def _send(self, connection, method, path, body, headers):
+        connection.request(method, path, body=body, headers=headers or {})
+        return connection.getresponse()
+
+    def _checkout(self, key):
+        with self._lock:
+            connections = self._idle.get(key)
+            if connections:
+                return connections.pop(), True
+        return self._connect(key), False
+
+    def _checkin(self, key, connection):
+        with self._lock:
+            connections = self._idle.setdefault(key, [])
+            if len(connections) < self.maxsize:
+                connections.append(connection)
+                return
+        connection.close()
+
+    def _connect(self, key):
+        scheme, host, port = key
+        connections_opened.labels(host).inc()
+        if scheme == "https":
+            return http.client.HTTPSConnection(host, port, timeout=self.timeout, context=self.ssl_context)
+        return http.client.HTTPConnection(host, port, timeout=self.timeout)
+
+
+def _urllib_response(pool, url, req):
+    # urlopen's contract, which the slack_sdk clients are written against: a non-2xx status raises HTTPError
+    status, headers, body = pool.request(req.get_method(), url, req.data, dict(req.header_items()))
+    if not 200 <= status < 300:
+        raise HTTPError(url, status, http.client.responses.get(status, ""), headers, io.BytesIO(body))
+    return status, headers, body
+
+
+def retry_handlers(max_retries, rate_limited=True):
+    """
+    Builds the retry handlers of the Slack clients
+
+    Only connection errors and rate limited (429) calls are retried, they never reached Slack's handlers. Server
+    errors are not, as a retried chat.postEphemeral could post twice.
+
+    :param max_retries: Maximum number of retries of a call
+    :type max_retries: int
+    :param rate_limited: Also retry 429s, off when a helpers.ratelimit.RateLimitedClient handles them
+    :type rate_limited: bool
+    :raise:
+    :return: Retry handlers
+    :rtype: list[RetryHandler]
+
+    """
+    handlers = [ConnectionErrorRetryHandler(max_retry_count=max_retries)]
+    if rate_limited:
+        handlers.append(RateLimitErrorRetryHandler(max_retry_count=max_retries))
+    return handlers
+
+
+class PooledWebClient(WebClient):
+    """
+    This class is a Slack WebClient that sends its API calls through a shared connection pool.
+    """
+
+    def __init__(self, token=None, pool=None, **kwargs):
+        """
+        Constructor to initialize the client
+
+        :param token: Bot token
+        :type token: str
+        :param pool: Connection pool, a new one with the client's timeout if not given
+        :type pool: ConnectionPool
+        :param kwargs: Other slack_sdk.WebClient arguments
+        :type kwargs: Any
+        :raise:
+        :return: None
+        :rtype: None
+
+        """
+        super().__init__(token=token, **kwargs)
+        self.pool = pool or ConnectionPool(timeout=self.timeout, ssl_context=self.ssl)
+
+    def _perform_urllib_http_request_internal(self, url, req):
+        if self.proxy:
+            return super()._perform_urllib_http_request_internal(url, req)
+        status, headers, body = _urllib_response(self.pool, url, req)
+        if headers.get_content_type() != "application/gzip":
+            body = body.decode(headers.get_content_charset() or "utf-8")
+        return {"status": status, "headers": headers, "body": body}
+
+
+class PooledWebhookClient(WebhookClient):
+    """
+    This class is a Slack WebhookClient, used for response_url replies, that sends through a shared connection pool.
+    """
+
+    def __init__(self, url, pool=None, **kwargs):
+        """
+        Constructor to initialize the client
+
+        :param url: Webhook or response_url
+        :type url: str
+        :param pool: Connection pool, a new one with the client's timeout if not given
+        :type pool: ConnectionPool
+        :param kwargs: Other slack_sdk.webhook.WebhookClient arguments
+        :type kwargs: Any
+        :raise:
+        :return: None
+        :rtype: None
+
+        """
+        super().__init__(url, **kwargs)
+        self.pool = pool or ConnectionPool(timeout=self.timeout, ssl_context=self.ssl)
+
+    def _perform_http_request_internal(self, url, req):
+        if self.proxy:
+            return super()._perform_http_request_internal(url, req)
+        status, headers, body = _urllib_response(self.pool, url, req)
+        return WebhookResponse(
+            url=url,
+            status_code=status,
+            body=body.decode(headers.get_content_charset() or "utf-8"),
+            headers=headers,
+        )
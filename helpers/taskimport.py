@@ -0,0 +1,333 @@
+import csv
+import datetime
+import itertools
+import json
+import logging
+import re
+import time
+
+from sqlalchemy import insert
+
+from models import Assignment, Task, db, upsert_users
+
+FORMATS = ("csv", "jsonl")
+COLUMNS = ("description", "points", "deadline", "assignee")
+
+_SLACK_USER_ID = re.compile(r"^[UW][A-Z0-9]+$")
+
+logger = logging.getLogger(__name__)
+
+
+def is_slack_user_id(value):
+    """
+    Tells whether a value looks like a Slack user ID
+
+    :param value: Value to check
+    :type value: str
+    :raise:
+    :return: True for IDs such as U0123ABCD or W0123ABCD
+    :rtype: bool
+
+    """
+    return bool(value) and _SLACK_USER_ID.match(value) is not None
+
+
+def detect_format(filename):
+    """
+    Guesses the import format from a file name
+
+    :param filename: File name
+    :type filename: str
+    :raise ValueError: If the extension is not .csv, .jsonl or .ndjson
+    :return: Import format, one of FORMATS
+    :rtype: str
+
+    """
+    extension = filename.rsplit(".", 1)[-1].lower()
+    if extension == "csv":
+        return "csv"
+    if extension in ("jsonl", "ndjson"):
+        return "jsonl"
+    raise ValueError(f"Cannot tell the format of {filename}, give csv or jsonl")
+
+
+def read_rows(stream, fmt):
+    """
+    Reads the rows of an import file one at a time
+
+    :param stream: Text stream of the file, for CSV opened with newline=""
+    :type stream: TextIO
+    :param fmt: Import format, one of FORMATS
+    :type fmt: str
+    :raise ValueError: If the format is unknown
+    :raise csv.Error: If the CSV file cannot be parsed past a line, e.g. a NUL byte or a field over the size limit
+    :raise UnicodeDecodeError: If the file is not valid in the encoding of the stream
+    :return: Line number and row, or the error message of a line that could not be read
+    :rtype: Iterator[tuple[int, dict[str, Any] | str]]
+
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(_without_nul(stream))
+        for row in reader:
+            # line_num is the last line of the record, which differs from the first when a field spans lines
+            yield reader.line_num, row
+    elif fmt == "jsonl":
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield line_number, f"invalid JSON: {e}"
+                continue
+            yield line_number, row if isinstance(row, dict) else "expected a JSON object"
+    else:
+        raise ValueError(f"Unknown import format {fmt!r}, give one of {', '.join(FORMATS)}")
+
+
+def _without_nul(lines):
+    # csv only rejects NUL bytes before Python 3.11, and the database never accepts them in text
+    for line in lines:
+        if "\0" in line:
+            raise csv.Error("line contains NUL")
+        yield line
+
+
+def parse_row(row):
+    """
+    Validates an import row
+
+    :param row: Row with the COLUMNS, as read from the file
+    :type row: dict[str, Any]
+    :raise ValueError: If a value is missing or invalid
+    :return: Description, points, deadline and assignee Slack user ID (None if unassigned)
+    :rtype: tuple[str, int, datetime.date, str | None]
+
+    """
+    description = str(row.get("description") or "").strip()
+    if not description:
+        raise ValueError("description is required")
+    try:
+        points = int(str(row.get("points")).strip())
+    except ValueError:
+        raise ValueError(f"points must be a whole number, got {row.get('points')!r}")
+    if points < 1:
+        raise ValueError(f"points must be positive, got {points}")
+    try:
+        deadline = datetime.date.fromisoformat(str(row.get("deadline")).strip())
+    except ValueError:
+        raise ValueError(f"deadline must be a YYYY-MM-DD date, got {row.get('deadline')!r}")
+    assignee = str(row.get("assignee") or "").strip() or None
+    if assignee is not None and not is_slack_user_id(assignee):
+        raise ValueError(f"assignee must be a Slack user ID, got {assignee!r}")
+    return description, points, deadline, assignee
+
+
+class ImportReport:
+    """
+    This class holds the outcome of an import: the rows imported, the errors of the rows skipped and, when the import
+    stopped early, why and after which line.
+    """
+
+    def __init__(self, max_errors=1000):
+        """
+        Constructor to initialize the counts and the empty error list
+
+        :param max_errors: Number of errors kept, the others are only counted, None to keep them all
+        :type max_errors: int | None
+        :raise:
+        :return: None
+        :rtype: None
+
+        """
+        self.imported = 0
+        self.failed = 0
+        self.max_errors = max_errors
+        self.errors = []
+        # line of the last row read, and why the import stopped before the end of the file
+        self.last_line = 0
+        self.aborted = None
+        # whether the import stopped because a chunk failed to insert, or the rows could not be read further, and if
+        # so whether the file itself is at fault (not CSV or not UTF-8), rather than for lack of time
+        self.chunk_failed = False
+        self.read_failed = False
+        self.unreadable = False
+
+    def error(self, line, message):
+        """
+        Records a skipped row
+
+        :param line: Line number of the row in the file
+        :type line: int
+        :param message: Reason the row was skipped
+        :type message: str
+        :raise:
+        :return: None
+        :rtype: None
+
+        """
+        self.failed += 1
+        if self.max_errors is None or len(self.errors) < self.max_errors:
+            self.errors.append({"line": line, "error": message})
+
+    def to_dict(self):
+        """
+        Returns the report as a JSON serializable dict
+
+        :param:
+        :type:
+        :raise:
+        :return: Counts, the kept errors and why the import stopped early, if it did
+        :rtype: dict[str, Any]
+
+        """
+        return {
+            "imported": self.imported,
+            "failed": self.failed,
+            "errors": self.errors,
+            "last_line": self.last_line,
+            "aborted": self.aborted,
+        }
+
+
+class TaskImporter:
+    """
+    This class imports tasks and their assignments from rows of an import file.
+
+    Rows are validated as they are read and inserted a chunk at a time, each chunk in its own transaction: one
+    statement upserts the chunk's users, one executemany inserts its tasks returning their IDs in row order, one inserts
+    their assignments. Only one chunk is held in memory. A failed chunk, or a file that cannot be read further, stops
+    the import: the chunks before it stay committed and the report says which rows were not imported.
+    """
+
+    def __init__(self, created_by, chunk_size=1000, directory=None, max_errors=1000, max_seconds=None,
+                 clock=time.monotonic):
+        """
+        Constructor to initialize the import settings
+
+        :param created_by: Slack user ID recorded as the creator of the imported tasks
+        :type created_by: str
+        :param chunk_size: Number of rows inserted per transaction
+        :type chunk_size: int
+        :param directory: Workspace directory, when given assignees must be assignable users of the workspace
+        :type directory: UserDirectory
+        :param max_errors: Number of row errors kept in the report, None to keep them all
+        :type max_errors: int | None
+        :param max_seconds: Stop reading new chunks after this many seconds, e.g. within a request timeout, None to
+            import the whole file
+        :type max_seconds: float | None
+        :param clock: Monotonic clock, overridable for tests
+        :type clock: Callable[[], float]
+        :raise:
+        :return: None
+        :rtype: None
+
+        """
+        self.created_by = created_by
+        self.chunk_size = chunk_size
+        self.directory = directory
+        self.max_errors = max_errors
+        self.max_seconds = max_seconds
+        self.clock = clock
+
+    def run(self, rows, report=None):
+        """
+        Imports rows, skipping and reporting the invalid ones
+
+        :param rows: Line numbers and rows, as yielded by read_rows
+        :type rows: Iterable[tuple[int, dict[str, Any] | str]]
+        :param report: Report to add to, a new one if not given
+        :type report: ImportReport
+        :raise:
+        :return: Import report, with aborted set if a chunk failed, the rows could not be read or the time ran out
+        :rtype: ImportReport
+
+        """
+        report = report or ImportReport(self.max_errors)
+        deadline = self.clock() + self.max_seconds if self.max_seconds is not None else None
+        valid = self._validate(rows, report)
+        while True:
+            if deadline is not None and self.clock() >= deadline:
+                report.aborted = f"time limit of {self.max_seconds:g} s reached, rows after line {report.last_line} were not read"
+                return report
+            chunk = []
+            read_error = None
+            try:
+                chunk.extend(itertools.islice(valid, self.chunk_size))
+            except Exception as e:
+                # the rows read before the error are still imported, the file is not read any further
+                read_error = e
+            if chunk:
+                try:
+                    self._insert([task for _, task in chunk])
+                except Exception as e:
+                    logger.exception("Import chunk of lines %d-%d failed", chunk[0][0], chunk[-1][0])
+                    for line, _ in chunk:
+                        report.error(line, f"not imported, its chunk failed with {type(e).__name__}")
+                    report.aborted = f"{type(e).__name__} while inserting lines {chunk[0][0]}-{chunk[-1][0]}"
+                    report.chunk_failed = True
+                    return report
+                report.imported += len(chunk)
+            if read_error is not None:
+                logger.warning("Import stopped reading after line %d", report.last_line, exc_info=read_error)
+                report.aborted = (
+                    f"{type(read_error).__name__} reading the rows after line {report.last_line}: {read_error}, "
+                    "they were not imported"
+                )
+                report.read_failed = True
+                report.unreadable = isinstance(read_error, (csv.Error, UnicodeError))
+                return report
+            if not chunk:
+                return report
+
+    def _validate(self, rows, report):
+        for line, row in rows:
+            task = self._check(line, row, report)
+            # only a row that was reported or passed on counts as read, one whose check raised is not
+            report.last_line = line
+            if task is not None:
+                yield line, task
+
+    def _check(self, line, row, report):
+        if isinstance(row, str):
+            report.error(line, row)
+            return None
+        try:
+            task = parse_row(row)
+        except ValueError as e:
+            report.error(line, str(e))
+            return None
+        assignee = task[3]
+        if assignee is not None and self.directory is not None:
+            user = self.directory.get(assignee)
+            if user is None or not user.assignable:
+                report.error(line, f"assignee {assignee} is not an assignable user of the workspace")
+                return None
+        return task
+
+    def _insert(self, chunk):
+        try:
+            user_ids = upsert_users([self.created_by] + [assignee for *_, assignee in chunk if assignee])
+            task_ids = db.session.execute(
+                insert(Task).returning(Task.task_id, sort_by_parameter_order=True),
+                [
+                    {
+                        "description": description,
+                        "points": points,
+                        "deadline": deadline,
+                        "created_by": user_ids[self.created_by],
+                    }
+                    for description, points, deadline, _ in chunk
+                ],
+            ).scalars().all()
+            db.session.execute(
+                insert(Assignment),
+                [
+                    {"assignment_id": task_id, "user_id": user_ids.get(assignee), "progress": 0.0}
+                    for task_id, (*_, assignee) in zip(task_ids, chunk)
+                ],
+            )
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
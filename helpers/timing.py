@@ -0,0 +1,316 @@
+import contextvars
+import functools
+import logging
+import time
+from contextlib import contextmanager
+
+from flask import request
+from sqlalchemy import event
+
+from helpers.metrics import REGISTRY
+
+TIMING_LOGGER = "slackpoint.timing"
+
+# phases of a request, in the order of the Server-Timing header
+DB = "db"
+SLACK = "slack"
+RENDER = "render"
+PHASES = (DB, SLACK, RENDER)
+
+# distinct slash commands given their own label, later ones are counted as "other"
+MAX_COMMAND_LABELS = 50
+
+_current = contextvars.ContextVar("request_timing", default=None)
+
+
+class RequestTiming:
+    """
+    This class adds up the time a request spends in each phase, and how many times it entered it.
+    """
+
+    __slots__ = ("started", "durations", "counts")
+
+    def __init__(self, clock=time.perf_counter):
+        self.started = clock()
+        self.durations = dict.fromkeys(PHASES, 0.0)
+        self.counts = dict.fromkeys(PHASES, 0)
+
+    def add(self, phase, seconds):
+        self.durations[phase] = self.durations.get(phase, 0.0) + seconds
+        self.counts[phase] = self.counts.get(phase, 0) + 1
+
+    def server_timing(self, total):
+        """
+        Formats the phases as a Server-Timing header value, in milliseconds
+
+        :param total: Duration of the whole request, in seconds
+        :type total: float
+        :raise:
+        :return: Header value, e.g. db;dur=3.1;desc="2 calls", total;dur=5.0
+        :rtype: str
+
+        """
+        entries = [
+            f'{phase};dur={seconds * 1000:.1f};desc="{self.counts[phase]} call{"s" if self.counts[phase] != 1 else ""}"'
+            for phase, seconds in self.durations.items()
+            if self.counts[phase]
+        ]
+        entries.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(entries)
+
+
+def start_request(clock=time.perf_counter):
+    """
+    Starts timing the request of the current thread or task
+
+    :param clock: Monotonic clock
+    :type clock: Callable[[], float]
+    :raise:
+    :return: Timing of the request
+    :rtype: RequestTiming
+
+    """
+    timing = RequestTiming(clock)
+    _current.set(timing)
+    return timing
+
+
+def finish_request():
+    """
+    Stops timing the request of the current thread or task
+
+    :param:
+    :type:
+    :raise:
+    :return: Timing of the request, None if none was started
+    :rtype: RequestTiming
+
+    """
+    timing = _current.get()
+    _current.set(None)
+    return timing
+
+
+def record(phase, seconds):
+    """
+    Adds time spent in a phase to the current request, if one is being timed
+
+    :param phase: Phase, one of PHASES
+    :type phase: str
+    :param seconds: Time spent
+    :type seconds: float
+    :raise:
+    :return: None
+    :rtype: None
+
+    """
+    timing = _current.get()
+    if timing is not None:
+        timing.add(phase, seconds)
+
+
+@contextmanager
+def phase(name):
+    """
+    Times the enclosed block as a phase of the current request
+
+    :param name: Phase, one of PHASES
+    :type name: str
+    :raise:
+    :return: None
+    :rtype: Iterator[None]
+
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+
+def timed(name):
+    """
+    Decorates a function so that its calls are timed as a phase of the current request
+
+    :param name: Phase, one of PHASES
+    :type name: str
+    :raise:
+    :return: Decorator
+    :rtype: Callable[[Callable], Callable]
+
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with phase(name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def instrument_engine(engine, registry=REGISTRY):
+    """
+    Times every statement an engine executes, as the db phase of the current request
+
+    :param engine: SQLAlchemy engine
+    :type engine: Engine
+    :param registry: Metrics registry of the query duration histogram
+    :type registry: Registry
+    :raise:
+    :return: None
+    :rtype: None
+
+    """
+    histogram = registry.histogram("db_query_seconds", "Duration of database statements").labels()
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    def finish(conn):
+        starts = conn.info.get("query_start") if conn is not None else None
+        if not starts:
+            return
+        seconds = time.perf_counter() - starts.pop()
+        histogram.observe(seconds)
+        record(DB, seconds)
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        finish(conn)
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context):
+        # failed statements count too, and must not leave their start behind
+        finish(context.connection)
+
+
+class TimedClient:
+    """
+    This class wraps a Slack client so that its calls are timed as the slack phase of the current request.
+
+    Calls are also observed in the slack_call_seconds histogram by method. The time includes waiting for a rate limit
+    or for an identical call of another thread, since the request waits for those too.
+    """
+
+    def __init__(self, client, registry=REGISTRY):
+        """
+        Constructor to initialize the wrapped client and the call histogram
+
+        :param client: Slack client, e.g. a RateLimitedClient
+        :type client: Any
+        :param registry: Metrics registry of the call duration histogram
+        :type registry: Registry
+        :raise:
+        :return: None
+        :rtype: None
+
+        """
+        self.client = client
+        self.registry = registry
+        self.seconds = registry.histogram("slack_call_seconds", "Duration of Slack API calls", ("method",))
+
+    @property
+    def background(self):
+        return TimedClient(self.client.background, self.registry)
+
+    def __getattr__(self, name):
+        attribute = getattr(self.client, name)
+        if name.startswith("_") or not callable(attribute):
+            return attribute
+
+        @functools.wraps(attribute)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return attribute(*args, **kwargs)
+            finally:
+                seconds = time.perf_counter() - start
+                # call("users_info", ...) on a RateLimitedClient names its method in the first argument
+                method = args[0] if name == "call" and args else name
+                self.seconds.labels(method).observe(seconds)
+                record(SLACK, seconds)
+
+        return timed
+
+
+def init_app(app, registry=REGISTRY, header=True):
+    """
+    Times every request of a Flask app: a Server-Timing header, a log line on the slackpoint.timing logger, the
+    request_duration_seconds and request_phase_seconds histograms by endpoint and, for slash commands, the
+    slash_command_duration_seconds histogram by command
+
+    :param app: Flask app
+    :type app: Flask
+    :param registry: Metrics registry of the request histograms
+    :type registry: Registry
+    :param header: Add the Server-Timing header to responses
+    :type header: bool
+    :raise:
+    :return: None
+    :rtype: None
+
+    """
+    logger = logging.getLogger(TIMING_LOGGER)
+    duration = registry.histogram(
+        "request_duration_seconds", "Duration of requests, by endpoint and status", ("endpoint", "status")
+    )
+    phases = registry.histogram(
+        "request_phase_seconds", "Time requests spent in each phase, by endpoint", ("endpoint", "phase")
+    )
+    commands = registry.histogram(
+        "slash_command_duration_seconds", "Duration of slash commands, by command and status", ("command", "status")
+    )
+    # the command is sent by the client, so the number of label values is bounded
+    seen_commands = set()
+
+    def slash_command():
+        if request.mimetype != "application/x-www-form-urlencoded":
+            return None
+        command = request.form.get("command")
+        if not command:
+            return None
+        if command not in seen_commands:
+            if len(seen_commands) >= MAX_COMMAND_LABELS:
+                return "other"
+            seen_commands.add(command)
+        return command
+
+    @app.before_request
+    def start_timing():
+        start_request()
+
+    @app.after_request
+    def finish_timing(response):
+        timing = finish_request()
+        if timing is None:
+            return response
+        total = time.perf_counter() - timing.started
+        endpoint = request.endpoint or "unknown"
+        duration.labels(endpoint, response.status_code).observe(total)
+        for name, seconds in timing.durations.items():
+            # a phase the request never entered would add a zero to every bucket and drag the quantiles down
+            if timing.counts[name] > 0:
+                phases.labels(endpoint, name).observe(seconds)
+        command = slash_command()
+        if command is not None:
+            commands.labels(command, response.status_code).observe(total)
+        if header:
+            response.headers["Server-Timing"] = timing.server_timing(total)
+        logger.info(
+            "%s %s %d in %.1f ms",
+            request.method,
+            request.path,
+            response.status_code,
+            total * 1000,
+            extra={
+                "endpoint": endpoint,
+                "status": response.status_code,
+                "duration_ms": round(total * 1000, 2),
+                "phases_ms": {name: round(seconds * 1000, 2) for name, seconds in timing.durations.items()},
+                "phase_calls": dict(timing.counts),
+            },
+        )
+        return response
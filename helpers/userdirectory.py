@@ -0,0 +1,221 @@
+import threading
+import time
+
+from helpers.metrics import REGISTRY
+from helpers.singleflight import SingleFlight
+
+
+class UserRecord:
+    """
+    This class holds the directory entry of a single Slack user.
+    """
+
+    __slots__ = ("user_id", "real_name", "display_name", "assignable")
+
+    def __init__(self, user_id, real_name, display_name, assignable):
+        self.user_id = user_id
+        self.real_name = real_name
+        self.display_name = display_name
+        self.assignable = assignable
+
+    @classmethod
+    def from_slack(cls, user):
+        """
+        Builds a record from a Slack user object as returned by users.list or a user_change event
+
+        :param user: Slack user object
+        :type user: dict[str, Any]
+        :raise:
+        :return: Directory record
+        :rtype: UserRecord
+
+        """
+        real_name = user.get("real_name")
+        profile = user.get("profile") or {}
+        # same rule getUsers always applied: named, and not the bot
+        assignable = (
+            real_name is not None and real_name != "bot" and not user.get("deleted")
+        )
+        return cls(user["id"], real_name, profile.get("display_name"), assignable)
+
+
+class UserDirectory:
+    """
+    This class indexes the users of a Slack workspace by their Slack user ID.
+    """
+
+    page_size = 1000
+
+    def __init__(self, client, ttl=3600, clock=time.monotonic, fetch_users=None, registry=REGISTRY):
+        """
+        Constructor to initialize the Slack client, index lifetime and the empty index
+
+        :param client: Slack WebClient used to list the users of the workspace
+        :type client: WebClient
+        :param ttl: Number of seconds before the index is reloaded from Slack
+        :type ttl: float
+        :param clock: Monotonic clock, overridable for tests
+        :type clock: Callable[[], float]
+        :param fetch_users: Looks up users missing from the index, returning the Slack user objects found and the IDs
+            Slack does not know, see load_missing
+        :type fetch_users: Callable[[list[str]], tuple[list[dict[str, Any]], set[str]]]
+        :param registry: Metrics registry the cache hits and misses are counted in
+        :type registry: Registry
+        :raise:
+        :return: None
+        :rtype: None
+
+        """
+        self.client = client
+        self.ttl = ttl
+        self.clock = clock
+        self.fetch_users = fetch_users
+        self._lock = threading.Lock()
+        self._index = {}
+        # users Slack does not know, not looked up again until the next reload
+        self._unknown = set()
+        # records updated while a reload lists the users, applied on top of its snapshot, None when no reload runs
+        self._pending = None
+        self._expiry = 0.0
+        self._flight = SingleFlight("user_directory", registry=registry)
+        lookups = registry.counter("cache_requests_total", "Cache lookups by cache and result (hit, miss)", ("cache", "result"))
+        self._hits = lookups.labels("users", "hit")
+        self._misses = lookups.labels("users", "miss")
+
+    def get(self, slack_id):
+        """
+        Returns the directory record of a user, loading the directory on first use
+
+        :param slack_id: Slack user ID
+        :type slack_id: str
+        :raise:
+        :return: Directory record, None if the user is unknown
+        :rtype: UserRecord
+
+        """
+        # a miss is a lookup that has to reload the index
+        (self._hits if self._expiry > self.clock() else self._misses).inc()
+        self.ensure_loaded()
+        return self._index.get(slack_id)
+
+    def name(self, slack_id):
+        """
+        Returns the real name of a user
+
+        :param slack_id: Slack user ID
+        :type slack_id: str
+        :raise:
+        :return: Real name of the user, None if the user is unknown
+        :rtype: str
+
+        """
+        record = self.get(slack_id)
+        return record.real_name if record is not None else None
+
+    def ensure_loaded(self):
+        """
+        Loads every user of the workspace with users.list when the index is empty or expired
+
+        Concurrent callers share one reload, and updates applied while it runs are kept over its snapshot.
+
+        :param:
+        :type:
+        :raise:
+        :return: None
+        :rtype: None
+
+        """
+        if self._expiry > self.clock():
+            return
+        self._flight.do("users_list", self._reload)
+
+    def _reload(self):
+        if self._expiry > self.clock():
+            return
+        with self._lock:
+            self._pending = {}
+        try:
+            index = self._list_users()
+        except BaseException:
+            with self._lock:
+                self._pending = None
+            raise
+        with self._lock:
+            index.update(self._pending)
+            self._pending = None
+            self._index = index
+            self._unknown = set()
+            self._expiry = self.clock() + self.ttl
+
+    def _list_users(self):
+        index = {}
+        cursor = None
+        while True:
+            result = self.client.users_list(limit=self.page_size, cursor=cursor)
+            for user in result["members"]:
+                index[user["id"]] = UserRecord.from_slack(user)
+            cursor = (result.get("response_metadata") or {}).get("next_cursor")
+            if not cursor:
+                break
+        return index
+
+    def load_missing(self, slack_ids):
+        """
+        Looks up the users that are missing from the index, e.g. who joined since it was loaded, with fetch_users
+
+        Users Slack does not know are not looked up again until the next reload, users whose lookup failed otherwise
+        (rate limits, timeouts) are looked up again on the next call. Without fetch_users missing users stay unknown
+        until the next reload.
+
+        :param slack_ids: Slack user IDs
+        :type slack_ids: Iterable[str]
+        :raise:
+        :return: None
+        :rtype: None
+
+        """
+        if self.fetch_users is None:
+            return
+        self.ensure_loaded()
+        missing = [i for i in slack_ids if i not in self._index and i not in self._unknown]
+        if not missing:
+            return
+        users, not_found = self.fetch_users(missing)
+        for user in users:
+            self.update(user)
+        with self._lock:
+            self._unknown.update(not_found)
+
+    def update(self, user):
+        """
+        Applies a Slack user object from a ``user_change`` or ``team_join`` event to the index
+
+        :param user: Slack user object
+        :type user: dict[str, Any]
+        :raise:
+        :return: None
+        :rtype: None
+
+        """
+        if "id" not in user:
+            return
+        record = UserRecord.from_slack(user)
+        with self._lock:
+            self._index[record.user_id] = record
+            if self._pending is not None:
+                self._pending[record.user_id] = record
+
+    def invalidate(self):
+        """
+        Drops the index so that the next lookup reloads it from Slack
+
+        :param:
+        :type:
+        :raise:
+        :return: None
+        :rtype: None
+
+        """
+        with self._lock:
+            self._index = {}
+            self._expiry = 0.0
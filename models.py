@@ -1,5 +1,6 @@
 from datetime import datetime
-from sqlalchemy import ForeignKey
+from sqlalchemy import ForeignKey, select
+from sqlalchemy.dialects.postgresql import insert
 from flask_sqlalchemy import SQLAlchemy
 
 db = SQLAlchemy()
@@ -20,7 +21,10 @@ class Task(db.Model):
     updated_on = db.Column(db.DateTime)
     created_by = db.Column(db.Integer)
 
-    __table_args__ = (db.UniqueConstraint("task_id"),)
+    __table_args__ = (
+        db.UniqueConstraint("task_id"),
+        db.Index("ix_task_deadline", "deadline", "task_id"),
+    )
 
 
 class Assignment(db.Model):
@@ -35,6 +39,15 @@ class Assignment(db.Model):
     assignment_created_on = db.Column(db.DateTime, default=datetime.now())
     assignment_updated_on = db.Column(db.DateTime)
 
+    # see db/migrations/0003_hot_path_indexes.sql
+    __table_args__ = (
+        db.Index("ix_assignment_pending", "assignment_id", postgresql_where=progress < 1),
+        db.Index("ix_assignment_completed", "assignment_id", postgresql_where=progress == 1),
+        db.Index(
+            "ix_assignment_pending_user", "user_id", "assignment_id", postgresql_where=progress < 1
+        ),
+    )
+
 
 class User(db.Model):
     """
@@ -47,3 +60,56 @@ class User(db.Model):
     slack_user_id = db.Column(db.String, unique=True)
 
     __table_args__ = (db.UniqueConstraint("user_id"),)
+
+
+class UserPoints(db.Model):
+    """
+    This class is a database model for the UserPoints rollup, the points each user earned from completed tasks.
+    """
+
+    __tablename__ = "user_points"
+
+    user_id = db.Column(db.Integer, ForeignKey("user.user_id"), primary_key=True)
+    total_points = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (db.Index("ix_user_points_total_points", total_points.desc()),)
+
+
+def upsert_users(slack_user_ids):
+    """
+    Inserts the given Slack users when missing and returns their user IDs, in a single statement
+
+    The INSERT ... ON CONFLICT (slack_user_id) DO NOTHING RETURNING only yields the rows it inserted, so it is
+    combined with a lookup of the rows that already existed. Concurrent callers cannot insert the same user twice.
+    A user committed by a concurrent transaction after the statement's snapshot is skipped by both, so the IDs still
+    missing are looked up again in a second statement, which under READ COMMITTED sees that commit. The caller owns
+    the transaction.
+
+    :param slack_user_ids: Slack user IDs
+    :type slack_user_ids: Iterable[str]
+    :raise:
+    :return: Mapping of Slack user ID to user ID
+    :rtype: dict[str, int]
+
+    """
+    slack_user_ids = sorted(set(slack_user_ids))
+    if not slack_user_ids:
+        return {}
+    inserted = (
+        insert(User)
+        .values([{"slack_user_id": slack_user_id} for slack_user_id in slack_user_ids])
+        .on_conflict_do_nothing(index_elements=[User.slack_user_id])
+        .returning(User.user_id, User.slack_user_id)
+        .cte("inserted")
+    )
+    stmt = select(inserted.c.user_id, inserted.c.slack_user_id).union_all(
+        select(User.user_id, User.slack_user_id).where(
+            User.slack_user_id.in_(slack_user_ids)
+        )
+    )
+    user_ids = {row.slack_user_id: row.user_id for row in db.session.execute(stmt)}
+    missing = [slack_user_id for slack_user_id in slack_user_ids if slack_user_id not in user_ids]
+    if missing:
+        stmt = select(User.user_id, User.slack_user_id).where(User.slack_user_id.in_(missing))
+        user_ids.update((row.slack_user_id, row.user_id) for row in db.session.execute(stmt))
+    return user_ids
@@ -0,0 +1,42 @@
+from types import SimpleNamespace
+
+from helpers.blocks import leaderboard_blocks, section, task_blocks, task_created_block
+
+
+def test_task_blocks():
+    """
+    Test that each task renders into its own section block
+    """
+    tasks = [
+        SimpleNamespace(task_id=1, points=10, description="This is Task 1", deadline="2022-10-24"),
+        SimpleNamespace(task_id=2, points=2, description="This is Task 2", deadline="2022-10-26"),
+    ]
+    blocks = task_blocks(tasks)
+
+    assert blocks == [
+        section(">SP-1 (10 SlackPoints) This is Task 1 [Deadline: 2022-10-24]"),
+        section(">SP-2 (2 SlackPoints) This is Task 2 [Deadline: 2022-10-26]"),
+    ]
+    assert blocks[0]["text"] is not blocks[1]["text"]
+
+
+def test_leaderboard_blocks_are_numbered():
+    """
+    Test that leaderboard positions start at one
+    """
+    rows = [
+        SimpleNamespace(slack_user_id="ritwik", total_points=33),
+        SimpleNamespace(slack_user_id="neha", total_points=10),
+    ]
+
+    assert [block["text"]["text"] for block in leaderboard_blocks(rows)] == [
+        "1. <@ritwik> has 33 points!",
+        "2. <@neha> has 10 points!",
+    ]
+
+
+def test_task_created_block():
+    """
+    Test the task creation confirmation block
+    """
+    assert task_created_block("Great", 5) == section(">Great! Your task SP-5 was created successfully.")
@@ -0,0 +1,91 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from commands.createtask import CreateTask
+from models import upsert_users
+
+
+@patch("commands.createtask.db.session")
+@patch("commands.createtask.upsert_users")
+def test_create_task_single_transaction(mock_upsert_users, mock_db_session):
+    """
+    Test that a task is created with one upsert, one insert and one commit
+    """
+    mock_upsert_users.return_value = {"U1": 1, "U2": 2}
+    mock_db_session.execute.return_value.scalar_one.return_value = 42
+
+    ct = CreateTask()
+    blocks, task_id = ct.create_task("Write docs", "3", "2022-10-24", "U2", "U1")
+
+    assert task_id == 42
+    assert "SP-42 was created successfully" in blocks[0]["text"]["text"]
+    mock_upsert_users.assert_called_once_with(["U1", "U2"])
+    assert mock_db_session.execute.call_count == 1
+    mock_db_session.commit.assert_called_once()
+    mock_db_session.rollback.assert_not_called()
+
+
+@patch("commands.createtask.db.session")
+@patch("commands.createtask.upsert_users")
+def test_create_task_without_assignee(mock_upsert_users, mock_db_session):
+    """
+    Test that an unassigned task only upserts its creator
+    """
+    mock_upsert_users.return_value = {"U1": 1}
+    mock_db_session.execute.return_value.scalar_one.return_value = 7
+
+    _, task_id = CreateTask().create_task("Write docs", "3", "2022-10-24", None, "U1")
+
+    assert task_id == 7
+    mock_upsert_users.assert_called_once_with(["U1"])
+
+
+@patch("commands.createtask.db.session")
+@patch("commands.createtask.upsert_users")
+def test_create_task_rolls_back_on_error(mock_upsert_users, mock_db_session):
+    """
+    Test that a failing insert rolls the whole transaction back
+    """
+    mock_upsert_users.return_value = {"U1": 1}
+    mock_db_session.execute.side_effect = RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        CreateTask().create_task("Write docs", "3", "2022-10-24", None, "U1")
+
+    mock_db_session.rollback.assert_called_once()
+    mock_db_session.commit.assert_not_called()
+
+
+@patch("models.db.session")
+def test_upsert_users_statement(mock_db_session):
+    """
+    Test that users are upserted with ON CONFLICT DO NOTHING in a single statement
+    """
+    row = MagicMock(user_id=1, slack_user_id="U1")
+    mock_db_session.execute.return_value = [row]
+
+    assert upsert_users(["U1", "U1"]) == {"U1": 1}
+    assert mock_db_session.execute.call_count == 1
+    sql = str(mock_db_session.execute.call_args[0][0].compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (slack_user_id) DO NOTHING RETURNING" in sql
+    assert "UNION ALL" in sql
+    assert upsert_users([]) == {}
+
+
+@patch("models.db.session")
+def test_upsert_users_looks_up_users_committed_concurrently(mock_db_session):
+    """
+    Test that a user neither inserted nor seen by the upsert, committed by a concurrent transaction, is looked up again
+    """
+    mock_db_session.execute.side_effect = [
+        [MagicMock(user_id=1, slack_user_id="U1")],
+        [MagicMock(user_id=2, slack_user_id="U2")],
+    ]
+
+    assert upsert_users(["U1", "U2"]) == {"U1": 1, "U2": 2}
+    assert mock_db_session.execute.call_count == 2
+    lookup = mock_db_session.execute.call_args[0][0].compile(dialect=postgresql.dialect())
+    assert "ON CONFLICT" not in str(lookup)
+    assert list(lookup.params.values()) == [["U2"]]
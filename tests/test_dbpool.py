@@ -0,0 +1,112 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from helpers import dbpool
+from helpers.dbpool import TimedQueuePool, engine_options, observe_pool, warm_up
+from helpers.metrics import Registry
+
+
+class PoolConfig:
+    SQLALCHEMY_DATABASE_URI = "postgresql://localhost/slackpoint"
+    DB_POOL_SIZE = 4
+    DB_POOL_MAX_OVERFLOW = 2
+    DB_POOL_TIMEOUT_SECONDS = 3.0
+    DB_POOL_RECYCLE_SECONDS = 600
+    DB_POOL_PRE_PING = True
+    DB_STATEMENT_TIMEOUT_MS = 2000
+
+
+def count(metric):
+    return metric.labels().snapshot()
+
+
+def test_engine_options_for_postgres():
+    """
+    Test that the pool settings and the statement timeout are taken from the configuration
+    """
+    options = engine_options(PoolConfig)
+
+    assert options["poolclass"] is TimedQueuePool
+    assert options["pool_size"] == 4
+    assert options["max_overflow"] == 2
+    assert options["pool_timeout"] == 3.0
+    assert options["pool_recycle"] == 600
+    assert options["pool_pre_ping"] is True
+    assert options["connect_args"] == {"options": "-c statement_timeout=2000"}
+
+
+def test_engine_options_without_statement_timeout():
+    """
+    Test that a statement timeout of 0 leaves the connection options alone
+    """
+    class NoTimeout(PoolConfig):
+        DB_STATEMENT_TIMEOUT_MS = 0
+
+    assert "connect_args" not in engine_options(NoTimeout)
+
+
+def test_engine_options_for_sqlite():
+    """
+    Test that SQLite keeps the dialect's own pool
+    """
+    class SQLite(PoolConfig):
+        SQLALCHEMY_DATABASE_URI = "sqlite://"
+
+    assert engine_options(SQLite) == {}
+
+
+def test_warm_up_opens_connections():
+    """
+    Test that warm up opens the requested connections and leaves them in the pool
+    """
+    engine = create_engine("sqlite://", poolclass=TimedQueuePool, pool_size=3)
+    opened_before = count(dbpool.connections_opened)
+    waits_before = count(dbpool.checkout_wait_seconds)["count"]
+
+    assert warm_up(engine, 3) == 3
+
+    assert engine.pool.checkedin() == 3
+    assert count(dbpool.connections_opened) - opened_before == 3
+    assert count(dbpool.checkout_wait_seconds)["count"] - waits_before == 3
+
+
+def test_checkout_timeout_is_counted():
+    """
+    Test that a checkout giving up on an exhausted pool is counted
+    """
+    engine = create_engine(
+        "sqlite://", poolclass=TimedQueuePool, pool_size=1, max_overflow=0, pool_timeout=0.01
+    )
+    timeouts_before = count(dbpool.checkout_timeouts)
+
+    with engine.connect():
+        with pytest.raises(PoolTimeoutError):
+            engine.connect()
+
+    assert count(dbpool.checkout_timeouts) - timeouts_before == 1
+
+
+def test_pool_gauges_are_read_on_dump():
+    """
+    Test that the pool size and the connections in use are reported when the registry is dumped
+    """
+    engine = create_engine("sqlite://", poolclass=TimedQueuePool, pool_size=2, max_overflow=1)
+    registry = Registry()
+    observe_pool(engine, registry)
+
+    with engine.connect(), engine.connect(), engine.connect():
+        gauges = {family["name"]: family["samples"][0][1] for family in registry.dump()}
+
+    assert gauges == {"db_pool_size": 2, "db_pool_checked_out": 3, "db_pool_overflow": 1}
+
+
+def test_warm_up_survives_unreachable_database():
+    """
+    Test that a failing warm up is logged instead of stopping the worker
+    """
+    engine = create_engine(
+        "sqlite:////nonexistent/directory/slackpoint.db", poolclass=TimedQueuePool
+    )
+
+    assert warm_up(engine, 2) == 0
@@ -0,0 +1,65 @@
+import threading
+
+from helpers.dispatcher import WorkQueue
+from helpers.metrics import Registry
+
+
+def test_work_queue_runs_jobs():
+    """
+    Test that submitted jobs run on the worker threads and are counted
+    """
+    registry = Registry()
+    wq = WorkQueue("test", workers=2, maxsize=10, registry=registry)
+    results = []
+
+    assert wq.submit(results.append, 1)
+    assert wq.submit(results.append, 2)
+    wq.join()
+
+    assert sorted(results) == [1, 2]
+    jobs = dict(registry.counter("work_queue_jobs_total", "").samples())
+    assert jobs[("test", "submitted")] == 2
+    assert jobs[("test", "completed")] == 2
+
+
+def test_work_queue_rejects_when_full():
+    """
+    Test that submit applies backpressure instead of blocking once the queue is full
+    """
+    registry = Registry()
+    wq = WorkQueue("test", workers=1, maxsize=1, registry=registry)
+    release = threading.Event()
+    started = threading.Event()
+
+    def blocker():
+        started.set()
+        release.wait(5)
+
+    assert wq.submit(blocker)
+    started.wait(5)
+    assert wq.submit(lambda: None)
+    assert wq.submit(lambda: None) is False
+    assert wq.qsize() == 1
+
+    release.set()
+    wq.join()
+    jobs = dict(registry.counter("work_queue_jobs_total", "").samples())
+    assert jobs[("test", "rejected")] == 1
+    assert dict(registry.gauge("work_queue_depth", "").samples())[("test",)] == 0
+
+
+def test_work_queue_survives_failing_job():
+    """
+    Test that a failing job is counted and does not stop the worker
+    """
+    registry = Registry()
+    wq = WorkQueue("test", workers=1, maxsize=10, registry=registry)
+    results = []
+
+    wq.submit(lambda: 1 / 0)
+    wq.submit(results.append, "ok")
+    wq.join()
+
+    assert results == ["ok"]
+    jobs = dict(registry.counter("work_queue_jobs_total", "").samples())
+    assert jobs[("test", "failed")] == 1
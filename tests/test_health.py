@@ -0,0 +1,105 @@
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+from slack_sdk.errors import SlackApiError
+from sqlalchemy import create_engine
+
+from helpers.dbpool import TimedQueuePool
+from helpers.dispatcher import WorkQueue
+from helpers.health import CachedCheck, NotReady, Readiness, database_check, slack_check, wedged_threads
+from helpers.metrics import Registry
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_check_outcome_is_cached_for_its_ttl():
+    """
+    Test that a check runs once per TTL, and that failures are reported without leaking their message
+    """
+    clock = FakeClock()
+    check = MagicMock(side_effect=["ok", NotReady("pool saturated"), RuntimeError("postgresql://user@db")])
+    cached = CachedCheck("database", check, ttl=5, clock=clock, registry=Registry())
+
+    assert cached() == {"ok": True, "detail": "ok"}
+    clock.now += 4
+    assert cached() == {"ok": True, "detail": "ok"}
+    clock.now += 2
+    assert cached() == {"ok": False, "detail": "pool saturated"}
+    clock.now += 6
+    assert cached() == {"ok": False, "detail": "RuntimeError"}
+    assert check.call_count == 3
+
+
+def test_readiness_needs_every_check():
+    """
+    Test that the worker is ready only when every check passes
+    """
+    registry = Registry()
+    passing = CachedCheck("database", lambda: "ok", registry=registry)
+    failing = CachedCheck("slack", MagicMock(side_effect=NotReady("token rejected")), registry=registry)
+
+    assert Readiness([passing]).run() == (True, {"database": {"ok": True, "detail": "ok"}})
+    is_ready, checks = Readiness([passing, failing]).run()
+    assert not is_ready
+    assert checks["slack"] == {"ok": False, "detail": "token rejected"}
+
+
+def test_database_check_reports_a_saturated_pool():
+    """
+    Test that the database check queries the database, and fails without a checkout once the pool is saturated
+    """
+    engine = create_engine("sqlite://", poolclass=TimedQueuePool, pool_size=2, max_overflow=0)
+    check = database_check(engine, 2, saturation=0.5)
+
+    assert check() == "0 of 2 connections in use"
+    with engine.connect():
+        with pytest.raises(NotReady, match="pool saturated, 1 of 2 connections in use"):
+            check()
+
+
+def test_slack_check_only_fails_on_a_rejected_token():
+    """
+    Test that a rejected token fails the Slack check while a Slack outage does not
+    """
+    client = MagicMock()
+    client.auth_test.return_value = {"ok": True, "user": "slackpoint", "team": "NCSU"}
+    assert slack_check(client)() == "authenticated as slackpoint in NCSU"
+
+    client.auth_test.side_effect = SlackApiError("invalid_auth", {"ok": False, "error": "invalid_auth"})
+    with pytest.raises(NotReady, match="invalid_auth"):
+        slack_check(client)()
+
+    client.auth_test.side_effect = ConnectionError("reset")
+    assert slack_check(client)() == "Slack unreachable: ConnectionError"
+
+
+def test_wedged_queue_thread_is_reported():
+    """
+    Test that a work queue thread stuck in one job is reported until the job returns
+    """
+    wq = WorkQueue("test", workers=1, maxsize=10, registry=Registry())
+    started = threading.Event()
+    release = threading.Event()
+
+    def stuck():
+        started.set()
+        release.wait()
+
+    assert wedged_threads([wq], max_job_seconds=0) == []
+    wq.submit(stuck)
+    started.wait()
+    problems = wedged_threads([wq], max_job_seconds=0)
+    assert len(problems) == 1
+    assert problems[0].startswith("test: test-0 has been running stuck for")
+    assert wedged_threads([wq], max_job_seconds=60) == []
+
+    release.set()
+    wq.join()
+    assert wedged_threads([wq], max_job_seconds=0) == []
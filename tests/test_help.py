@@ -59,7 +59,7 @@ def test_help():
                 "type": "section",
                 "text": {
                     "type": "mrkdwn",
-                    "text": ">To mark a task as Completed, just try the command */task-done* <Task ID>, and now you are one step closer at being one of the top five contenders!",
+                    "text": ">To mark a task as Completed, just try the command */task-done* <Task ID>, or several IDs and ranges such as */task-done* 12 13 14-20, and now you are one step closer at being one of the top five contenders!",
                 },
             },
             {"type": "section", "text": {"type": "mrkdwn", "text": "*Help*"}},
@@ -76,4 +76,31 @@ def test_help():
     print(payload)
     print("*************")
     print(expected_payload)
-    assert payload == expected_payload
\ No newline at end of file
+    assert payload == expected_payload
+
+
+def test_help_payload_is_cached():
+    """
+    Test that the /help payload is built and serialized once, and every call returns the same payload
+    """
+    from commands.help import HELP_ALL_JSON
+    import json
+
+    assert Help().help_all() is Help().help_all()
+    assert Help().help_all() == json.loads(HELP_ALL_JSON)
+    assert len(Help().help_all()["blocks"]) == 14
+
+
+def test_error_payload_is_cached():
+    """
+    Test that error payloads are built once per command
+    """
+    from helpers.errorhelper import ErrorHelper, error_payload_json
+
+    blocks = ErrorHelper().get_error_payload_blocks("taskdone")
+
+    assert blocks[0]["text"]["text"].startswith(">Oops!")
+    assert blocks[1:] == Help().help("taskdone")
+    assert ErrorHelper().get_error_payload_blocks("taskdone") is blocks
+    assert error_payload_json("taskdone") is error_payload_json("taskdone")
+    assert ErrorHelper().get_command_help("task_assigned", ["neha", 4]) == "You have been assigned task #4 by neha"
@@ -0,0 +1,155 @@
+import threading
+from datetime import date, datetime, time, timezone
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from commands.viewdeadlinetasks import ViewDeadlineTasks
+from helpers.jobs import DailyScheduler, DueTodayCache, SharedVersion, digest_messages, next_run
+from helpers.pagination import parse_next_page
+
+
+class FakeNow:
+    def __init__(self, when):
+        self.when = when
+
+    def __call__(self, tz=None):
+        return self.when
+
+
+def make_tasks(count):
+    return [
+        SimpleNamespace(task_id=i, points=1, description=f"Task {i}", deadline=date(2024, 3, 1))
+        for i in range(1, count + 1)
+    ]
+
+
+def test_due_today_loads_once_per_day():
+    """
+    Test that the due set is queried once a day, for the date in the workspace timezone
+    """
+    now = FakeNow(datetime(2024, 3, 1, 23, 0, tzinfo=timezone.utc))
+    load = MagicMock(return_value=make_tasks(2))
+    cache = DueTodayCache(load, tz=timezone.utc, now=now)
+
+    assert cache.get() == cache.get()
+    load.assert_called_once_with(date(2024, 3, 1))
+
+    now.when = datetime(2024, 3, 2, 0, 1, tzinfo=timezone.utc)
+    cache.get()
+    load.assert_called_with(date(2024, 3, 2))
+    assert load.call_count == 2
+
+
+def test_due_today_reloads_after_invalidate_and_max_age():
+    """
+    Test that a write or the max age make the next call query again
+    """
+    clock = MagicMock(return_value=0.0)
+    load = MagicMock(return_value=[])
+    cache = DueTodayCache(load, max_age=60, clock=clock, now=FakeNow(datetime(2024, 3, 1, 9, 0)))
+
+    cache.get()
+    cache.invalidate()
+    cache.get()
+    clock.return_value = 30.0
+    cache.get()
+    clock.return_value = 61.0
+    cache.get()
+
+    assert load.call_count == 3
+
+
+def test_due_today_reloads_when_another_process_invalidates(tmp_path):
+    """
+    Test that a write in one worker makes the caches of the other workers sharing the version reload, without max age
+    """
+    path = str(tmp_path / "due-today.version")
+    now = FakeNow(datetime(2024, 3, 1, 9, 0))
+    load_a = MagicMock(return_value=[])
+    load_b = MagicMock(return_value=[])
+    cache_a = DueTodayCache(load_a, version=SharedVersion(path), now=now)
+    cache_b = DueTodayCache(load_b, version=SharedVersion(path), now=now)
+
+    cache_a.get()
+    cache_b.get()
+    cache_a.get()
+    cache_b.get()
+    assert (load_a.call_count, load_b.call_count) == (1, 1)
+
+    cache_b.invalidate()
+    cache_a.get()
+    cache_b.get()
+    assert (load_a.call_count, load_b.call_count) == (2, 2)
+
+    cache_b.invalidate()
+    cache_b.invalidate()
+    cache_a.get()
+    cache_a.get()
+    assert load_a.call_count == 3
+
+
+def test_digest_messages_split_at_block_limit():
+    """
+    Test that a digest is split into messages of at most the block limit, header first
+    """
+    messages = digest_messages("C1", make_tasks(60), date(2024, 3, 1))
+
+    assert [len(message["blocks"]) for message in messages] == [50, 11]
+    assert all(message["channel"] == "C1" for message in messages)
+    assert messages[0]["blocks"][0]["text"]["text"] == "*60 tasks due today (2024-03-01)*"
+    assert digest_messages("C1", [], date(2024, 3, 1)) == []
+
+
+def test_next_run():
+    """
+    Test that a daily job runs later today, or tomorrow once its time has passed
+    """
+    morning = datetime(2024, 3, 1, 8, 0, tzinfo=timezone.utc)
+    evening = datetime(2024, 3, 1, 18, 0, tzinfo=timezone.utc)
+
+    assert next_run(time(9, 0), timezone.utc, morning) == datetime(2024, 3, 1, 9, 0, tzinfo=timezone.utc)
+    assert next_run(time(9, 0), timezone.utc, evening) == datetime(2024, 3, 2, 9, 0, tzinfo=timezone.utc)
+
+
+def test_scheduler_runs_due_job_and_survives_failures():
+    """
+    Test that the scheduler waits until a job's time, runs it, and keeps going when it fails
+    """
+    now = FakeNow(datetime(2024, 3, 1, 8, 59, 59, tzinfo=timezone.utc))
+    scheduler = DailyScheduler(timezone.utc, now=now)
+    stop = MagicMock(spec=threading.Event)
+    stop.is_set.return_value = False
+    waits = []
+
+    def wait(seconds):
+        waits.append(seconds)
+        now.when = datetime(2024, 3, 1, 9, 0, tzinfo=timezone.utc)
+        return len(waits) > 1
+
+    stop.wait.side_effect = wait
+    job = MagicMock(side_effect=RuntimeError("slack is down"))
+    scheduler.add("digest", time(9, 0), job)
+
+    scheduler.run(stop)
+
+    job.assert_called_once_with()
+    assert waits == [1.0, 86400.0]
+
+
+def test_view_deadline_tasks_pages_cached_set():
+    """
+    Test that the today listing pages through the cached due set without querying
+    """
+    cache = MagicMock()
+    cache.get.return_value = make_tasks(45)
+
+    first = ViewDeadlineTasks(cache)
+    first.page_size = 20
+    first_page = first.get_list()["blocks"]
+    last = ViewDeadlineTasks(cache)
+    last.page_size = 20
+    last_page = last.get_list(after=40)["blocks"]
+
+    assert len(first_page) == 21
+    assert parse_next_page(first_page[-1]["elements"][0]["value"]) == ("today", 20, {})
+    assert len(last_page) == 5
@@ -1,3 +1,7 @@
+from unittest.mock import patch
+
+from sqlalchemy.dialects import postgresql
+
 from commands.leaderboard import Leaderboard
 from commands.viewpoints import ViewPoints
 from tests.mockmodels import (
@@ -43,7 +47,7 @@ def test_leaderboard_no_param(
 
     """
     # Mocking DB call
-    mock_get_sqlalchemy.join.return_value.join.return_value.with_entities.return_value.filter.return_value.group_by.return_value.order_by.return_value = [
+    mock_get_sqlalchemy.join.return_value.with_entities.return_value.filter.return_value.order_by.return_value = [
         mock_leaderboard_position_1,
         mock_leaderboard_position_2,
         mock_leaderboard_position_3,
@@ -117,7 +121,7 @@ def test_leaderboard_top_2(
 
     """
     # Mocking DB call
-    mock_get_sqlalchemy.join.return_value.join.return_value.with_entities.return_value.filter.return_value.group_by.return_value.order_by.return_value = [
+    mock_get_sqlalchemy.join.return_value.with_entities.return_value.filter.return_value.order_by.return_value = [
         mock_leaderboard_position_1,
         mock_leaderboard_position_2,
         mock_leaderboard_position_3,
@@ -178,7 +182,7 @@ def test_leaderboard_no_completed_task(
 
     """
     # Mocking DB call
-    mock_get_sqlalchemy.join.return_value.join.return_value.with_entities.return_value.filter.return_value.group_by.return_value.order_by.return_value = (
+    mock_get_sqlalchemy.join.return_value.with_entities.return_value.filter.return_value.order_by.return_value = (
         []
     )
 
@@ -205,7 +209,7 @@ def test_leaderboard_one_user(mock_leaderboard_position_1, mock_get_sqlalchemy):
     """
     Test leaderboard with only one user
     """
-    mock_get_sqlalchemy.join.return_value.join.return_value.with_entities.return_value.filter.return_value.group_by.return_value.order_by.return_value = [
+    mock_get_sqlalchemy.join.return_value.with_entities.return_value.filter.return_value.order_by.return_value = [
         mock_leaderboard_position_1
     ]
 
@@ -227,7 +231,7 @@ def test_leaderboard_empty_db(mock_get_sqlalchemy):
     """
     Test leaderboard when the database is empty
     """
-    mock_get_sqlalchemy.join.return_value.join.return_value.with_entities.return_value.filter.return_value.group_by.return_value.order_by.return_value = []
+    mock_get_sqlalchemy.join.return_value.with_entities.return_value.filter.return_value.order_by.return_value = []
 
     lb = Leaderboard()
     payload = lb.view_leaderboard()
@@ -254,7 +258,7 @@ def test_leaderboard_top_k_greater_than_users(
     """
     Test leaderboard when top_k exceeds the number of users
     """
-    mock_get_sqlalchemy.join.return_value.join.return_value.with_entities.return_value.filter.return_value.group_by.return_value.order_by.return_value = [
+    mock_get_sqlalchemy.join.return_value.with_entities.return_value.filter.return_value.order_by.return_value = [
         mock_leaderboard_position_1,
         mock_leaderboard_position_2,
     ]
@@ -276,7 +280,61 @@ def test_leaderboard_top_k_greater_than_users(
         ],
     }
     assert payload == expected_payload, payload
-    
 
 
+@patch("commands.leaderboard.db.session")
+def test_leaderboard_credit_points(mock_db_session):
+    """
+    Test that crediting points upserts the rollup row of the user
+    """
+    Leaderboard.credit_points(7, 5)
+
+    sql = str(mock_db_session.execute.call_args[0][0].compile(dialect=postgresql.dialect()))
+    assert "INSERT INTO user_points" in sql
+    assert "ON CONFLICT (user_id) DO UPDATE SET total_points = (user_points.total_points + excluded.total_points)" in sql
+
+    mock_db_session.reset_mock()
+    Leaderboard.credit_points(None, 5)
+    Leaderboard.credit_points(7, 0)
+    mock_db_session.execute.assert_not_called()
+
+
+@patch("commands.leaderboard.db.session")
+def test_leaderboard_rebuild(mock_db_session, mock_get_sqlalchemy, mocker):
+    """
+    Test that the rebuild reports users whose rollup differs from the history and rewrites the rollup
+    """
+    mock_get_sqlalchemy.join.return_value.with_entities.return_value.filter.return_value.filter.return_value.group_by.return_value.all.return_value = [
+        mocker.Mock(user_id=1, total_points=10),
+        mocker.Mock(user_id=2, total_points=4),
+    ]
+    mock_get_sqlalchemy.with_entities.return_value.all.return_value = [
+        mocker.Mock(user_id=1, total_points=10),
+        mocker.Mock(user_id=3, total_points=2),
+    ]
+
+    assert Leaderboard.rebuild(verify_only=True) == {2: (0, 4), 3: (2, 0)}
+    mock_db_session.execute.assert_not_called()
+
+    assert Leaderboard.rebuild() == {2: (0, 4), 3: (2, 0)}
+    assert mock_db_session.execute.call_count == 3
+    lock = str(mock_db_session.execute.call_args_list[0][0][0])
+    assert lock == "LOCK TABLE user_points IN SHARE ROW EXCLUSIVE MODE"
+    mock_db_session.commit.assert_called_once()
+
+
+@patch("commands.leaderboard.db.session")
+def test_leaderboard_rebuild_in_sync(mock_db_session, mock_get_sqlalchemy, mocker):
+    """
+    Test that a rollup matching the history is left alone, and the lock released
+    """
+    mock_get_sqlalchemy.join.return_value.with_entities.return_value.filter.return_value.filter.return_value.group_by.return_value.all.return_value = [
+        mocker.Mock(user_id=1, total_points=10),
+    ]
+    mock_get_sqlalchemy.with_entities.return_value.all.return_value = [
+        mocker.Mock(user_id=1, total_points=10),
+    ]
 
+    assert Leaderboard.rebuild() == {}
+    mock_db_session.execute.assert_called_once()
+    mock_db_session.commit.assert_called_once()
@@ -0,0 +1,115 @@
+import io
+import json
+import logging
+
+import pytest
+
+from helpers.logconfig import (
+    PAYLOAD_LOGGER,
+    JsonFormatter,
+    SampleFilter,
+    configure_logging,
+    parse_levels,
+    stop_logging,
+)
+
+
+@pytest.fixture
+def restore_logging():
+    """
+    Restores the root logger and the loggers a test configures
+    """
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    yield
+    stop_logging()
+    root.handlers[:] = handlers
+    root.setLevel(level)
+    for name in ("tests.quiet", "tests.verbose"):
+        logging.getLogger(name).setLevel(logging.NOTSET)
+    logging.getLogger(PAYLOAD_LOGGER).filters.clear()
+
+
+def test_parse_levels():
+    """
+    Test that per-module levels are parsed into logging levels
+    """
+    assert parse_levels("sqlalchemy.engine=WARNING, helpers.roster=debug") == {
+        "sqlalchemy.engine": logging.WARNING,
+        "helpers.roster": logging.DEBUG,
+    }
+    assert parse_levels("") == {}
+
+
+@pytest.mark.parametrize("spec", ["sqlalchemy.engine", "=INFO", "app=LOUD"])
+def test_parse_levels_invalid(spec):
+    """
+    Test that malformed settings are rejected
+    """
+    with pytest.raises(ValueError):
+        parse_levels(spec)
+
+
+def test_json_formatter_includes_extra_fields():
+    """
+    Test that a record is formatted as one JSON object with its extra fields
+    """
+    record = logging.makeLogRecord(
+        {"name": "app", "levelname": "INFO", "msg": "Task %s done", "args": (7,), "payload": {"a": 1}}
+    )
+
+    entry = json.loads(JsonFormatter().format(record))
+
+    assert entry["level"] == "INFO"
+    assert entry["logger"] == "app"
+    assert entry["message"] == "Task 7 done"
+    assert entry["payload"] == {"a": 1}
+    assert "args" not in entry
+
+
+def test_sample_filter():
+    """
+    Test that the sample filter keeps records below the rate only
+    """
+    draws = iter([0.05, 0.5])
+    sampler = SampleFilter(0.1, random=lambda: next(draws))
+
+    assert sampler.filter(None)
+    assert not sampler.filter(None)
+    assert not SampleFilter(0.0).filter(None)
+    assert SampleFilter(1.0).filter(None)
+
+
+def test_configure_logging_writes_through_listener(restore_logging):
+    """
+    Test that records reach the stream as JSON lines through the listener, with per-module levels and tracebacks
+    """
+    stream = io.StringIO()
+    configure_logging("INFO", "tests.quiet=ERROR,tests.verbose=DEBUG", stream=stream)
+
+    logging.getLogger("tests.quiet").warning("dropped")
+    logging.getLogger("tests.verbose").debug("kept %d", 1)
+    try:
+        raise RuntimeError("boom")
+    except RuntimeError:
+        logging.getLogger("tests.verbose").exception("failed")
+    stop_logging()
+
+    entries = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [entry["message"] for entry in entries] == ["kept 1", "failed"]
+    assert "RuntimeError: boom" in entries[1]["exc_info"]
+
+
+def test_configure_logging_samples_payloads(restore_logging):
+    """
+    Test that payload logs are dropped at a sample rate of 0
+    """
+    stream = io.StringIO()
+    configure_logging("INFO", payload_sample_rate=0.0, json_output=False, stream=stream)
+
+    logging.getLogger(PAYLOAD_LOGGER).info("payload", extra={"payload": {}})
+    logging.getLogger("tests.verbose").info("request")
+    stop_logging()
+
+    assert "payload" not in stream.getvalue()
+    assert "request" in stream.getvalue()
@@ -0,0 +1,135 @@
+import json
+
+import pytest
+
+from helpers.metrics import _Metric, MultiProcessExporter, Registry, clear_directory, mark_process_dead, merge, render
+
+
+def test_counter_and_gauge():
+    """
+    Test counters and gauges with and without labels
+    """
+    registry = Registry()
+    requests = registry.counter("requests_total", "Requests", ("route",))
+    requests.labels("/help").inc()
+    requests.labels("/help").inc(2)
+    depth = registry.gauge("depth", "Depth")
+    depth.inc(3)
+    depth.dec()
+
+    assert dict(requests.samples()) == {("/help",): 3}
+    assert dict(depth.samples()) == {(): 2}
+    assert registry.counter("requests_total", "Requests", ("route",)) is requests
+
+
+def test_histogram_buckets():
+    """
+    Test that histogram observations land in the first matching bucket
+    """
+    registry = Registry()
+    latency = registry.histogram("latency", "Latency", buckets=(0.1, 1.0))
+    latency.observe(0.05)
+    latency.observe(0.5)
+    latency.observe(5)
+
+    snapshot = dict(latency.samples())[()]
+    assert snapshot["buckets"] == [(0.1, 1), (1.0, 1), (float("inf"), 1)]
+    assert snapshot["count"] == 3
+    assert snapshot["sum"] == pytest.approx(5.55)
+
+
+def test_label_and_kind_mismatch():
+    """
+    Test that label count and metric kind mismatches are rejected
+    """
+    registry = Registry()
+    requests = registry.counter("requests_total", "Requests", ("route",))
+    with pytest.raises(ValueError):
+        requests.labels()
+    with pytest.raises(ValueError):
+        registry.gauge("requests_total", "Requests")
+
+
+def test_metric_kinds_must_build_their_children():
+    """
+    Test that a metric family without a child type cannot be created
+    """
+    class Untyped(_Metric):
+        pass
+
+    with pytest.raises(TypeError):
+        Untyped("untyped", "Untyped")
+
+
+def test_render_text_format():
+    """
+    Test the Prometheus text format: escaped labels and cumulative histogram buckets
+    """
+    registry = Registry()
+    registry.counter("requests_total", "Requests", ("route",)).labels('say "hi"\n').inc()
+    latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    latency.observe(0.05)
+    latency.observe(0.5)
+
+    text = render(registry.dump())
+
+    assert text.splitlines() == [
+        "# HELP latency_seconds Latency",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{le="0.1"} 1',
+        'latency_seconds_bucket{le="1.0"} 2',
+        'latency_seconds_bucket{le="+Inf"} 2',
+        "latency_seconds_sum 0.55",
+        "latency_seconds_count 2",
+        "# HELP requests_total Requests",
+        "# TYPE requests_total counter",
+        'requests_total{route="say \\"hi\\"\\n"} 1.0',
+    ]
+
+
+def test_merge_adds_up_processes():
+    """
+    Test that merged dumps add up counters, gauges and histograms bucket by bucket
+    """
+    dumps = []
+    for observed in (0.05, 0.5):
+        registry = Registry()
+        registry.counter("requests_total", "Requests", ("route",)).labels("/help").inc()
+        registry.gauge("depth", "Depth").set(2)
+        registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0)).observe(observed)
+        dumps.append(json.loads(json.dumps(registry.dump())))
+
+    families = {family["name"]: dict((tuple(k), v) for k, v in family["samples"]) for family in merge(dumps)}
+
+    assert families["requests_total"] == {("/help",): 2}
+    assert families["depth"] == {(): 4}
+    assert families["latency_seconds"][()]["buckets"] == [(0.1, 1), (1.0, 1), (float("inf"), 0)]
+    assert families["latency_seconds"][()]["count"] == 2
+
+
+def test_multiprocess_exporter(tmp_path):
+    """
+    Test that a scrape adds up the files of every process, keeping only the counters of exited ones
+    """
+    exited_pid = 999999999
+    worker = Registry()
+    worker.counter("requests_total", "Requests").inc(3)
+    worker.gauge("depth", "Depth").set(5)
+    MultiProcessExporter(str(tmp_path), worker, pid=lambda: exited_pid).write()
+    registry = Registry()
+    registry.counter("requests_total", "Requests").inc()
+    registry.gauge("depth", "Depth").set(1)
+    exporter = MultiProcessExporter(str(tmp_path), registry)
+
+    def values():
+        return {family["name"]: family["samples"][0][1] for family in exporter.collect()}
+
+    assert values() == {"requests_total": 4, "depth": 1}
+
+    mark_process_dead(str(tmp_path), exited_pid)
+    assert not (tmp_path / f"{exited_pid}.json").exists()
+    registry.counter("requests_total", "Requests").inc()
+    assert values() == {"requests_total": 5, "depth": 1}
+
+    clear_directory(str(tmp_path))
+    assert [path.name for path in tmp_path.iterdir() if path.suffix == ".json"] == []
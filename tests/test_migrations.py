@@ -0,0 +1,181 @@
+import os
+import threading
+
+import pytest
+from sqlalchemy import create_engine, inspect, text
+
+from helpers.migrations import MIGRATIONS_DIR, discover, migrate
+
+
+def write_migrations(path, files):
+    for filename, sql in files.items():
+        (path / filename).write_text(sql)
+
+
+def test_discover_orders_by_version(tmp_path):
+    """
+    Test that migration files are ordered by version and other files are ignored
+    """
+    write_migrations(
+        tmp_path,
+        {
+            "0010_later.sql": "SELECT 1",
+            "0002_earlier.sql": "SELECT 1",
+            "README.md": "",
+        },
+    )
+
+    assert [(m.version, m.name) for m in discover(str(tmp_path))] == [(2, "earlier"), (10, "later")]
+
+
+def test_discover_rejects_duplicate_versions(tmp_path):
+    """
+    Test that two files with the same version are rejected
+    """
+    write_migrations(tmp_path, {"0001_a.sql": "SELECT 1", "001_b.sql": "SELECT 1"})
+
+    with pytest.raises(ValueError):
+        discover(str(tmp_path))
+
+
+def test_migrate_applies_pending_once(tmp_path):
+    """
+    Test that migrations are applied in order, recorded, and skipped on the next run
+    """
+    write_migrations(
+        tmp_path,
+        {
+            "0001_people.sql": "CREATE TABLE people (id INTEGER PRIMARY KEY, name TEXT)",
+            "0002_people_name.sql": "CREATE INDEX ix_people_name ON people (name)",
+        },
+    )
+    engine = create_engine("sqlite://")
+
+    assert [m.version for m in migrate(engine, str(tmp_path), target=1)] == [1]
+    assert [m.version for m in migrate(engine, str(tmp_path))] == [2]
+    assert migrate(engine, str(tmp_path)) == []
+
+    assert [ix["name"] for ix in inspect(engine).get_indexes("people")] == ["ix_people_name"]
+    with engine.connect() as connection:
+        rows = connection.execute(text("SELECT version, name FROM schema_migrations ORDER BY version"))
+        assert [tuple(row) for row in rows] == [(1, "people"), (2, "people_name")]
+
+
+def test_bundled_migrations_are_versioned():
+    """
+    Test that the bundled migrations start at 1 and have no gaps
+    """
+    versions = [m.version for m in discover(MIGRATIONS_DIR)]
+    assert versions == list(range(1, len(versions) + 1))
+
+
+# The tests below need a disposable local Postgres, see tests/test_query_plans.py
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+LEGACY_SCHEMA = "slackpoint_legacy_test"
+
+needs_postgres = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set to a local Postgres")
+
+# db/schema.sql as first released, before models.py declared slack_user_id unique
+LEGACY_TABLES = """
+CREATE TABLE task (
+   task_id SERIAL PRIMARY KEY,
+   description VARCHAR(255),
+   points INT,
+   deadline DATE,
+   created_on TIMESTAMP,
+   updated_on TIMESTAMP
+);
+
+CREATE TABLE "user" (
+   user_id INT PRIMARY KEY,
+   slack_user_id VARCHAR(255)
+);
+
+CREATE TABLE assignment (
+   user_id INT,
+   assignment_id INT PRIMARY KEY,
+   progress FLOAT,
+   assignment_created_on TIMESTAMP,
+   dassignment_updated_on TIMESTAMP,
+   FOREIGN KEY(user_id) REFERENCES "user"(user_id),
+   FOREIGN KEY(assignment_id) REFERENCES task(task_id)
+);
+ALTER TABLE task ADD COLUMN created_by INT;
+ALTER TABLE task ADD CONSTRAINT fk_task_user FOREIGN KEY(created_by) REFERENCES "user"(user_id);
+
+INSERT INTO "user" (user_id, slack_user_id) VALUES (1, 'U1'), (2, 'U2'), (3, 'U1');
+INSERT INTO task (description, points, created_by) VALUES ('A', 3, 3), ('B', 2, 2);
+INSERT INTO assignment (user_id, assignment_id, progress) VALUES (3, 1, 1), (1, 2, 1);
+"""
+
+
+@pytest.fixture
+def legacy_engine():
+    """
+    Get an engine bound to an empty Postgres schema, dropped afterwards
+    """
+    engine = create_engine(TEST_DATABASE_URL, connect_args={"options": f"-c search_path={LEGACY_SCHEMA}"})
+    with engine.begin() as connection:
+        connection.execute(text(f"DROP SCHEMA IF EXISTS {LEGACY_SCHEMA} CASCADE"))
+        connection.execute(text(f"CREATE SCHEMA {LEGACY_SCHEMA}"))
+    yield engine
+    with engine.begin() as connection:
+        connection.execute(text(f"DROP SCHEMA {LEGACY_SCHEMA} CASCADE"))
+    engine.dispose()
+
+
+@needs_postgres
+def test_migrate_fixes_a_database_created_from_the_legacy_schema(legacy_engine):
+    """
+    Test that the migrations merge duplicate users and make the upserts on slack_user_id work on the legacy schema
+    """
+    with legacy_engine.begin() as connection:
+        connection.exec_driver_sql(LEGACY_TABLES)
+
+    migrate(legacy_engine)
+
+    with legacy_engine.begin() as connection:
+        users = connection.execute(text('SELECT user_id, slack_user_id FROM "user" ORDER BY user_id')).all()
+        owners = connection.execute(text("SELECT user_id FROM assignment ORDER BY assignment_id")).scalars().all()
+        creators = connection.execute(text("SELECT created_by FROM task ORDER BY task_id")).scalars().all()
+        points = connection.execute(text("SELECT user_id, total_points FROM user_points ORDER BY user_id")).all()
+        upserted = connection.execute(
+            text(
+                'INSERT INTO "user" (slack_user_id) VALUES (:a), (:b) '
+                "ON CONFLICT (slack_user_id) DO NOTHING RETURNING user_id, slack_user_id"
+            ),
+            {"a": "U1", "b": "U9"},
+        ).all()
+
+    assert [tuple(row) for row in users] == [(1, "U1"), (2, "U2")]
+    assert owners == [1, 1]
+    assert creators == [1, 2]
+    assert [tuple(row) for row in points] == [(1, 5)]
+    # the conflicting row also draws from the new sequence, which starts above the existing user IDs
+    assert [row.slack_user_id for row in upserted] == ["U9"] and upserted[0].user_id > 3
+    columns = {column["name"] for column in inspect(legacy_engine).get_columns("assignment")}
+    assert "assignment_updated_on" in columns
+
+
+@needs_postgres
+def test_concurrent_migrations_apply_each_version_once(legacy_engine):
+    """
+    Test that processes migrating the same database at the same time take turns instead of failing
+    """
+    results = []
+    errors = []
+
+    def run():
+        try:
+            results.append(len(migrate(legacy_engine)))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(60)
+
+    assert errors == []
+    assert sorted(results) == [0, 0, 0, len(discover(MIGRATIONS_DIR))]
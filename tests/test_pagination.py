@@ -0,0 +1,47 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from helpers.pagination import fetch_page, next_page_block, parse_next_page
+
+
+def make_query(rows):
+    query = MagicMock()
+    query.filter.return_value.order_by.return_value.limit.return_value.all.return_value = rows
+    return query
+
+
+def test_fetch_page_with_more_rows():
+    """
+    Test that an extra row signals a next page starting after the last row of this page
+    """
+    rows = [MagicMock(task_id=i) for i in range(1, 5)]
+    page, next_after = fetch_page(make_query(rows), after=0, page_size=3)
+
+    assert [row.task_id for row in page] == [1, 2, 3]
+    assert next_after == 3
+
+
+def test_fetch_page_last_page():
+    """
+    Test that the last page has no next page
+    """
+    rows = [MagicMock(task_id=i) for i in range(1, 3)]
+    page, next_after = fetch_page(make_query(rows), after=0, page_size=3)
+
+    assert len(page) == 2
+    assert next_after is None
+
+
+def test_next_page_button_round_trip():
+    """
+    Test that the next page button value parses back into the listing and its parameters
+    """
+    block = next_page_block("points", 40, progress=1.0)
+    value = block["elements"][0]["value"]
+
+    assert parse_next_page(value) == ("points", 40, {"progress": 1.0})
+    with pytest.raises(ValueError):
+        parse_next_page('{"view": "me"}')
+    with pytest.raises(ValueError):
+        parse_next_page("not json")
@@ -0,0 +1,199 @@
+import importlib
+from unittest.mock import MagicMock
+
+import pytest
+from slack_sdk.errors import SlackApiError
+
+from helpers.metrics import Registry
+from helpers.ratelimit import BACKGROUND, INTERACTIVE, RateLimited, RateLimitedClient, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def make_scheduler(client, clock, registry=None, **kwargs):
+    return RateLimitedClient(
+        client, clock=clock, sleep=clock.sleep, registry=registry or Registry(), **kwargs
+    )
+
+
+def rate_limited_error(retry_after):
+    response = MagicMock(status_code=429, headers={"Retry-After": str(retry_after)})
+    return SlackApiError("ratelimited", response)
+
+
+def test_bucket_refills_at_its_rate():
+    """
+    Test that a bucket allows its burst, then one token per 1 / rate seconds
+    """
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2.0, capacity=2, clock=clock)
+
+    assert bucket.try_acquire() == 0
+    assert bucket.try_acquire() == 0
+    assert bucket.try_acquire() == pytest.approx(0.5)
+    clock.now += 0.5
+    assert bucket.try_acquire() == 0
+
+
+def test_background_leaves_reserve_and_yields():
+    """
+    Test that background calls leave the interactive reserve and wait while user-facing calls wait
+    """
+    clock = FakeClock()
+    bucket = TokenBucket(rate=1.0, capacity=4, clock=clock)
+    for _ in range(3):
+        assert bucket.try_acquire(BACKGROUND) == 0
+    assert bucket.try_acquire(BACKGROUND) > 0
+    assert bucket.try_acquire(INTERACTIVE) == 0
+
+    clock.now += 10
+    bucket.waiting(1)
+    assert bucket.try_acquire(BACKGROUND) > 0
+    bucket.waiting(-1)
+    assert bucket.try_acquire(BACKGROUND) == 0
+
+
+def test_calls_are_paced_by_tier():
+    """
+    Test that calls beyond a tier's burst wait for tokens and are counted as throttled
+    """
+    clock = FakeClock()
+    registry = Registry()
+    client = MagicMock()
+    # tier 2: 20 calls per minute, a burst of 5
+    scheduler = make_scheduler(client, clock, registry, max_wait=10)
+
+    for cursor in range(6):
+        scheduler.users_list(limit=1000, cursor=cursor)
+
+    assert client.users_list.call_count == 6
+    assert clock.sleeps == [pytest.approx(3.0)]
+    throttled = dict(registry.counter("slack_throttled_total", "").samples())
+    assert throttled[("users_list", "bucket")] == 1
+
+
+def test_interactive_call_is_rejected_beyond_max_wait():
+    """
+    Test that a user-facing call fails fast instead of waiting longer than allowed
+    """
+    clock = FakeClock()
+    registry = Registry()
+    client = MagicMock()
+    # tier 3 at one call per minute
+    scheduler = make_scheduler(client, clock, registry, rates={"tier3": 1}, max_wait=5)
+
+    scheduler.call("conversations_info", channel="C1")
+    with pytest.raises(RateLimited):
+        scheduler.call("conversations_info", channel="C2")
+
+    throttled = dict(registry.counter("slack_throttled_total", "").samples())
+    assert throttled[("conversations_info", "rejected")] == 1
+
+
+def test_retry_after_pauses_the_bucket():
+    """
+    Test that a 429 pauses the method's bucket for Retry-After and the call is retried
+    """
+    clock = FakeClock()
+    client = MagicMock()
+    client.users_info.side_effect = [rate_limited_error(3), {"ok": True}]
+    scheduler = make_scheduler(client, clock, max_wait=10)
+
+    assert scheduler.users_info(user="U1") == {"ok": True}
+
+    assert client.users_info.call_count == 2
+    assert clock.sleeps == [pytest.approx(3.0)]
+
+
+def test_retry_after_gives_up_after_retries():
+    """
+    Test that a call still rate limited after its retries raises the Slack error
+    """
+    clock = FakeClock()
+    client = MagicMock()
+    client.users_info.side_effect = rate_limited_error(1)
+    registry = Registry()
+    scheduler = make_scheduler(client, clock, registry, max_wait=10, max_retries=1)
+
+    with pytest.raises(SlackApiError):
+        scheduler.users_info(user="U1")
+
+    assert client.users_info.call_count == 2
+    rate_limited = dict(registry.counter("slack_rate_limited_total", "", ("method",)).samples())
+    assert rate_limited == {("users_info",): 2}
+
+
+def test_posts_are_limited_per_channel():
+    """
+    Test that posting in one channel does not use up the limit of another
+    """
+    clock = FakeClock()
+    client = MagicMock()
+    scheduler = make_scheduler(client, clock, rates={"post": 4})
+
+    scheduler.chat_postEphemeral(channel="C1", user="U1", text="a")
+    scheduler.chat_postEphemeral(channel="C2", user="U1", text="b")
+
+    assert client.chat_postEphemeral.call_count == 2
+    assert clock.sleeps == []
+
+
+def test_background_view_calls_at_background_priority():
+    """
+    Test that calls through the background view are scheduled at background priority
+    """
+    clock = FakeClock()
+    client = MagicMock()
+    scheduler = make_scheduler(client, clock)
+    scheduler.call = MagicMock()
+
+    scheduler.background.users_list(limit=1000)
+
+    scheduler.call.assert_called_once_with("users_list", BACKGROUND, limit=1000)
+
+
+def test_scale_divides_the_bucket_rates():
+    """
+    Test that each process only gets its share of a tier's rate and burst
+    """
+    scheduler = make_scheduler(MagicMock(), FakeClock(), scale=0.25)
+
+    bucket = scheduler._bucket("tier2")
+
+    assert bucket.rate == pytest.approx(20 * 0.25 / 60)
+    assert bucket.capacity == pytest.approx(1.25)
+
+
+def test_scale_defaults_to_the_share_of_each_web_worker(monkeypatch):
+    """
+    Test that the configured scale splits the workspace limits between the gunicorn workers
+    """
+    import configuration.env_config
+    import configuration.serving
+
+    monkeypatch.setenv("WEB_CONCURRENCY", "4")
+    monkeypatch.delenv("SLACK_RATE_LIMIT_SCALE", raising=False)
+    try:
+        importlib.reload(configuration.serving)
+        config = importlib.reload(configuration.env_config).Config
+        assert config.SLACK_RATE_LIMIT_SCALE == 0.25
+        scheduler = make_scheduler(MagicMock(), FakeClock(), scale=config.SLACK_RATE_LIMIT_SCALE)
+        assert scheduler._bucket("tier3").rate == pytest.approx(50 / 4 / 60)
+
+        monkeypatch.setenv("SLACK_RATE_LIMIT_SCALE", "1")
+        assert importlib.reload(configuration.env_config).Config.SLACK_RATE_LIMIT_SCALE == 1.0
+    finally:
+        monkeypatch.undo()
+        importlib.reload(configuration.serving)
+        importlib.reload(configuration.env_config)
@@ -0,0 +1,168 @@
+import threading
+from unittest.mock import MagicMock
+
+from helpers.metrics import Registry
+from helpers.roster import ChannelRoster
+from helpers.singleflight import SingleFlight
+from helpers.userdirectory import UserDirectory
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_client():
+    """
+    Get a mocked Slack client with a two page member list and a two page user list
+
+    :param:
+    :type:
+    :raise:
+    :return: Mocked Slack client
+    :rtype: MagicMock
+
+    """
+    client = MagicMock()
+    client.conversations_members.side_effect = [
+        {"members": ["U1", "U2"], "response_metadata": {"next_cursor": "abc"}},
+        {"members": ["U3"], "response_metadata": {"next_cursor": ""}},
+    ]
+    client.users_list.side_effect = [
+        {
+            "members": [
+                {"id": "U1", "real_name": "Neha"},
+                {"id": "U2", "real_name": "bot"},
+            ],
+            "response_metadata": {"next_cursor": "def"},
+        },
+        {
+            "members": [
+                {"id": "U3", "real_name": "Vansh"},
+                {"id": "U4", "real_name": "Dani"},
+                {"id": "U5"},
+            ],
+            "response_metadata": {"next_cursor": ""},
+        },
+    ]
+    return client
+
+
+def make_roster(client, clock):
+    return ChannelRoster(client, UserDirectory(client, clock=clock), ttl=60, clock=clock)
+
+
+def test_roster_pages_members_and_profiles():
+    """
+    Test that the roster pages through members and resolves names in bulk
+    """
+    client = make_client()
+    roster = make_roster(client, FakeClock())
+
+    users = roster.get("C1")
+
+    assert users == [
+        {"name": "Neha", "user_id": "U1"},
+        {"name": "Vansh", "user_id": "U3"},
+    ]
+    assert client.conversations_members.call_count == 2
+    assert client.users_list.call_count == 2
+    client.users_info.assert_not_called()
+
+
+def test_roster_served_from_cache_until_ttl():
+    """
+    Test that repeated reads are served from memory until the TTL expires
+    """
+    client = make_client()
+    clock = FakeClock()
+    roster = make_roster(client, clock)
+
+    roster.get("C1")
+    clock.now += 30
+    roster.get("C1")
+    assert client.conversations_members.call_count == 2
+
+    client.conversations_members.side_effect = [{"members": ["U1"]}]
+    clock.now += 31
+    assert roster.get("C1") == [{"name": "Neha", "user_id": "U1"}]
+    assert client.conversations_members.call_count == 3
+    assert client.users_list.call_count == 2
+
+
+def test_roster_counts_cache_hits_and_misses():
+    """
+    Test that reads served from memory are counted as hits and fetches as misses
+    """
+    client = make_client()
+    clock = FakeClock()
+    registry = Registry()
+    roster = ChannelRoster(client, UserDirectory(client, clock=clock), ttl=60, clock=clock, registry=registry)
+
+    roster.get("C1")
+    roster.get("C1")
+    client.conversations_members.side_effect = [{"members": ["U1"]}]
+    clock.now += 61
+    roster.get("C1")
+
+    lookups = dict(registry.counter("cache_requests_total", "", ("cache", "result")).samples())
+    assert lookups == {("roster", "hit"): 1, ("roster", "miss"): 2}
+
+
+def test_roster_applies_events():
+    """
+    Test that user_change and member_joined_channel events refresh the cached roster
+    """
+    client = make_client()
+    roster = make_roster(client, FakeClock())
+    roster.get("C1")
+
+    roster.directory.update({"id": "U1", "real_name": "Neha S"})
+    roster.handle_member_joined({"channel": "C1", "user": "U4"})
+
+    assert roster.get("C1") == [
+        {"name": "Neha S", "user_id": "U1"},
+        {"name": "Vansh", "user_id": "U3"},
+        {"name": "Dani", "user_id": "U4"},
+    ]
+
+    roster.handle_member_left({"channel": "C1", "user": "U3"})
+    assert [user["user_id"] for user in roster.get("C1")] == ["U1", "U4"]
+    assert client.conversations_members.call_count == 2
+
+
+def test_concurrent_misses_share_one_fetch():
+    """
+    Test that callers missing the same channel at the same time page through its members once
+    """
+    client = make_client()
+    release = threading.Event()
+    pages = client.conversations_members.side_effect
+
+    def slow_page(**kwargs):
+        release.wait(5)
+        return next(pages)
+
+    client.conversations_members.side_effect = slow_page
+    clock = FakeClock()
+    roster = ChannelRoster(
+        client, UserDirectory(client, clock=clock), clock=clock, flight=SingleFlight("roster", registry=Registry())
+    )
+    roster.directory.ensure_loaded()
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(roster.get("C1"))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    while roster.flight.shared.snapshot() < 3:
+        pass
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert client.conversations_members.call_count == 2
+    assert len(results) == 4
+    assert all(result == results[0] for result in results)
@@ -0,0 +1,106 @@
+import threading
+import time
+
+import pytest
+
+from helpers.metrics import Registry
+from helpers.singleflight import FileSingleFlight, SingleFlight
+
+
+def test_concurrent_callers_share_one_execution():
+    """
+    Test that callers arriving while a call of the same key runs get its result without running it again
+    """
+    flight = SingleFlight("test", registry=Registry())
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return ["U1", "U2"]
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.do("C1", fetch)))
+    leader.start()
+    started.wait(5)
+    followers = [threading.Thread(target=lambda: results.append(flight.do("C1", fetch))) for _ in range(3)]
+    for follower in followers:
+        follower.start()
+    while flight.shared.snapshot() < 3:
+        pass
+    release.set()
+    for thread in [leader] + followers:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert results == [["U1", "U2"]] * 4
+
+
+def test_errors_are_shared_and_not_cached():
+    """
+    Test that a failure reaches the waiting callers and the next call runs again
+    """
+    flight = SingleFlight("test", registry=Registry())
+
+    def fail():
+        raise RuntimeError("slack is down")
+
+    with pytest.raises(RuntimeError):
+        flight.do("C1", fail)
+
+    assert flight.do("C1", lambda: "ok") == "ok"
+
+
+def test_different_keys_run_separately():
+    """
+    Test that calls of different keys do not share results
+    """
+    flight = SingleFlight("test", registry=Registry())
+
+    assert flight.do("C1", lambda: 1) == 1
+    assert flight.do("C2", lambda: 2) == 2
+
+
+def test_file_single_flight_shares_across_processes(tmp_path):
+    """
+    Test that a caller waiting for another process's lock gets its result instead of running the function
+    """
+    # separate instances open the lock file separately, so they contend for it as worker processes would
+    first = FileSingleFlight("roster", str(tmp_path), registry=Registry())
+    second = FileSingleFlight("roster", str(tmp_path), registry=Registry())
+    started = threading.Event()
+    release = threading.Event()
+
+    def fetch():
+        started.set()
+        release.wait(5)
+        return ["U1", "U2"]
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(first.do("C1", fetch)))
+    leader.start()
+    started.wait(5)
+    follower = threading.Thread(target=lambda: results.append(second.do("C1", lambda: ["stale"])))
+    follower.start()
+    time.sleep(0.1)
+    release.set()
+    leader.join(5)
+    follower.join(5)
+
+    assert results == [["U1", "U2"], ["U1", "U2"]]
+    assert second.shared.snapshot() == 1
+
+
+def test_file_single_flight_does_not_reuse_old_results(tmp_path):
+    """
+    Test that a result written before a caller started waiting is not shared with it
+    """
+    ticks = iter(range(100))
+    flight = FileSingleFlight("roster", str(tmp_path), registry=Registry(), clock=lambda: next(ticks))
+
+    assert flight.do("C1", lambda: ["U1"]) == ["U1"]
+    assert flight.do("C1", lambda: ["U1", "U2"]) == ["U1", "U2"]
+    assert flight.shared.snapshot() == 0
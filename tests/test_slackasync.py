@@ -0,0 +1,197 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import MagicMock
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+from slack_sdk.errors import SlackApiError
+
+from helpers.metrics import Registry
+from helpers.ratelimit import RateLimited, RateLimitedClient
+from helpers.slackasync import AsyncSlack
+
+
+class SlackHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        # users.info sends its arguments in the query string
+        form = parse_qs(urlsplit(self.path).query)
+        form.update(parse_qs(self.rfile.read(int(self.headers.get("Content-Length", 0))).decode()))
+        user = form.get("user", [""])[0]
+        with self.server.lock:
+            self.server.requests += 1
+            rate_limited = user in self.server.rate_limited
+            self.server.rate_limited.discard(user)
+            self.server.in_flight += 1
+            self.server.max_in_flight = max(self.server.max_in_flight, self.server.in_flight)
+        time.sleep(0.05)
+        with self.server.lock:
+            self.server.in_flight -= 1
+        if rate_limited:
+            data = json.dumps({"ok": False, "error": "ratelimited"}).encode()
+            self.send_response(429)
+            self.send_header("Retry-After", "0")
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return
+        if user == "U404":
+            body = {"ok": False, "error": "user_not_found"}
+        else:
+            body = {"ok": True, "user": {"id": user, "real_name": f"Name {user}"}}
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    do_POST = do_GET
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    """
+    Get a local server standing in for users.info, answering after 50 ms
+    """
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), SlackHandler)
+    httpd.lock = threading.Lock()
+    httpd.in_flight = 0
+    httpd.max_in_flight = 0
+    httpd.requests = 0
+    # users answered once with a 429
+    httpd.rate_limited = set()
+    threading.Thread(target=httpd.serve_forever, args=(0.05,), daemon=True).start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def slack(server):
+    """
+    Get an async client of the local server allowing two calls in flight
+    """
+    client = AsyncSlack(
+        "xoxb-test", concurrency=2, base_url=f"http://127.0.0.1:{server.server_address[1]}/api/"
+    )
+    yield client
+    client.close()
+
+
+def test_call_many_bounds_concurrency(server, slack):
+    """
+    Test that calls run concurrently, never more than the concurrency at a time, with results in call order
+    """
+    users = [f"U{i}" for i in range(6)]
+
+    results = slack.call_many("users_info", [{"user": u} for u in users])
+
+    assert [result["user"]["id"] for result in results] == users
+    assert server.max_in_flight == 2
+
+
+def test_users_info_many_skips_failures(slack):
+    """
+    Test that a failed lookup is left out instead of failing the others
+    """
+    users, not_found = slack.users_info_many(["U1", "U404", "U2"])
+
+    assert [user["id"] for user in users] == ["U1", "U2"]
+    assert not_found == {"U404"}
+
+
+def test_users_info_many_does_not_report_rate_limited_users_as_unknown():
+    """
+    Test that only user_not_found answers count as unknown users, a RateLimited lookup is left to be retried
+    """
+    slack = AsyncSlack("xoxb-test")
+    not_found = SlackApiError("user_not_found", {"ok": False, "error": "user_not_found"})
+    results = [{"user": {"id": "U1", "real_name": "Neha"}}, RateLimited("users_info", 30), not_found]
+    slack.call_many = MagicMock(return_value=results)
+
+    users, unknown = slack.users_info_many(["U1", "U7", "U8"])
+
+    assert [user["id"] for user in users] == ["U1"]
+    assert unknown == {"U8"}
+
+
+def test_call_many_without_calls_starts_nothing():
+    """
+    Test that an empty fan out returns without starting the loop thread
+    """
+    slack = AsyncSlack("xoxb-test")
+
+    assert slack.call_many("users_info", []) == []
+    assert slack.client is None
+
+
+def test_ping_detects_a_blocked_loop(slack):
+    """
+    Test that ping fails while synchronous code blocks the loop thread, and passes again once it returns
+    """
+    assert slack.ping()
+    slack._start()
+    slack._loop.call_soon_threadsafe(time.sleep, 0.5)
+
+    assert not slack.ping(timeout=0.1)
+    time.sleep(0.5)
+    assert slack.ping()
+
+
+def make_scheduled(server, registry, **kwargs):
+    scheduler = RateLimitedClient(None, registry=registry, **kwargs)
+    client = AsyncSlack(
+        "xoxb-test",
+        base_url=f"http://127.0.0.1:{server.server_address[1]}/api/",
+        scheduler=scheduler,
+        registry=registry,
+        retry_handlers=[],
+    )
+    return client
+
+
+def test_scheduled_calls_take_tokens_of_the_shared_buckets(server):
+    """
+    Test that async calls are paced by the scheduler's buckets and rejected beyond its max wait
+    """
+    registry = Registry()
+    # 4 users.info calls a minute: a burst of one, then one every 15 seconds
+    slack = make_scheduled(server, registry, rates={"tier4": 4}, max_wait=0.2)
+    try:
+        results = slack.call_many("users_info", [{"user": "U1"}, {"user": "U2"}])
+    finally:
+        slack.close()
+
+    assert results[0]["user"]["id"] == "U1"
+    assert isinstance(results[1], RateLimited)
+    throttled = dict(registry.counter("slack_throttled_total", "", ("method", "reason")).samples())
+    assert throttled[("users_info", "rejected")] == 1
+
+
+def test_scheduled_calls_retry_429s_and_share_identical_calls(server):
+    """
+    Test that a 429 is counted and retried through the scheduler, and identical concurrent calls share one request
+    """
+    registry = Registry()
+    server.rate_limited.add("U1")
+    slack = make_scheduled(server, registry, max_wait=5)
+    try:
+        results = slack.call_many("users_info", [{"user": "U1"}, {"user": "U1"}, {"user": "U2"}])
+    finally:
+        slack.close()
+
+    assert [result["user"]["id"] for result in results] == ["U1", "U1", "U2"]
+    # U1 once rate limited and once answered, U2 once
+    assert server.requests == 3
+    rate_limited = dict(registry.counter("slack_rate_limited_total", "", ("method",)).samples())
+    assert rate_limited == {("users_info",): 1}
+    shared = dict(registry.counter("singleflight_shared_total", "", ("group",)).samples())
+    assert shared[("slack_async",)] == 1
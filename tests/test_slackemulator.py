@@ -0,0 +1,106 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from benchmarks.slackemulator import Latency, SlackEmulator, parse_overrides
+from helpers.metrics import Registry
+from helpers.ratelimit import RateLimitedClient
+from helpers.roster import ChannelRoster
+from helpers.slacktransport import ConnectionPool, PooledWebClient
+from helpers.userdirectory import UserDirectory
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def emulator():
+    """
+    Get a running Slack emulator with 30 users and 12 members per channel
+    """
+    emulator = SlackEmulator(users=30, members=12).start()
+    yield emulator
+    emulator.stop()
+
+
+def make_client(emulator):
+    return PooledWebClient("xoxb-test", pool=ConnectionPool(timeout=2), base_url=emulator.api_url)
+
+
+def test_directory_and_roster_page_through_emulator(emulator):
+    """
+    Test that the user directory and channel roster page through the emulated workspace
+    """
+    client = make_client(emulator)
+    directory = UserDirectory(client)
+    directory.page_size = 7
+    roster = ChannelRoster(client, directory)
+    roster.page_size = 5
+
+    users = roster.get("C1")
+
+    assert [user["user_id"] for user in users] == [f"U0SEED{n}" for n in range(1, 13)]
+    assert users[0]["name"] == "User 1"
+    assert emulator.requests == {"users.list": 5, "conversations.members": 3}
+
+
+def test_posts_and_unknown_users(emulator):
+    """
+    Test that posts are recorded and unknown users are reported as Slack does
+    """
+    client = make_client(emulator)
+
+    assert client.chat_postEphemeral(channel="C1", user="U0SEED1", text="hi")["ok"]
+    assert client.users_info(user="U0SEED3")["user"]["real_name"] == "User 3"
+    with pytest.raises(Exception, match="user_not_found"):
+        client.users_info(user="U0SEED31")
+    assert emulator.posts == [("chat.postEphemeral", {"channel": "C1", "user": "U0SEED1", "text": "hi"})]
+
+
+def test_injected_429_is_retried_after_retry_after():
+    """
+    Test that an injected 429 reaches the rate limit handling, which waits for Retry-After and retries
+    """
+    rng = MagicMock()
+    rng.random.side_effect = [0.1, 0.9]
+    emulator = SlackEmulator(users=5, ratelimit={"users.info": 0.5}, retry_after=2, rng=rng).start()
+    clock = FakeClock()
+    try:
+        client = RateLimitedClient(
+            make_client(emulator), max_wait=10, clock=clock, sleep=clock.sleep, registry=Registry()
+        )
+        assert client.users_info(user="U0SEED1")["ok"]
+    finally:
+        emulator.stop()
+
+    assert emulator.rate_limited == {"users.info": 1}
+    assert emulator.requests == {"users.info": 2}
+    assert clock.sleeps == [pytest.approx(2.0)]
+
+
+def test_latency_distributions():
+    """
+    Test that latencies parse into fixed, uniform and log-normal distributions, overridable per method
+    """
+    rng = MagicMock()
+    rng.uniform.return_value = 30.0
+    rng.lognormvariate.return_value = 40.0
+
+    overrides = parse_overrides(["50", "users.list=20-80", "users.info=lognormal:40:0.5"], Latency.parse)
+
+    assert overrides["*"].draw(rng) == 0.05
+    assert overrides["users.list"].draw(rng) == 0.03
+    rng.uniform.assert_called_once_with(20.0, 80.0)
+    assert overrides["users.info"].draw(rng) == 0.04
+    with pytest.raises(ValueError):
+        Latency.parse("lognormal:40")
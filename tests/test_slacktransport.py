@@ -0,0 +1,127 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from slack_sdk.errors import SlackApiError
+
+from helpers.slacktransport import ConnectionPool, PooledWebClient, PooledWebhookClient
+
+
+class SlackHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.server.clients.append(self.client_address)
+        status, headers, body = self.server.responses.pop(0) if self.server.responses else (200, {}, {"ok": True})
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+        # drop the connection without telling the client, as a load balancer closing an idle connection would
+        self.close_connection = self.server.drop_connections
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    """
+    Get a local HTTP/1.1 server standing in for the Slack API
+    """
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), SlackHandler)
+    httpd.clients = []
+    httpd.responses = []
+    httpd.drop_connections = False
+    thread = threading.Thread(target=httpd.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def base_url(server):
+    return f"http://127.0.0.1:{server.server_address[1]}/api/"
+
+
+def test_calls_reuse_one_connection(server):
+    """
+    Test that consecutive API calls are sent on one kept-alive connection
+    """
+    pool = ConnectionPool(timeout=2)
+    client = PooledWebClient("xoxb-test", pool=pool, base_url=base_url(server))
+
+    assert client.api_call("auth.test")["ok"]
+    assert client.api_call("auth.test")["ok"]
+
+    assert len(server.clients) == 2
+    assert server.clients[0] == server.clients[1]
+    pool.close()
+
+
+def test_stale_connection_is_replaced(server):
+    """
+    Test that a call on a connection the server has closed is sent again on a new one
+    """
+    server.drop_connections = True
+    pool = ConnectionPool(timeout=2)
+    client = PooledWebClient("xoxb-test", pool=pool, base_url=base_url(server), retry_handlers=[])
+
+    assert client.api_call("auth.test")["ok"]
+    assert client.api_call("auth.test")["ok"]
+
+    assert len(server.clients) == 2
+    assert server.clients[0] != server.clients[1]
+
+
+def test_error_status_raises(server):
+    """
+    Test that a rate limited call surfaces as a Slack API error when it is not retried
+    """
+    server.responses.append((429, {"Retry-After": "1"}, {"ok": False, "error": "ratelimited"}))
+    client = PooledWebClient("xoxb-test", pool=ConnectionPool(timeout=2), base_url=base_url(server), retry_handlers=[])
+
+    with pytest.raises(SlackApiError) as error:
+        client.api_call("chat.postEphemeral")
+
+    assert error.value.response.status_code == 429
+    assert error.value.response.headers["Retry-After"] == "1"
+
+
+def test_webhook_shares_the_pool(server):
+    """
+    Test that response_url replies go through the same pool as API calls
+    """
+    pool = ConnectionPool(timeout=2)
+    client = PooledWebClient("xoxb-test", pool=pool, base_url=base_url(server))
+    webhook = PooledWebhookClient(base_url(server) + "response", pool=pool)
+
+    assert client.api_call("auth.test")["ok"]
+    assert webhook.send(text="hello").status_code == 200
+
+    assert server.clients[0] == server.clients[1]
+
+
+def test_idle_connections_are_bounded():
+    """
+    Test that the pool closes connections beyond its size instead of keeping them idle
+    """
+    closed = []
+
+    class FakeConnection:
+        def close(self):
+            closed.append(self)
+
+    pool = ConnectionPool(maxsize=1)
+    key = ("http", "slack.test", None)
+    pool._checkin(key, FakeConnection())
+    pool._checkin(key, FakeConnection())
+
+    assert len(pool._idle[key]) == 1
+    assert len(closed) == 1
@@ -1,6 +1,7 @@
 import pytest
+from types import SimpleNamespace
 from unittest.mock import MagicMock, patch
-from commands.taskdone import TaskDone
+from commands.taskdone import MAX_TASK_IDS, TaskDone, parse_task_ids
 from helpers.errorhelper import ErrorHelper
 from models import Assignment, Task, User
 
@@ -23,8 +24,8 @@ def test_task_already_done(mock_db_session, mock_error_helper):
     """
     Test case for when the task is already completed.
     """
-    mock_db_session.query.return_value.scalar.return_value = True  # Task exists
-    mock_db_session.query.return_value.filter_by.return_value.all.return_value = []  # Task progress is not 0.0
+    # nothing updated, the task exists and is complete
+    mock_db_session.execute.return_value.all.side_effect = [[], [SimpleNamespace(task_id=123, progress=1.0)]]
 
     data = {"text": "123", "user_id": "U12345"}
     td = TaskDone(data)
@@ -37,8 +38,8 @@ def test_task_already_done1(mock_db_session, mock_error_helper):
     """
     Test case for when the task is already completed.
     """
-    mock_db_session.query.return_value.scalar.return_value = True  # Task exists
-    mock_db_session.query.return_value.filter_by.return_value.all.return_value = []  # Task progress is not 0.0
+    # nothing updated, the task exists and is complete
+    mock_db_session.execute.return_value.all.side_effect = [[], [SimpleNamespace(task_id=587, progress=1.0)]]
 
     data = {"text": "587", "user_id": "X45895"}
     td = TaskDone(data)
@@ -51,8 +52,8 @@ def test_task_already_done2(mock_db_session, mock_error_helper):
     """
     Test case for when the task is already completed.
     """
-    mock_db_session.query.return_value.scalar.return_value = True  # Task exists
-    mock_db_session.query.return_value.filter_by.return_value.all.return_value = []  # Task progress is not 0.0
+    # nothing updated, the task exists and is complete
+    mock_db_session.execute.return_value.all.side_effect = [[], [SimpleNamespace(task_id=256, progress=1.0)]]
 
     data = {"text": "256", "user_id": "U4702"}
     td = TaskDone(data)
@@ -65,8 +66,8 @@ def test_task_already_done3(mock_db_session, mock_error_helper):
     """
     Test case for when the task is already completed.
     """
-    mock_db_session.query.return_value.scalar.return_value = True  # Task exists
-    mock_db_session.query.return_value.filter_by.return_value.all.return_value = []  # Task progress is not 0.0
+    # nothing updated, the task exists and is complete
+    mock_db_session.execute.return_value.all.side_effect = [[], [SimpleNamespace(task_id=12345, progress=1.0)]]
 
     data = {"text": "12345", "user_id": "H89902"}
     td = TaskDone(data)
@@ -79,8 +80,8 @@ def test_task_already_done4(mock_db_session, mock_error_helper):
     """
     Test case for when the task is already completed.
     """
-    mock_db_session.query.return_value.scalar.return_value = True  # Task exists
-    mock_db_session.query.return_value.filter_by.return_value.all.return_value = []  # Task progress is not 0.0
+    # nothing updated, the task exists and is complete
+    mock_db_session.execute.return_value.all.side_effect = [[], [SimpleNamespace(task_id=234, progress=1.0)]]
 
     data = {"text": "234", "user_id": "D80902"}
     td = TaskDone(data)
@@ -93,8 +94,8 @@ def test_task_already_done5(mock_db_session, mock_error_helper):
     """
     Test case for when the task is already completed.
     """
-    mock_db_session.query.return_value.scalar.return_value = True  # Task exists
-    mock_db_session.query.return_value.filter_by.return_value.all.return_value = []  # Task progress is not 0.0
+    # nothing updated, the task exists and is complete
+    mock_db_session.execute.return_value.all.side_effect = [[], [SimpleNamespace(task_id=4576, progress=1.0)]]
 
     data = {"text": "4576", "user_id": "Ulj802"}
     td = TaskDone(data)
@@ -106,42 +107,120 @@ def test_task_already_done5(mock_db_session, mock_error_helper):
 
 @patch('commands.taskdone.db.session')
 def test_no_task_id(mock_db_session):
-    mock_db_session.query.return_value.scalar.return_value = False  # Task ID does not exist
+    mock_db_session.execute.return_value.all.return_value = []  # Task ID does not exist
     data = {"text": "999", "user_id": "U12345"}
     td = TaskDone(data)
     assert td.update_points() == "The given Task ID does not exist! Please try again..."
 
 @patch('commands.taskdone.db.session')
 def test_no_task_id1(mock_db_session):
-    mock_db_session.query.return_value.scalar.return_value = False  # Task ID does not exist
+    mock_db_session.execute.return_value.all.return_value = []  # Task ID does not exist
     data = {"text": "529", "user_id": "A0987"}
     td = TaskDone(data)
     assert td.update_points() == "The given Task ID does not exist! Please try again..."
 
 @patch('commands.taskdone.db.session')
 def test_no_task_id2(mock_db_session):
-    mock_db_session.query.return_value.scalar.return_value = False  # Task ID does not exist
+    mock_db_session.execute.return_value.all.return_value = []  # Task ID does not exist
     data = {"text": "3032", "user_id": "J8037"}
     td = TaskDone(data)
     assert td.update_points() == "The given Task ID does not exist! Please try again..."
 
 @patch('commands.taskdone.db.session')
 def test_no_task_id3(mock_db_session):
-    mock_db_session.query.return_value.scalar.return_value = False  # Task ID does not exist
+    mock_db_session.execute.return_value.all.return_value = []  # Task ID does not exist
     data = {"text": "6782", "user_id": "S080037"}
     td = TaskDone(data)
     assert td.update_points() == "The given Task ID does not exist! Please try again..."
 
 @patch('commands.taskdone.db.session')
 def test_no_task_id4(mock_db_session):
-    mock_db_session.query.return_value.scalar.return_value = False  # Task ID does not exist
+    mock_db_session.execute.return_value.all.return_value = []  # Task ID does not exist
     data = {"text": "1545", "user_id": "G0890"}
     td = TaskDone(data)
     assert td.update_points() == "The given Task ID does not exist! Please try again..."
 
 @patch('commands.taskdone.db.session')
 def test_no_task_id5(mock_db_session):
-    mock_db_session.query.return_value.scalar.return_value = False  # Task ID does not exist
+    mock_db_session.execute.return_value.all.return_value = []  # Task ID does not exist
     data = {"text": "689", "user_id": "Mh7990"}
     td = TaskDone(data)
-    assert td.update_points() == "The given Task ID does not exist! Please try again..."
\ No newline at end of file
+    assert td.update_points() == "The given Task ID does not exist! Please try again..."
+
+
+@patch('commands.taskdone.db.session')
+def test_task_done_credits_points(mock_db_session):
+    """
+    Test case for when the assignee completes a pending task in one statement.
+    """
+    mock_db_session.execute.return_value.all.return_value = [SimpleNamespace(assignment_id=42, user_id=7, points=5)]
+    data = {"text": "42", "user_id": "U12345"}
+    td = TaskDone(data)
+
+    with patch('commands.taskdone.Leaderboard.credit_points') as credit_points:
+        assert td.update_points() == "Congratulations your task is completed now!"
+
+    credit_points.assert_called_once_with(7, 5)
+    mock_db_session.execute.assert_called_once()
+    mock_db_session.commit.assert_called_once()
+
+
+@patch('commands.taskdone.db.session')
+def test_task_cannot_be_updated_by_other_user(mock_db_session):
+    """
+    Test case for when the task is pending but assigned to someone else.
+    """
+    mock_db_session.execute.return_value.all.side_effect = [[], [SimpleNamespace(task_id=42, progress=0.0)]]
+    data = {"text": "42", "user_id": "U99999"}
+    td = TaskDone(data)
+
+    assert td.update_points() == ErrorHelper().get_command_help("task_cannot_be_updated")
+    mock_db_session.commit.assert_not_called()
+
+
+def test_parse_task_ids():
+    """
+    Test case for parsing ID lists and ranges, keeping the given order without duplicates.
+    """
+    assert parse_task_ids("12 13 14-16") == [12, 13, 14, 15, 16]
+    assert parse_task_ids(" 7,3, 7 5-5 ") == [7, 3, 5]
+    for text in ["", "abc", "5-3", "1-2-3", f"1-{MAX_TASK_IDS + 1}"]:
+        with pytest.raises(ValueError):
+            parse_task_ids(text)
+
+
+@patch('commands.taskdone.db.session')
+def test_invalid_task_ids(mock_db_session):
+    """
+    Test case for when the command text is not a list of IDs.
+    """
+    td = TaskDone({"text": "twelve", "user_id": "U12345"})
+
+    assert td.update_points() == ErrorHelper().get_command_help("task_ids_invalid")
+    mock_db_session.execute.assert_not_called()
+
+
+@patch('commands.taskdone.db.session')
+def test_bulk_task_done_summary(mock_db_session):
+    """
+    Test case for completing several tasks with one update and one lookup of the missed IDs.
+    """
+    mock_db_session.execute.return_value.all.side_effect = [
+        [SimpleNamespace(assignment_id=12, user_id=7, points=3), SimpleNamespace(assignment_id=14, user_id=7, points=2)],
+        [SimpleNamespace(task_id=13, progress=1.0), SimpleNamespace(task_id=15, progress=0.0)],
+    ]
+    td = TaskDone({"text": "12 13-16", "user_id": "U12345"})
+
+    with patch('commands.taskdone.Leaderboard.credit_points') as credit_points:
+        summary = td.update_points()
+
+    assert summary.split("\n") == [
+        "2 of 5 tasks completed.",
+        "Completed: #12, #14",
+        "Already completed: #13",
+        "Not assigned to you: #15",
+        "Not found: #16",
+    ]
+    assert mock_db_session.execute.call_count == 2
+    credit_points.assert_called_once_with(7, 5)
+    mock_db_session.commit.assert_called_once()
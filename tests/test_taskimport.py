@@ -0,0 +1,181 @@
+import datetime
+import io
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from helpers.taskimport import ImportReport, TaskImporter, detect_format, parse_row, read_rows
+
+CSV = """description,points,deadline,assignee
+Write the report,3,2024-03-01,U1
+Fix the build,x,2024-03-01,
+"Plan the
+sprint",2,2024-03-02,
+Review,1,2024-03-31,bob
+"""
+
+
+def test_read_rows_csv_and_jsonl():
+    """
+    Test that rows are read with their line numbers, and unreadable JSON lines become errors
+    """
+    rows = list(read_rows(io.StringIO(CSV, newline=""), "csv"))
+    jsonl = list(read_rows(io.StringIO('{"description": "A"}\n\nnot json\n[1]\n'), "jsonl"))
+
+    assert [line for line, _ in rows] == [2, 3, 5, 6]
+    assert rows[2][1]["description"] == "Plan the\nsprint"
+    assert jsonl[0] == (1, {"description": "A"})
+    assert jsonl[1][0] == 3 and jsonl[1][1].startswith("invalid JSON")
+    assert jsonl[2] == (4, "expected a JSON object")
+    assert detect_format("backlog.ndjson") == "jsonl"
+    with pytest.raises(ValueError):
+        detect_format("backlog.xlsx")
+
+
+def test_parse_row():
+    """
+    Test that a row is validated and converted, and each invalid value is reported
+    """
+    row = {"description": " Write ", "points": "3", "deadline": "2024-03-01", "assignee": ""}
+
+    assert parse_row(row) == ("Write", 3, datetime.date(2024, 3, 1), None)
+    for bad in ({"description": ""}, {"points": "0"}, {"deadline": "01/03/2024"}, {"assignee": "bob"}):
+        with pytest.raises(ValueError):
+            parse_row({**row, **bad})
+
+
+@patch("helpers.taskimport.upsert_users")
+@patch("helpers.taskimport.db.session")
+def test_import_inserts_valid_rows_in_chunks(mock_db_session, mock_upsert_users):
+    """
+    Test that valid rows are inserted a chunk per transaction and invalid ones are reported by line
+    """
+    mock_upsert_users.return_value = {"UCREATOR": 1, "U1": 2}
+    mock_db_session.execute.return_value.scalars.return_value.all.side_effect = [[10], [11]]
+
+    report = TaskImporter("UCREATOR", chunk_size=1).run(read_rows(io.StringIO(CSV, newline=""), "csv"))
+
+    assert report.to_dict() == {
+        "imported": 2,
+        "failed": 2,
+        "errors": [
+            {"line": 3, "error": "points must be a whole number, got 'x'"},
+            {"line": 6, "error": "assignee must be a Slack user ID, got 'bob'"},
+        ],
+        "last_line": 6,
+        "aborted": None,
+    }
+    assert mock_db_session.commit.call_count == 2
+    # tasks and assignments of each chunk go in one executemany each
+    assignments = [c.args[1] for c in mock_db_session.execute.call_args_list[1::2]]
+    assert assignments == [
+        [{"assignment_id": 10, "user_id": 2, "progress": 0.0}],
+        [{"assignment_id": 11, "user_id": None, "progress": 0.0}],
+    ]
+
+
+@patch("helpers.taskimport.upsert_users")
+@patch("helpers.taskimport.db.session")
+def test_import_checks_assignees_and_rolls_back_failed_chunk(mock_db_session, mock_upsert_users):
+    """
+    Test that assignees missing from the workspace are reported, and a database error rolls back its chunk and stops
+    the import with a partial report
+    """
+    directory = MagicMock()
+    directory.get.side_effect = lambda slack_id: None if slack_id == "U9" else SimpleNamespace(assignable=True)
+    mock_upsert_users.side_effect = RuntimeError("database is down")
+    rows = [
+        (1, {"description": "A", "points": 1, "deadline": "2024-03-01", "assignee": "U9"}),
+        (2, {"description": "B", "points": 1, "deadline": "2024-03-01", "assignee": "U1"}),
+        (3, {"description": "C", "points": 1, "deadline": "2024-03-01", "assignee": "U1"}),
+    ]
+    importer = TaskImporter("UCREATOR", chunk_size=1, directory=directory)
+    report = ImportReport()
+
+    importer.run(iter(rows), report)
+
+    assert report.errors == [
+        {"line": 1, "error": "assignee U9 is not an assignable user of the workspace"},
+        {"line": 2, "error": "not imported, its chunk failed with RuntimeError"},
+    ]
+    assert report.imported == 0
+    assert report.chunk_failed
+    assert report.aborted == "RuntimeError while inserting lines 2-2"
+    assert report.last_line == 2
+    mock_db_session.rollback.assert_called_once()
+    mock_db_session.commit.assert_not_called()
+
+
+@patch("helpers.taskimport.upsert_users")
+@patch("helpers.taskimport.db.session")
+def test_import_stops_between_chunks_when_time_runs_out(mock_db_session, mock_upsert_users):
+    """
+    Test that an import with a time limit stops between chunks and reports the last line it read
+    """
+    mock_upsert_users.return_value = {"UCREATOR": 1}
+    mock_db_session.execute.return_value.scalars.return_value.all.return_value = [10]
+    clock = MagicMock(side_effect=[0.0, 0.0, 5.0])
+    rows = [(line, {"description": "A", "points": 1, "deadline": "2024-03-01"}) for line in (2, 3, 4)]
+
+    report = TaskImporter("UCREATOR", chunk_size=1, max_seconds=5, clock=clock).run(iter(rows))
+
+    assert report.imported == 1
+    assert not report.chunk_failed
+    assert report.aborted == "time limit of 5 s reached, rows after line 2 were not read"
+    assert mock_db_session.commit.call_count == 1
+
+
+@pytest.mark.parametrize(
+    "body, error",
+    [
+        (b"description,points,deadline\nA,1,2024-03-01\nB,1,2024-03-01\nC long enough\x00,1,2024-03-01\n", "Error"),
+        (b"description,points,deadline\nA,1,2024-03-01\nB,1,2024-03-01\nC long enough\xff,1,2024-03-01\n", "UnicodeDecodeError"),
+    ],
+    ids=["nul-byte", "invalid-utf-8"],
+)
+@patch("helpers.taskimport.upsert_users")
+@patch("helpers.taskimport.db.session")
+def test_import_stops_with_a_partial_report_when_the_file_cannot_be_read(
+    mock_db_session, mock_upsert_users, body, error
+):
+    """
+    Test that a file that cannot be read further keeps the rows read before, and reports where it stopped
+    """
+    mock_upsert_users.return_value = {"UCREATOR": 1}
+    mock_db_session.execute.return_value.scalars.return_value.all.side_effect = [[10], [11]]
+    # a small buffer, so that the decoding error surfaces after the first rows were read
+    stream = io.TextIOWrapper(io.BufferedReader(io.BytesIO(body), buffer_size=8), encoding="utf-8", newline="")
+    stream._CHUNK_SIZE = 8
+
+    report = TaskImporter("UCREATOR", chunk_size=1).run(read_rows(stream, "csv"))
+
+    assert report.imported == 2
+    assert report.last_line == 3
+    assert report.aborted.startswith(f"{error} reading the rows after line 3")
+    assert report.unreadable and not report.chunk_failed
+    assert mock_db_session.commit.call_count == 2
+
+
+@patch("helpers.taskimport.upsert_users")
+@patch("helpers.taskimport.db.session")
+def test_import_inserts_the_rows_read_before_a_directory_error(mock_db_session, mock_upsert_users):
+    """
+    Test that an error looking up an assignee stops the import after inserting the rows validated before it
+    """
+    mock_upsert_users.return_value = {"UCREATOR": 1, "U1": 2}
+    mock_db_session.execute.return_value.scalars.return_value.all.return_value = [10]
+    directory = MagicMock()
+    directory.get.side_effect = [SimpleNamespace(assignable=True), RuntimeError("slack down")]
+    rows = [
+        (2, {"description": "A", "points": 1, "deadline": "2024-03-01", "assignee": "U1"}),
+        (3, {"description": "B", "points": 1, "deadline": "2024-03-01", "assignee": "U2"}),
+    ]
+
+    report = TaskImporter("UCREATOR", directory=directory).run(iter(rows))
+
+    assert report.imported == 1
+    assert report.last_line == 2
+    assert report.aborted == "RuntimeError reading the rows after line 2: slack down, they were not imported"
+    assert report.read_failed and not report.unreadable
+    mock_db_session.commit.assert_called_once()
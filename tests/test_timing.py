@@ -0,0 +1,121 @@
+import logging
+from unittest.mock import MagicMock
+
+import pytest
+from flask import Flask
+from sqlalchemy import create_engine, text
+
+from helpers import timing
+from helpers.metrics import Registry
+
+
+@pytest.fixture(autouse=True)
+def no_request():
+    yield
+    timing.finish_request()
+
+
+def test_phases_add_up_per_request():
+    """
+    Test that phase time is only recorded while a request is timed, and adds up per phase
+    """
+    timing.record(timing.DB, 1.0)
+    current = timing.start_request()
+    timing.record(timing.DB, 0.002)
+    timing.record(timing.DB, 0.003)
+    with timing.phase(timing.RENDER):
+        pass
+
+    assert timing.finish_request() is current
+    assert current.durations[timing.DB] == pytest.approx(0.005)
+    assert current.counts == {"db": 2, "slack": 0, "render": 1}
+    assert current.server_timing(0.01).startswith('db;dur=5.0;desc="2 calls", render;dur=')
+    assert current.server_timing(0.01).endswith(", total;dur=10.0")
+
+
+def test_engine_statements_are_timed():
+    """
+    Test that successful and failed statements are timed as the db phase and observed in the histogram
+    """
+    registry = Registry()
+    engine = create_engine("sqlite://")
+    timing.instrument_engine(engine, registry)
+    current = timing.start_request()
+
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+        with pytest.raises(Exception):
+            connection.execute(text("SELECT * FROM missing"))
+        assert connection.info["query_start"] == []
+
+    assert current.counts[timing.DB] == 2
+    assert registry.histogram("db_query_seconds", "").labels().snapshot()["count"] == 2
+
+
+def test_timed_client_times_calls_by_method():
+    """
+    Test that Slack calls through the wrapper are timed as the slack phase, by method, background calls included
+    """
+    registry = Registry()
+    client = MagicMock()
+    timed = timing.TimedClient(client, registry)
+    current = timing.start_request()
+
+    timed.users_info(user="U1")
+    timed.call("users_list", limit=10)
+    timed.background.chat_postMessage(channel="C1", text="hi")
+
+    client.users_info.assert_called_once_with(user="U1")
+    client.background.chat_postMessage.assert_called_once_with(channel="C1", text="hi")
+    assert current.counts[timing.SLACK] == 3
+    methods = {key[0] for key, _ in registry.histogram("slack_call_seconds", "", ("method",)).samples()}
+    assert methods == {"users_info", "users_list", "chat_postMessage"}
+
+
+def test_requests_get_server_timing_and_log_line(caplog):
+    """
+    Test that responses carry the Server-Timing header, and requests are logged and observed by endpoint
+    """
+    registry = Registry()
+    app = Flask(__name__)
+    timing.init_app(app, registry)
+
+    @app.route("/render")
+    def render():
+        timing.record(timing.DB, 0.004)
+        return "ok"
+
+    with caplog.at_level(logging.INFO, logger=timing.TIMING_LOGGER):
+        response = app.test_client().get("/render")
+
+    assert response.headers["Server-Timing"].startswith('db;dur=4.0;desc="1 call", total;dur=')
+    record = caplog.records[-1]
+    assert record.endpoint == "render"
+    assert record.phases_ms["db"] == 4.0
+    durations = dict(registry.histogram("request_duration_seconds", "", ("endpoint", "status")).samples())
+    assert durations[("render", "200")]["count"] == 1
+    phases = dict(registry.histogram("request_phase_seconds", "", ("endpoint", "phase")).samples())
+    assert {key: snapshot["count"] for key, snapshot in phases.items()} == {("render", "db"): 1}
+
+
+def test_slash_commands_are_observed_by_command(monkeypatch):
+    """
+    Test that slash commands are observed by command, with the number of distinct commands bounded
+    """
+    monkeypatch.setattr(timing, "MAX_COMMAND_LABELS", 2)
+    registry = Registry()
+    app = Flask(__name__)
+    timing.init_app(app, registry, header=False)
+
+    @app.route("/command", methods=["POST"])
+    def command():
+        return "ok"
+
+    client = app.test_client()
+    for name in ("/help", "/help", "/taskdone", "/random"):
+        client.post("/command", data={"command": name})
+    client.post("/command", json={"command": "/json"})
+
+    commands = dict(registry.histogram("slash_command_duration_seconds", "", ("command", "status")).samples())
+    counts = {key: snapshot["count"] for key, snapshot in commands.items()}
+    assert counts == {("/help", "200"): 2, ("/taskdone", "200"): 1, ("other", "200"): 1}
@@ -0,0 +1,24 @@
+from types import SimpleNamespace
+from unittest.mock import call, patch
+
+from commands.updatetask import UpdateTask
+
+
+@patch('commands.updatetask.db.session')
+def test_update_completed_task_moves_points_read_under_lock(mock_db_session):
+    """
+    Test that updating a completed task reads its points and assignee under a row lock, and moves the points
+    """
+    row = mock_db_session.query.return_value.filter_by.return_value.first.return_value
+    row.user_id = 1
+    row.created_by = 1
+    locked = mock_db_session.query.return_value.join.return_value.filter.return_value.with_for_update
+    locked.return_value.first.return_value = SimpleNamespace(points=3, user_id=5, progress=1.0)
+
+    ut = UpdateTask("U1", {"text": "7"}, [])
+    with patch('commands.updatetask.Leaderboard.credit_points') as credit_points:
+        ut.update_task(7, "Write the report", "4", "2024-03-01", "U2")
+
+    locked.assert_called_once_with()
+    assert credit_points.call_args_list == [call(5, -3), call(1, 4)]
+    mock_db_session.commit.assert_called()
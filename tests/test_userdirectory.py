@@ -0,0 +1,172 @@
+import threading
+import time
+from unittest.mock import MagicMock
+
+from helpers.metrics import Registry
+from helpers.userdirectory import UserDirectory, UserRecord
+
+
+def make_client():
+    """
+    Get a mocked Slack client listing three users over two pages
+
+    :param:
+    :type:
+    :raise:
+    :return: Mocked Slack client
+    :rtype: MagicMock
+
+    """
+    client = MagicMock()
+    client.users_list.side_effect = [
+        {
+            "members": [
+                {"id": "U1", "real_name": "Neha", "profile": {"display_name": "neha"}},
+                {"id": "U2", "real_name": "bot", "profile": {}},
+            ],
+            "response_metadata": {"next_cursor": "abc"},
+        },
+        {
+            "members": [{"id": "U3", "real_name": "Vansh", "deleted": True}],
+            "response_metadata": {"next_cursor": ""},
+        },
+    ]
+    return client
+
+
+def test_directory_loads_lazily_once():
+    """
+    Test that the directory loads on first lookup and then answers from memory
+    """
+    client = make_client()
+    directory = UserDirectory(client)
+    client.users_list.assert_not_called()
+
+    assert directory.name("U1") == "Neha"
+    assert directory.get("U1").display_name == "neha"
+    assert directory.get("U2").assignable is False
+    assert directory.get("U3").assignable is False
+    assert directory.get("U9") is None
+    assert client.users_list.call_count == 2
+    client.users_info.assert_not_called()
+
+
+def test_directory_update_from_event():
+    """
+    Test that user objects from Slack events replace or add records
+    """
+    client = make_client()
+    directory = UserDirectory(client)
+    directory.ensure_loaded()
+
+    directory.update({"id": "U1", "real_name": "Neha S", "profile": {"display_name": "ns"}})
+    directory.update({"id": "U4", "real_name": "Dani"})
+
+    assert directory.name("U1") == "Neha S"
+    assert directory.get("U4").display_name is None
+    assert directory.get("U4").assignable is True
+    assert client.users_list.call_count == 2
+
+
+def test_user_record_has_no_instance_dict():
+    """
+    Test that directory records are slotted
+    """
+    record = UserRecord.from_slack({"id": "U1", "real_name": "Neha"})
+    assert not hasattr(record, "__dict__")
+
+
+def test_directory_loads_missing_users():
+    """
+    Test that users missing from the index are looked up once with fetch_users, and unknown ones are remembered
+    """
+    client = make_client()
+    fetch_users = MagicMock(return_value=([{"id": "U7", "real_name": "Sam"}], {"U8"}))
+    directory = UserDirectory(client, fetch_users=fetch_users)
+
+    directory.load_missing(["U1", "U7", "U8"])
+    directory.load_missing(["U1", "U7", "U8"])
+
+    fetch_users.assert_called_once_with(["U7", "U8"])
+    assert directory.name("U7") == "Sam"
+    assert directory.get("U8") is None
+
+
+def test_directory_looks_up_again_users_whose_lookup_failed():
+    """
+    Test that a user whose lookup was rate limited is not remembered as unknown, and is looked up on the next call
+    """
+    client = make_client()
+    fetch_users = MagicMock(
+        side_effect=[([], {"U8"}), ([{"id": "U7", "real_name": "Sam"}], set())]
+    )
+    directory = UserDirectory(client, fetch_users=fetch_users)
+
+    directory.load_missing(["U7", "U8"])
+    assert directory.get("U7") is None
+    directory.load_missing(["U7", "U8"])
+
+    assert fetch_users.call_args_list[1][0][0] == ["U7"]
+    assert directory.name("U7") == "Sam"
+
+
+def test_directory_without_fetch_users_skips_lookups():
+    """
+    Test that missing users are not looked up when no fetch_users is configured
+    """
+    client = make_client()
+    directory = UserDirectory(client)
+
+    directory.load_missing(["U7"])
+
+    client.users_list.assert_not_called()
+    client.users_info.assert_not_called()
+
+
+def test_directory_concurrent_lookups_share_one_reload():
+    """
+    Test that lookups arriving while the directory reloads wait for that reload instead of listing the users again
+    """
+    listing = threading.Event()
+    release = threading.Event()
+    client = MagicMock()
+
+    def users_list(**kwargs):
+        listing.set()
+        release.wait(5)
+        return {"members": [{"id": "U1", "real_name": "Neha"}], "response_metadata": {"next_cursor": ""}}
+
+    client.users_list.side_effect = users_list
+    directory = UserDirectory(client, registry=Registry())
+    names = []
+    threads = [threading.Thread(target=lambda: names.append(directory.name("U1"))) for _ in range(3)]
+    threads[0].start()
+    assert listing.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert names == ["Neha"] * 3
+    client.users_list.assert_called_once()
+
+
+def test_directory_keeps_updates_made_during_a_reload():
+    """
+    Test that an event applied while users.list runs is not overwritten by the older snapshot
+    """
+    client = MagicMock()
+    directory = UserDirectory(client)
+
+    def users_list(**kwargs):
+        directory.update({"id": "U1", "real_name": "Neha S"})
+        return {"members": [{"id": "U1", "real_name": "Neha"}], "response_metadata": {"next_cursor": ""}}
+
+    client.users_list.side_effect = users_list
+    directory.ensure_loaded()
+
+    assert directory.name("U1") == "Neha S"
+    directory.update({"id": "U1", "real_name": "Neha K"})
+    assert directory.name("U1") == "Neha K"
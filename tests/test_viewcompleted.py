@@ -26,7 +26,7 @@ def test_view_completed_2tasks(
 
     """
     # Mocking DB call
-    mock_get_sqlalchemy.join.return_value.add_columns.return_value.filter.return_value.all.return_value = [
+    mock_get_sqlalchemy.join.return_value.add_columns.return_value.filter.return_value.filter.return_value.order_by.return_value.limit.return_value.all.return_value = [
         mock_completed_task_3,
         mock_completed_task_4,
     ]
@@ -73,7 +73,7 @@ def test_view_completed_0tasks(
 
     """
     # Mocking DB call
-    mock_get_sqlalchemy.join.return_value.add_columns.return_value.filter.return_value.all.return_value = (
+    mock_get_sqlalchemy.join.return_value.add_columns.return_value.filter.return_value.filter.return_value.order_by.return_value.limit.return_value.all.return_value = (
         []
     )
 
@@ -103,7 +103,7 @@ def test_view_completed_1task(mock_completed_task_3, mock_get_sqlalchemy):
     Test the view completed command with one task.
     """
     # Mocking DB call
-    mock_get_sqlalchemy.join.return_value.add_columns.return_value.filter.return_value.all.return_value = [
+    mock_get_sqlalchemy.join.return_value.add_columns.return_value.filter.return_value.filter.return_value.order_by.return_value.limit.return_value.all.return_value = [
         mock_completed_task_3,
     ]
 
@@ -133,7 +133,7 @@ def test_view_completed_1task_different_task(mock_completed_task_4, mock_get_sql
     Test the view completed command with one task (different from the original).
     """
     # Mocking DB call
-    mock_get_sqlalchemy.join.return_value.add_columns.return_value.filter.return_value.all.return_value = [
+    mock_get_sqlalchemy.join.return_value.add_columns.return_value.filter.return_value.filter.return_value.order_by.return_value.limit.return_value.all.return_value = [
         mock_completed_task_4,
     ]
 
@@ -163,7 +163,7 @@ def test_view_completed_1task_different_task1(mock_completed_task_4, mock_get_sq
     Test the view completed command with one task (different from the original).
     """
     # Mocking DB call
-    mock_get_sqlalchemy.join.return_value.add_columns.return_value.filter.return_value.all.return_value = [
+    mock_get_sqlalchemy.join.return_value.add_columns.return_value.filter.return_value.filter.return_value.order_by.return_value.limit.return_value.all.return_value = [
         mock_completed_task_4,
     ]
 
@@ -200,7 +200,7 @@ def test_view_completed_2tasks_same_deadlines(
     mock_completed_task_3.deadline = "2022-08-26"
     mock_completed_task_4.deadline = "2022-08-26"
 
-    mock_get_sqlalchemy.join.return_value.add_columns.return_value.filter.return_value.all.return_value = [
+    mock_get_sqlalchemy.join.return_value.add_columns.return_value.filter.return_value.filter.return_value.order_by.return_value.limit.return_value.all.return_value = [
         mock_completed_task_3,
         mock_completed_task_4,
     ]
@@ -245,7 +245,7 @@ def test_view_completed_2tasks_same_deadlines1(
     mock_completed_task_3.deadline = "2022-08-27"
     mock_completed_task_4.deadline = "2022-08-28"
 
-    mock_get_sqlalchemy.join.return_value.add_columns.return_value.filter.return_value.all.return_value = [
+    mock_get_sqlalchemy.join.return_value.add_columns.return_value.filter.return_value.filter.return_value.order_by.return_value.limit.return_value.all.return_value = [
         mock_completed_task_3,
         mock_completed_task_4,
     ]
@@ -284,7 +284,7 @@ def test_view_completed_0tasks_varying_message(mock_get_sqlalchemy):
     Test the view completed command with no tasks and a custom empty message.
     """
     # Mocking DB call
-    mock_get_sqlalchemy.join.return_value.add_columns.return_value.filter.return_value.all.return_value = []
+    mock_get_sqlalchemy.join.return_value.add_columns.return_value.filter.return_value.filter.return_value.order_by.return_value.limit.return_value.all.return_value = []
 
     # Test function
     vp = ViewPoints(progress=1.0)
@@ -311,7 +311,7 @@ def test_view_completed_0tasks_varying_message1(mock_get_sqlalchemy):
     Test the view completed command with no tasks and a custom empty message.
     """
     # Mocking DB call
-    mock_get_sqlalchemy.join.return_value.add_columns.return_value.filter.return_value.all.return_value = []
+    mock_get_sqlalchemy.join.return_value.add_columns.return_value.filter.return_value.filter.return_value.order_by.return_value.limit.return_value.all.return_value = []
 
     # Test function
     vp = ViewPoints(progress=1.0)
@@ -18,7 +18,7 @@ def test_view_deadline_tasks(
     Test the view deadline tasks command with two tasks.
     """
     # Mocking DB call
-    mock_get_sqlalchemy.join.return_value.add_columns.return_value.filter.return_value.filter.return_value.all.return_value = [
+    mock_get_sqlalchemy.join.return_value.with_entities.return_value.filter.return_value.filter.return_value.order_by.return_value.all.return_value = [
         mock_pending_task_1,
         mock_pending_task_2,
     ]
@@ -59,7 +59,7 @@ def test_view_deadline_tasks_single_task(
     Test the view deadline tasks command with one task.
     """
     # Mocking DB call
-    mock_get_sqlalchemy.join.return_value.add_columns.return_value.filter.return_value.filter.return_value.all.return_value = [
+    mock_get_sqlalchemy.join.return_value.with_entities.return_value.filter.return_value.filter.return_value.order_by.return_value.all.return_value = [
         mock_pending_task_1,
     ]
 
@@ -90,7 +90,7 @@ def test_view_pending_0tasks(mock_get_sqlalchemy):
     Test the view pending command for 0 tasks.
     """
     # Mocking DB call
-    mock_get_sqlalchemy.join.return_value.add_columns.return_value.filter.return_value.all.return_value = []
+    mock_get_sqlalchemy.join.return_value.add_columns.return_value.filter.return_value.filter.return_value.order_by.return_value.limit.return_value.all.return_value = []
 
     # Test function
     vp = ViewPoints(progress=0.0)
@@ -118,7 +118,7 @@ def test_view_pending_tasks_zero_progress(mock_pending_task_2, mock_get_sqlalche
     Test the view pending tasks with tasks having zero progress.
     """
     # Mocking DB call
-    mock_get_sqlalchemy.join.return_value.add_columns.return_value.filter.return_value.all.return_value = [
+    mock_get_sqlalchemy.join.return_value.add_columns.return_value.filter.return_value.filter.return_value.order_by.return_value.limit.return_value.all.return_value = [
         mock_pending_task_2,
     ]
 
@@ -147,7 +147,7 @@ def test_view_pending_tasks_with_progress_lessthan50_1(mock_pending_task_1, mock
     Test the view pending tasks with non-zero progress.
     """
     # Mocking DB call
-    mock_get_sqlalchemy.join.return_value.add_columns.return_value.filter.return_value.all.return_value = [
+    mock_get_sqlalchemy.join.return_value.add_columns.return_value.filter.return_value.filter.return_value.order_by.return_value.limit.return_value.all.return_value = [
         mock_pending_task_1,
     ]
 
@@ -178,7 +178,7 @@ def test_view_pending_tasks_with_progress_lessthan50_2(mock_pending_task_1, mock
     Test the view pending tasks with non-zero progress.
     """
     # Mocking DB call
-    mock_get_sqlalchemy.join.return_value.add_columns.return_value.filter.return_value.all.return_value = [
+    mock_get_sqlalchemy.join.return_value.add_columns.return_value.filter.return_value.filter.return_value.order_by.return_value.limit.return_value.all.return_value = [
         mock_pending_task_1,
     ]
 
@@ -207,7 +207,7 @@ def test_view_pending_tasks_with_progress_lessthan50(mock_pending_task_1, mock_g
     Test the view pending tasks with non-zero progress.
     """
     # Mocking DB call
-    mock_get_sqlalchemy.join.return_value.add_columns.return_value.filter.return_value.all.return_value = [
+    mock_get_sqlalchemy.join.return_value.add_columns.return_value.filter.return_value.filter.return_value.order_by.return_value.limit.return_value.all.return_value = [
         mock_pending_task_1,
     ]
 
@@ -237,7 +237,7 @@ def test_view_pending_tasks_with_progress_50percent(mock_pending_task_1, mock_ge
     Test the view pending tasks with non-zero progress.
     """
     # Mocking DB call
-    mock_get_sqlalchemy.join.return_value.add_columns.return_value.filter.return_value.all.return_value = [
+    mock_get_sqlalchemy.join.return_value.add_columns.return_value.filter.return_value.filter.return_value.order_by.return_value.limit.return_value.all.return_value = [
         mock_pending_task_1,
     ]
 
@@ -268,7 +268,7 @@ def test_view_pending_tasks_with_progress_greaterthan50_1(mock_pending_task_1, m
     Test the view pending tasks with non-zero progress.
     """
     # Mocking DB call
-    mock_get_sqlalchemy.join.return_value.add_columns.return_value.filter.return_value.all.return_value = [
+    mock_get_sqlalchemy.join.return_value.add_columns.return_value.filter.return_value.filter.return_value.order_by.return_value.limit.return_value.all.return_value = [
         mock_pending_task_1,
     ]
 
@@ -297,7 +297,7 @@ def test_view_pending_tasks_with_progress_greaterthan50_2(mock_pending_task_1, m
     Test the view pending tasks with non-zero progress.
     """
     # Mocking DB call
-    mock_get_sqlalchemy.join.return_value.add_columns.return_value.filter.return_value.all.return_value = [
+    mock_get_sqlalchemy.join.return_value.add_columns.return_value.filter.return_value.filter.return_value.order_by.return_value.limit.return_value.all.return_value = [
         mock_pending_task_1,
     ]
 
@@ -326,7 +326,7 @@ def test_view_pending_tasks_with_progress_greaterthan50_3(mock_pending_task_1, m
     Test the view pending tasks with non-zero progress.
     """
     # Mocking DB call
-    mock_get_sqlalchemy.join.return_value.add_columns.return_value.filter.return_value.all.return_value = [
+    mock_get_sqlalchemy.join.return_value.add_columns.return_value.filter.return_value.filter.return_value.order_by.return_value.limit.return_value.all.return_value = [
         mock_pending_task_1,
     ]
 
@@ -355,7 +355,7 @@ def test_view_pending_tasks_with_progress_greaterthan50_4(mock_pending_task_1, m
     Test the view pending tasks with non-zero progress.
     """
     # Mocking DB call
-    mock_get_sqlalchemy.join.return_value.add_columns.return_value.filter.return_value.all.return_value = [
+    mock_get_sqlalchemy.join.return_value.add_columns.return_value.filter.return_value.filter.return_value.order_by.return_value.limit.return_value.all.return_value = [
         mock_pending_task_1,
     ]
 
@@ -384,7 +384,7 @@ def test_view_pending_tasks_with_progress_100(mock_pending_task_1, mock_get_sqla
     Test the view pending tasks with non-zero progress.
     """
     # Mocking DB call
-    mock_get_sqlalchemy.join.return_value.add_columns.return_value.filter.return_value.all.return_value = [
+    mock_get_sqlalchemy.join.return_value.add_columns.return_value.filter.return_value.filter.return_value.order_by.return_value.limit.return_value.all.return_value = [
         mock_pending_task_1,
     ]
 
@@ -414,7 +414,7 @@ def test_view_deadline_tasks_no_tasks(mock_get_sqlalchemy):
     Test the view deadline tasks command with no tasks due.
     """
     # Mocking DB call
-    mock_get_sqlalchemy.join.return_value.add_columns.return_value.filter.return_value.filter.return_value.all.return_value = []
+    mock_get_sqlalchemy.join.return_value.with_entities.return_value.filter.return_value.filter.return_value.order_by.return_value.all.return_value = []
 
     # Test function
     vp = ViewDeadlineTasks()
@@ -450,7 +450,7 @@ def test_view_deadline_tasks_missing_deadline(mock_get_sqlalchemy):
     task_missing_deadline.description = "Task without deadline"
     task_missing_deadline.deadline = None
 
-    mock_get_sqlalchemy.join.return_value.add_columns.return_value.filter.return_value.filter.return_value.all.return_value = [
+    mock_get_sqlalchemy.join.return_value.with_entities.return_value.filter.return_value.filter.return_value.order_by.return_value.all.return_value = [
         task_missing_deadline,
     ]
 
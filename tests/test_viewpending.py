@@ -16,7 +16,7 @@ def test_view_pending_2tasks(
     Test the view pending command for 2 tasks.
     """
     # Mocking DB call
-    mock_get_sqlalchemy.join.return_value.add_columns.return_value.filter.return_value.all.return_value = [
+    mock_get_sqlalchemy.join.return_value.add_columns.return_value.filter.return_value.filter.return_value.order_by.return_value.limit.return_value.all.return_value = [
         mock_pending_task_1,
         mock_pending_task_2,
     ]
@@ -56,7 +56,7 @@ def test_view_pending_0tasks(
     Test the view pending command for 0 tasks.
     """
     # Mocking DB call
-    mock_get_sqlalchemy.join.return_value.add_columns.return_value.filter.return_value.all.return_value = []
+    mock_get_sqlalchemy.join.return_value.add_columns.return_value.filter.return_value.filter.return_value.order_by.return_value.limit.return_value.all.return_value = []
 
     # Test function
     vp = ViewPoints(progress=0.0)
@@ -84,7 +84,7 @@ def test_view_pending_1task(mock_pending_task_1, mock_get_sqlalchemy):
     Test the view pending command for 1 task.
     """
     # Mocking DB call
-    mock_get_sqlalchemy.join.return_value.add_columns.return_value.filter.return_value.all.return_value = [
+    mock_get_sqlalchemy.join.return_value.add_columns.return_value.filter.return_value.filter.return_value.order_by.return_value.limit.return_value.all.return_value = [
         mock_pending_task_1,
     ]
 
@@ -130,7 +130,7 @@ def test_view_pending_with_progress(mock_pending_task_1, mock_get_sqlalchemy):
     Test the view pending command with a custom progress value.
     """
     # Mocking DB call
-    mock_get_sqlalchemy.join.return_value.add_columns.return_value.filter.return_value.all.return_value = [
+    mock_get_sqlalchemy.join.return_value.add_columns.return_value.filter.return_value.filter.return_value.order_by.return_value.limit.return_value.all.return_value = [
         mock_pending_task_1,
     ]
 
@@ -171,14 +171,16 @@ def test_view_pending_large_tasks(mock_get_sqlalchemy):
         for i in range(1, 101)
     ]
 
-    mock_get_sqlalchemy.join.return_value.add_columns.return_value.filter.return_value.all.return_value = large_tasks
+    mock_get_sqlalchemy.join.return_value.add_columns.return_value.filter.return_value.filter.return_value.order_by.return_value.limit.return_value.all.return_value = large_tasks
 
     # Test function
     vp = ViewPoints(progress=0.0)
     payload = vp.get_list()
 
-    # Validate the number of blocks returned
-    assert len(payload["blocks"]) == 100
+    # Validate that one page of tasks is returned, followed by the next page button
+    assert len(payload["blocks"]) == ViewPoints.page_size + 1
+    assert payload["blocks"][-1]["type"] == "actions"
+    assert payload["blocks"][-1]["elements"][0]["action_id"] == "view_next_page"
 
 def test_view_pending_task_with_zero_points(mock_get_sqlalchemy):
     """
@@ -191,7 +193,7 @@ def test_view_pending_task_with_zero_points(mock_get_sqlalchemy):
     task_with_zero_points.description = "This is Task 2"
     task_with_zero_points.deadline = "2022-10-25"
 
-    mock_get_sqlalchemy.join.return_value.add_columns.return_value.filter.return_value.all.return_value = [
+    mock_get_sqlalchemy.join.return_value.add_columns.return_value.filter.return_value.filter.return_value.order_by.return_value.limit.return_value.all.return_value = [
         task_with_zero_points,
     ]
 
@@ -230,14 +232,16 @@ def test_view_pending_large_tasks_with_new_details(mock_get_sqlalchemy):
         for i in range(1, 101)
     ]
 
-    mock_get_sqlalchemy.join.return_value.add_columns.return_value.filter.return_value.all.return_value = large_tasks
+    mock_get_sqlalchemy.join.return_value.add_columns.return_value.filter.return_value.filter.return_value.order_by.return_value.limit.return_value.all.return_value = large_tasks
 
     # Test function
     vp = ViewPoints(progress=0.0)
     payload = vp.get_list()
 
-    # Validate the number of blocks returned
-    assert len(payload["blocks"]) == 100
+    # Validate that one page of tasks is returned, followed by the next page button
+    assert len(payload["blocks"]) == ViewPoints.page_size + 1
+    assert payload["blocks"][-1]["type"] == "actions"
+    assert payload["blocks"][-1]["elements"][0]["action_id"] == "view_next_page"
 
 def test_view_pending_task_with_new_zero_points(mock_get_sqlalchemy):
     """
@@ -250,7 +254,7 @@ def test_view_pending_task_with_new_zero_points(mock_get_sqlalchemy):
     task_with_zero_points.description = "Complete initial setup"
     task_with_zero_points.deadline = "2024-01-15"
 
-    mock_get_sqlalchemy.join.return_value.add_columns.return_value.filter.return_value.all.return_value = [
+    mock_get_sqlalchemy.join.return_value.add_columns.return_value.filter.return_value.filter.return_value.order_by.return_value.limit.return_value.all.return_value = [
         task_with_zero_points,
     ]
 
@@ -286,7 +290,7 @@ def test_view_pending_task_with_non_zero_points(mock_get_sqlalchemy):
     task_with_points.description = "This is Task 3"
     task_with_points.deadline = "2024-12-15"
 
-    mock_get_sqlalchemy.join.return_value.add_columns.return_value.filter.return_value.all.return_value = [
+    mock_get_sqlalchemy.join.return_value.add_columns.return_value.filter.return_value.filter.return_value.order_by.return_value.limit.return_value.all.return_value = [
         task_with_points,
     ]
 
@@ -321,7 +325,7 @@ def test_view_pending_task_with_high_points_and_past_deadline(mock_get_sqlalchem
     task_with_high_points.description = "Complete Project Alpha"
     task_with_high_points.deadline = "2023-05-10"
 
-    mock_get_sqlalchemy.join.return_value.add_columns.return_value.filter.return_value.all.return_value = [
+    mock_get_sqlalchemy.join.return_value.add_columns.return_value.filter.return_value.filter.return_value.order_by.return_value.limit.return_value.all.return_value = [
         task_with_high_points,
     ]
 
@@ -344,3 +348,21 @@ def test_view_pending_task_with_high_points_and_past_deadline(mock_get_sqlalchem
     }
 
     assert payload == expected_payload
+
+
+def test_view_pending_next_page(mock_get_sqlalchemy):
+    """
+    Test that the next page is read after the last task ID of the previous page.
+    """
+    tasks = [
+        MagicMock(task_id=i, points=1, description=f"Task {i}", deadline="2022-10-24")
+        for i in range(21, 24)
+    ]
+    query = mock_get_sqlalchemy.join.return_value.add_columns.return_value.filter.return_value
+    query.filter.return_value.order_by.return_value.limit.return_value.all.return_value = tasks
+
+    payload = ViewPoints(progress=0.0).get_list(after=20)
+
+    assert len(payload["blocks"]) == 3
+    assert payload["blocks"][0]["text"]["text"] == ">SP-21 (1 SlackPoints) Task 21 [Deadline: 2022-10-24]"
+    query.filter.return_value.order_by.return_value.limit.assert_called_once_with(ViewPoints.page_size + 1)